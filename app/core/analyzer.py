@@ -0,0 +1,121 @@
+"""
+Türkçe metin analizi (TfidfVectorizer için preprocessor + tokenizer).
+
+sklearn'ün varsayılanı `str.lower()` + `\\b\\w\\w+\\b` kullanır:
+- "İ".lower() -> "i̇" (i + birleşik nokta), "I".lower() -> "i" (Türkçede "ı")
+- "TBK-49", "2019/1001 E." gibi atıflar parçalanır ("tbk", "49", "2019", "1001")
+
+Analizörler:
+- "default":      sklearn varsayılanı (eski indekslerle uyumlu)
+- "turkish":      Türkçe büyük/küçük harf katlama + şapka kaldırma + atıf token'ları
+- "turkish_stem": "turkish" + hafif ek budama (çekim ekleri), sözlüğü küçültür
+
+Atıf token'ları: "TBK-49", "TBK m. 49", "TBK madde 49" -> "tbk_49";
+"2019/1001 E." -> "2019/1001_e", "2019/2001 K." -> "2019/2001_k".
+
+Token başına analiz (ek budama) LRU ile önbelleklenir; sorgu anındaki maliyet
+sözlük büyüdükçe artmaz.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+ANALYZERS = ("default", "turkish", "turkish_stem")
+TOKEN_CACHE_SIZE = 200_000
+
+_FOLD = str.maketrans({"I": "ı", "İ": "i", "Â": "a", "â": "a", "Î": "i", "î": "i", "Û": "u", "û": "u"})
+
+LAW_CODES = ("tck", "cmk", "tbk", "tmk", "hmk", "iik", "ttk", "iyuk", "aihs", "anayasa")
+
+_TOKEN_RE = re.compile(
+    r"(?P<law>\b(?P<code>" + "|".join(LAW_CODES) + r")(?:'\w+)?[\s\-]*(?:m\.|md\.|madde(?:si)?)?\s*(?P<art>\d+)\b)"
+    r"|(?P<docket>\b(?P<year>\d{4})\s*/\s*(?P<no>\d+)\s*(?P<ek>[ek])\b\.?)"
+    r"|(?P<word>\b\w\w+\b)"
+)
+
+# Uzundan kısaya; ilk eşleşen ek atılır. Basit, kurala dayalı (sözlüksüz) budama.
+_SUFFIXES = tuple(sorted({
+    "lar", "ler", "ları", "leri", "ların", "lerin", "larında", "lerinde", "larından", "lerinden",
+    "larına", "lerine", "larını", "lerini",
+    "dan", "den", "tan", "ten", "ndan", "nden", "ından", "inden", "undan", "ünden",
+    "da", "de", "ta", "te", "nda", "nde", "ında", "inde", "unda", "ünde",
+    "nın", "nin", "nun", "nün", "ın", "in", "un", "ün",
+    "na", "ne", "ya", "ye", "yı", "yi", "yu", "yü",
+    "sı", "si", "su", "sü", "ı", "i", "u", "ü", "a", "e",
+    "dır", "dir", "dur", "dür", "tır", "tir", "tur", "tür",
+    "mış", "miş", "muş", "müş", "mıştır", "miştir", "muştur", "müştür",
+}, key=len, reverse=True))
+MIN_STEM = 4
+MAX_STRIPS = 2
+
+
+def turkish_fold(text: str) -> str:
+    return text.translate(_FOLD).lower()
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def stem(token: str) -> str:
+    if token.isdigit():
+        return token
+    for _ in range(MAX_STRIPS):
+        for suf in _SUFFIXES:
+            if token.endswith(suf) and len(token) - len(suf) >= MIN_STEM:
+                token = token[: -len(suf)]
+                break
+        else:
+            break
+    return token
+
+
+def _tokens(text: str, stemmed: bool) -> List[str]:
+    out = []
+    for m in _TOKEN_RE.finditer(text):
+        if m.group("law"):
+            out.append(f"{m.group('code')}_{m.group('art')}")
+        elif m.group("docket"):
+            out.append(f"{m.group('year')}/{m.group('no')}_{m.group('ek')}")
+        else:
+            word = m.group("word")
+            out.append(stem(word) if stemmed else word)
+    return out
+
+
+def tokenize(text: str) -> List[str]:
+    return _tokens(text, stemmed=False)
+
+
+def tokenize_stem(text: str) -> List[str]:
+    return _tokens(text, stemmed=True)
+
+
+def vectorizer_kwargs(name: str) -> Dict[str, Any]:
+    """TfidfVectorizer'a verilecek analiz parametreleri."""
+    if name not in ANALYZERS:
+        raise ValueError(f"Unknown analyzer {name!r}; expected one of {ANALYZERS}")
+    if name == "default":
+        return {}
+    return {
+        "lowercase": False,
+        "preprocessor": turkish_fold,
+        "tokenizer": tokenize_stem if name == "turkish_stem" else tokenize,
+        "token_pattern": None,
+    }
+
+
+def make_vectorizer(params: Dict[str, Any], analyzer: str) -> TfidfVectorizer:
+    return TfidfVectorizer(**params, **vectorizer_kwargs(analyzer))
+
+
+def analyzer_name(vec: TfidfVectorizer) -> str:
+    if vec.tokenizer is tokenize_stem:
+        return "turkish_stem"
+    if vec.tokenizer is tokenize:
+        return "turkish"
+    return "default"
+
+
+def cache_stats() -> Dict[str, int]:
+    info = stem.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "entries": info.currsize, "capacity": info.maxsize}
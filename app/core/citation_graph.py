@@ -0,0 +1,100 @@
+"""
+Kanun <-> içtihat atıf grafı.
+
+İçtihat etiketleri kanun id'lerine atıf içerir (ör. ["manevi tazminat", "TBK-56"]).
+Yükleme anında iki CSR kurulur:
+- prec -> law: içtihat satırı -> atıf yaptığı kanun satırları
+- law -> prec: kanun satırı -> ona atıf yapan içtihat satırları (artan sırada)
+
+Genişletme, tohum satırların (en iyi isabetler) komşularını tohum skorlarıyla
+ağırlıklandırıp tek bincount ile toplar; maliyet yalnızca dokunulan kenar
+sayısına bağlıdır.
+"""
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .analyzer import turkish_fold
+from .doc_store import Doc
+
+_KEY_NOISE = re.compile(r"\bmd?\.|\bmadde(?:si)?\b|[\W_]+")
+
+
+def citation_key(text: str) -> str:
+    """
+    'TBK-56', 'tbk 56', 'TBK m.56' -> 'tbk56' (kanun id'si ile etiket eşleştirmesi için).
+    I/İ ayrımı da katlanır: 'İİK-89' ve laws.jsonl'deki 'IİK-89' aynı anahtara düşer.
+    """
+    return _KEY_NOISE.sub("", turkish_fold(text).replace("ı", "i"))
+
+
+def _spread(csr: Tuple[np.ndarray, np.ndarray], seeds: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Tohum satırların komşuları ve komşu başına toplam tohum ağırlığı (komşular artan sırada)."""
+    indptr, cols = csr
+    seeds = np.asarray(seeds, dtype=np.int64)
+    starts, ends = indptr[seeds], indptr[seeds + 1]
+    lens = ends - starts
+    if not lens.any():
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    idx = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+    targets, inverse = np.unique(cols[idx], return_inverse=True)
+    support = np.bincount(inverse, weights=np.repeat(np.asarray(weights, dtype=np.float64), lens))
+    return targets.astype(np.int64), support
+
+
+class CitationGraph:
+    def __init__(self, law_docs: List[Doc]):
+        self.n_laws = len(law_docs)
+        self._law_rows: Dict[str, int] = {}
+        for i, d in enumerate(law_docs):
+            self._law_rows.setdefault(citation_key(d.id), i)
+        self.n_precs = 0
+        # (indptr, sütunlar) çiftleri tek atamayla değişir; okuyucular tutarlı bir çift görür.
+        self.prec_to_law: Tuple[np.ndarray, np.ndarray] = (np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32))
+        self.law_to_prec: Tuple[np.ndarray, np.ndarray] = (
+            np.zeros(self.n_laws + 1, dtype=np.int64),
+            np.empty(0, dtype=np.int64),
+        )
+
+    def extend(self, docs: List[Doc]) -> None:
+        """Yeni içtihat satırlarını sona ekler (Retriever.prec_docs ile aynı sıra)."""
+        if not docs:
+            return
+        cols: List[int] = []
+        counts: List[int] = []
+        for d in docs:
+            keys = (citation_key(t) for t in d.meta.get("tags") or [])
+            rows = sorted({self._law_rows[k] for k in keys if k in self._law_rows})
+            cols.extend(rows)
+            counts.append(len(rows))
+
+        indptr, laws = self.prec_to_law
+        indptr = np.concatenate([indptr, indptr[-1] + np.cumsum(counts, dtype=np.int64)])
+        laws = np.concatenate([laws, np.asarray(cols, dtype=np.int32)])
+        n_precs = self.n_precs + len(docs)
+
+        # Ters yön: kanun sütununa göre kararlı sıralama; her kanunun içtihatları artan kalır.
+        precs = np.repeat(np.arange(n_precs, dtype=np.int64), np.diff(indptr))
+        law_indptr = np.zeros(self.n_laws + 1, dtype=np.int64)
+        np.cumsum(np.bincount(laws, minlength=self.n_laws), out=law_indptr[1:])
+
+        self.prec_to_law = (indptr, laws)
+        self.law_to_prec = (law_indptr, precs[np.argsort(laws, kind="stable")])
+        self.n_precs = n_precs
+
+    def citing_precedents(self, law_rows: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Verilen kanunlara atıf yapan içtihatlar ve ağırlıklı destekleri."""
+        return _spread(self.law_to_prec, law_rows, weights)
+
+    def cited_laws(self, prec_rows: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Verilen içtihatların atıf yaptığı kanunlar ve ağırlıklı destekleri."""
+        return _spread(self.prec_to_law, prec_rows, weights)
+
+    def stats(self) -> Dict[str, int]:
+        indptr, laws = self.prec_to_law
+        return {
+            "edges": int(len(laws)),
+            "citing_precedents": int((np.diff(indptr) > 0).sum()),
+            "cited_laws": int(len(np.unique(laws))),
+        }
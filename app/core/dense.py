@@ -0,0 +1,391 @@
+"""
+Yoğun vektör (embedding) araması: CPU, ağ yok.
+
+Doküman vektörleri:
+- "lsa": TF-IDF matrisi üzerinde TruncatedSVD (ek model gerekmez; eşanlamlı/ilişkili
+  terimleri aynı boyutlarda toplar, sözlükte birebir eşleşmeyen ifadeleri yakalar)
+- "st":  yerel bir sentence-transformers modeli (opsiyonel bağımlılık, device="cpu")
+- önceden hesaplanmış vektör dosyası: <dosya>.npy (n x d) + <dosya>.ids.json (satır sırası);
+  sorgular yine yukarıdaki embedder'lardan biriyle (aynı modelle) vektörlenir.
+
+Vektörler L2-normalize edilir (iç çarpım = kosinüs) ve float32 ya da int8 (satır başına
+ölçek) olarak saklanır; indeks klasöründe mmap ile açılır.
+
+ANN: IVF. Küresel k-means ile nlist merkez; vektörler liste sırasına göre diske yazılır,
+böylece bir listeyi taramak ardışık bir dilimi okumaktır. Sorgu en yakın nprobe listeyi
+tarar. Küçük korpusta (nlist=0) tam tarama yapılır. Kurulumdan sonra eklenen içtihatlar
+ayrı bir delta deposunda tutulur ve her sorguda tamamen taranır.
+"""
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+DENSE_MODES = ("off", "hybrid", "dense")
+DENSE_BACKENDS = ("lsa", "st")
+QUANTIZATIONS = ("int8", "float32")
+
+# nlist=0 iken bu boyutun altındaki korpuslar tam taranır.
+IVF_MIN_DOCS = 10_000
+KMEANS_ITERS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+# Tek seferde skorlanan satır sayısı: int8 -> float32 dönüşümü önbellekte kalsın.
+BLOCK_ROWS = 4096
+
+
+@dataclass(frozen=True)
+class DenseConfig:
+    backend: str = "lsa"
+    # "st": yerel model klasörü (indirme yapılmaz)
+    model: Optional[str] = None
+    # Önceden hesaplanmış doküman vektörleri (.npy); yoksa embedder ile hesaplanır
+    vectors: Optional[str] = None
+    # "lsa" boyutu
+    dim: int = 256
+    quantize: str = "int8"
+    # 0 = otomatik (~sqrt(n); IVF_MIN_DOCS altında tam tarama)
+    nlist: int = 0
+    nprobe: int = 8
+    # Hibrit füzyonda yoğun skorun ağırlığı (sözcüksel skor [0, 1]'e ölçeklenir)
+    alpha: float = 0.5
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+class LSAEmbedder:
+    name = "lsa"
+
+    def __init__(self, vec: TfidfVectorizer, components: np.ndarray):
+        self.vec = vec
+        self.components = components
+
+    @classmethod
+    def fit(cls, vec: TfidfVectorizer, tfidf_matrix, dim: int, seed: int = 0) -> "LSAEmbedder":
+        n_docs, n_features = tfidf_matrix.shape
+        svd = TruncatedSVD(n_components=max(1, min(dim, n_docs - 1, n_features - 1)), random_state=seed)
+        # Aynı metinlerden oluşan (ör. demo) korpuslarda explained_variance 0/0 uyarısı verir.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            svd.fit(tfidf_matrix)
+        return cls(vec, svd.components_.astype(np.float32))
+
+    def embed_matrix(self, x) -> np.ndarray:
+        return _normalize(x @ self.components.T)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.embed_matrix(self.vec.transform(texts))
+
+    def embed_docs(self, texts: Sequence[str], tfidf_matrix) -> np.ndarray:
+        # Metinleri yeniden okumaz; zaten hesaplanmış TF-IDF satırlarını kullanır.
+        return self.embed_matrix(tfidf_matrix)
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": self.name, "dim": int(self.components.shape[0])}
+
+
+class SentenceTransformerEmbedder:
+    name = "st"
+
+    def __init__(self, model_path: str, batch_size: int = 64):
+        # Yalnızca yerel dosyalar; hub'a bağlanılmaz.
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "Dense backend 'st' requires the optional 'sentence-transformers' package; "
+                "use backend 'lsa' or install it."
+            ) from e
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_path, device="cpu")
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = self.model.encode(list(texts), batch_size=self.batch_size, convert_to_numpy=True, normalize_embeddings=True)
+        return _normalize(out)
+
+    def embed_docs(self, texts: Sequence[str], tfidf_matrix) -> np.ndarray:
+        return self.embed(texts)
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": self.name, "model": self.model_path}
+
+
+def load_vectors(path: Path, ids: List[str]) -> np.ndarray:
+    """<path>.npy + <path>.ids.json; satırları verilen id sırasına dizer."""
+    path = Path(path)
+    vectors = np.load(path, mmap_mode="r")
+    file_ids = json.loads(path.with_suffix(".ids.json").read_text(encoding="utf-8"))
+    if len(file_ids) != vectors.shape[0]:
+        raise ValueError(f"{path}: {vectors.shape[0]} vectors but {len(file_ids)} ids")
+    row_of = {doc_id: i for i, doc_id in enumerate(file_ids)}
+    missing = [doc_id for doc_id in ids if doc_id not in row_of]
+    if missing:
+        raise ValueError(f"{path}: no vector for {len(missing)} documents (e.g. {missing[0]!r})")
+    return _normalize(vectors[[row_of[doc_id] for doc_id in ids]])
+
+
+class VectorStore:
+    """float32 veya int8 (satır başına ölçek) vektörler; skorlar her zaman float32."""
+
+    def __init__(self, data: np.ndarray, scales: Optional[np.ndarray] = None):
+        self.data = data
+        self.scales = scales
+
+    @classmethod
+    def from_float(cls, x: np.ndarray, quantize: str) -> "VectorStore":
+        if quantize not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization {quantize!r}; expected one of {QUANTIZATIONS}")
+        x = np.asarray(x, dtype=np.float32)
+        if quantize == "float32":
+            return cls(x)
+        scales = np.abs(x).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        q = np.rint(x / scales[:, None]).astype(np.int8)
+        return cls(q, scales.astype(np.float32))
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def _dot(self, block: np.ndarray, q: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+        if scales is None:
+            return block @ q
+        return (block.astype(np.float32) @ q) * scales
+
+    def dot_range(self, q: np.ndarray, start: int, stop: int) -> np.ndarray:
+        parts = []
+        for s in range(start, stop, BLOCK_ROWS):
+            e = min(stop, s + BLOCK_ROWS)
+            parts.append(self._dot(self.data[s:e], q, None if self.scales is None else self.scales[s:e]))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+
+    def dot_rows(self, q: np.ndarray, pos: np.ndarray) -> np.ndarray:
+        return self._dot(self.data[pos], q, None if self.scales is None else self.scales[pos])
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+
+def kmeans(x: np.ndarray, k: int, iters: int = KMEANS_ITERS, seed: int = 0) -> np.ndarray:
+    """Küresel k-means (kosinüs): merkezler birim normlu."""
+    rng = np.random.default_rng(seed)
+    sample = x[rng.choice(len(x), size=min(len(x), k * KMEANS_SAMPLE_PER_LIST), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = assign_lists(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=k)
+        # Boş listeler rastgele bir örnekle yeniden başlatılır.
+        empty = counts == 0
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def assign_lists(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(len(x), dtype=np.int64)
+    for s in range(0, len(x), BLOCK_ROWS):
+        out[s:s + BLOCK_ROWS] = np.argmax(np.asarray(x[s:s + BLOCK_ROWS], dtype=np.float32) @ centroids.T, axis=1)
+    return out
+
+
+def _topk(rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+        rows, scores = rows[part], scores[part]
+    order = np.lexsort((rows, -scores))
+    return rows[order], scores[order]
+
+
+class DenseIndex:
+    def __init__(
+        self,
+        embedder,
+        store: VectorStore,
+        rows: np.ndarray,
+        centroids: Optional[np.ndarray],
+        list_ptr: Optional[np.ndarray],
+        config: DenseConfig,
+    ):
+        # store satırları liste sırasındadır; rows[pos] = asıl doküman satırı.
+        self.embedder = embedder
+        self.store = store
+        self.rows = rows
+        self.pos = np.empty(len(rows), dtype=np.int64)
+        self.pos[rows] = np.arange(len(rows))
+        self.centroids = centroids
+        self.list_ptr = list_ptr
+        self.config = config
+        self._delta: Optional[VectorStore] = None
+
+    @classmethod
+    def build(cls, config: DenseConfig, embedder, vectors: np.ndarray, seed: int = 0) -> "DenseIndex":
+        vectors = _normalize(vectors)
+        n = len(vectors)
+        nlist = config.nlist or (int(np.sqrt(n)) if n >= IVF_MIN_DOCS else 0)
+        centroids = list_ptr = None
+        rows = np.arange(n, dtype=np.int64)
+        if 0 < nlist < n:
+            centroids = kmeans(vectors, nlist, seed=seed)
+            assign = assign_lists(vectors, centroids)
+            rows = np.argsort(assign, kind="stable")
+            list_ptr = np.zeros(nlist + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assign, minlength=nlist), out=list_ptr[1:])
+        return cls(embedder, VectorStore.from_float(vectors[rows], config.quantize), rows, centroids, list_ptr, config)
+
+    @property
+    def n_base(self) -> int:
+        return len(self.store)
+
+    @property
+    def n_lists(self) -> int:
+        return 0 if self.centroids is None else len(self.centroids)
+
+    def extend(self, vectors: np.ndarray) -> None:
+        """Sonradan eklenen içtihatlar (delta); tam taranır, bir sonraki compaction'da IVF'e girer."""
+        # Delta küçüktür; nicelenmeden float32 tutulur.
+        prev = self._delta
+        data = _normalize(vectors)
+        self._delta = VectorStore(data if prev is None else np.vstack([prev.data, data]))
+
+    def embed_queries(self, queries: Sequence[str]) -> np.ndarray:
+        return self.embedder.embed(queries)
+
+    def search(
+        self, q: np.ndarray, k: int, n_rows: int, mask: Optional[np.ndarray] = None, nprobe: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """En yakın k doküman (asıl satır numaraları, kosinüs). n_rows: anlık görüntüdeki satır sayısı."""
+        nprobe = nprobe or self.config.nprobe
+        if self.centroids is None or nprobe >= self.n_lists:
+            pos = np.arange(self.n_base, dtype=np.int64)
+            scores = self.store.dot_range(q, 0, self.n_base)
+        else:
+            probe = np.argpartition(-(self.centroids @ q), nprobe - 1)[:nprobe]
+            probe.sort()
+            pos = np.concatenate([np.arange(self.list_ptr[p], self.list_ptr[p + 1]) for p in probe])
+            scores = np.concatenate([self.store.dot_range(q, self.list_ptr[p], self.list_ptr[p + 1]) for p in probe])
+        rows = self.rows[pos]
+
+        delta = self._delta
+        if delta is not None:
+            rows = np.concatenate([rows, self.n_base + np.arange(len(delta), dtype=np.int64)])
+            scores = np.concatenate([scores, delta.dot_range(q, 0, len(delta))])
+
+        keep = rows < n_rows
+        if mask is not None:
+            keep[keep] = mask[rows[keep]]
+        rows, scores = rows[keep], scores[keep]
+        if mask is not None and len(rows) < k:
+            # Seçici filtre probe edilen listelerde yeterli aday bırakmadı: adayları tam skorla.
+            rows = np.flatnonzero(mask[:n_rows])
+            scores = self.score_rows(q, rows)
+        return _topk(rows, scores.astype(np.float64), k)
+
+    def score_rows(self, q: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Verilen doküman satırlarının tam kosinüs skorları (hibrit füzyon için)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.zeros(len(rows), dtype=np.float32)
+        base = rows < self.n_base
+        if base.any():
+            out[base] = self.store.dot_rows(q, self.pos[rows[base]])
+        delta = self._delta
+        if delta is not None and (~base).any():
+            out[~base] = delta.dot_rows(q, rows[~base] - self.n_base)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.embedder.info(),
+            "quantize": self.config.quantize,
+            "docs": self.n_base,
+            "delta": 0 if self._delta is None else len(self._delta),
+            "lists": self.n_lists,
+            "nprobe": self.config.nprobe,
+            "mbytes": round(self.store.nbytes / 1e6, 1),
+        }
+
+    def write(self, out_dir: Path, prefix: str = "precedent.dense") -> Dict[str, Any]:
+        """İndeks klasörüne yazar (delta hariç); manifest'e girecek bilgiyi döner."""
+        np.save(out_dir / f"{prefix}.vectors.npy", self.store.data)
+        if self.store.scales is not None:
+            np.save(out_dir / f"{prefix}.scales.npy", self.store.scales)
+        np.save(out_dir / f"{prefix}.rows.npy", self.rows)
+        if self.centroids is not None:
+            np.save(out_dir / f"{prefix}.centroids.npy", self.centroids)
+            np.save(out_dir / f"{prefix}.list_ptr.npy", self.list_ptr)
+        if isinstance(self.embedder, LSAEmbedder):
+            np.save(out_dir / f"{prefix}.components.npy", self.embedder.components)
+        return {
+            "embedder": self.embedder.info(),
+            "quantize": self.config.quantize,
+            "nprobe": self.config.nprobe,
+            "alpha": self.config.alpha,
+            "n_docs": self.n_base,
+            "ivf": self.centroids is not None,
+        }
+
+
+def make_embedder(config: DenseConfig, vec: TfidfVectorizer, tfidf_matrix):
+    if config.backend == "lsa":
+        return LSAEmbedder.fit(vec, tfidf_matrix, config.dim)
+    if config.backend == "st":
+        if not config.model:
+            raise ValueError("Dense backend 'st' needs a local model path (DenseConfig.model)")
+        return SentenceTransformerEmbedder(config.model)
+    raise ValueError(f"Unknown dense backend {config.backend!r}; expected one of {DENSE_BACKENDS}")
+
+
+def build_dense(config: DenseConfig, vec: TfidfVectorizer, tfidf_matrix, docs, texts) -> DenseIndex:
+    """Doküman vektörlerini (dosyadan ya da embedder ile) üretip IVF indeksini kurar."""
+    embedder = make_embedder(config, vec, tfidf_matrix)
+    if config.vectors:
+        vectors = load_vectors(Path(config.vectors), [d.id for d in docs])
+    else:
+        vectors = embedder.embed_docs(texts, tfidf_matrix)
+    return DenseIndex.build(config, embedder, vectors)
+
+
+def read_dense(
+    index_dir: Path, info: Dict[str, Any], vec: TfidfVectorizer, mmap: bool, config: Optional[DenseConfig] = None,
+    prefix: str = "precedent.dense",
+) -> DenseIndex:
+    """
+    Kayıtlı yoğun indeksi açar. Vektörler, niceleme ve embedder indeksle birlikte gelir;
+    config verilirse yalnızca sorgu anı ayarları (nprobe, alpha, st model yolu) ondan alınır.
+    """
+    mode = "r" if mmap else None
+    index_dir = Path(index_dir)
+    emb = info["embedder"]
+    if emb["backend"] == "lsa":
+        embedder = LSAEmbedder(vec, np.load(index_dir / f"{prefix}.components.npy"))
+    else:
+        embedder = SentenceTransformerEmbedder((config.model if config and config.model else None) or emb["model"])
+    scales_path = index_dir / f"{prefix}.scales.npy"
+    store = VectorStore(
+        np.load(index_dir / f"{prefix}.vectors.npy", mmap_mode=mode),
+        np.load(scales_path) if scales_path.exists() else None,
+    )
+    centroids = list_ptr = None
+    if info.get("ivf"):
+        centroids = np.load(index_dir / f"{prefix}.centroids.npy")
+        list_ptr = np.load(index_dir / f"{prefix}.list_ptr.npy")
+    stored = DenseConfig(
+        backend=emb["backend"],
+        model=emb.get("model"),
+        dim=emb.get("dim", 0),
+        quantize=info["quantize"],
+        nprobe=config.nprobe if config else info.get("nprobe", 8),
+        alpha=config.alpha if config else info.get("alpha", 0.5),
+    )
+    return DenseIndex(embedder, store, np.load(index_dir / f"{prefix}.rows.npy"), centroids, list_ptr, stored)
@@ -0,0 +1,172 @@
+"""
+Kompakt doküman kayıtları.
+
+Büyük içtihat dökümlerinde RSS'i metinler ve doküman başına meta dict'leri
+doldurur; oysa search yalnızca satır numaralarıyla çalışır. Burada:
+
+- Doc `__slots__` kullanır; meta, paylaşılan bir anahtar tuple'ı + değer
+  tuple'ı olarak tutulur, `doc.meta` erişimde dict'e çevrilir.
+- Az sayıda farklı değeri olan alanlar (chamber, source, date, tags) intern edilir:
+  aynı daire adı bellekte tek kopyadır.
+- Dosyadan yüklenen dokümanların metni bellekte tutulmaz; kaynak jsonl'deki
+  satır offset'i saklanır ve `doc.text` ilk okunduğunda diskten alınır
+  (yalnızca prompt'a/yanıta giren isabetler için).
+"""
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+INTERNED_FIELDS = {"source", "chamber", "date", "tags"}
+
+_KEY_TUPLES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _compact_value(key: str, value: Any) -> Any:
+    if isinstance(value, list):
+        value = tuple(value)
+    if key in INTERNED_FIELDS:
+        if isinstance(value, str):
+            return sys.intern(value)
+        if isinstance(value, tuple):
+            return tuple(sys.intern(v) if isinstance(v, str) else v for v in value)
+    return value
+
+
+class TextSource:
+    """
+    jsonl dosyasından offset ile tek satır okur; tüm dokümanlar aynı dosya tanıtıcısını paylaşır.
+    Dosya açılışta açılır: yerine yenisi yazılsa (os.replace) da offset'ler eski içeriği gösterir.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._f = self.path.open("rb")
+        self._lock = threading.Lock()
+
+    def replaced(self) -> bool:
+        """Yol artık açık tutulan dosyayı göstermiyor mu (dosya yeniden yazılmış)?"""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._f.fileno()).st_ino
+        except FileNotFoundError:
+            return False
+
+    def read_line(self, offset: int) -> bytes:
+        with self._lock:
+            self._f.seek(offset)
+            return self._f.readline()
+
+    def read_text(self, offset: int) -> str:
+        return json.loads(self.read_line(offset).decode("utf-8"))["text"]
+
+
+_SOURCES: Dict[Path, TextSource] = {}
+_SOURCES_LOCK = threading.Lock()
+
+
+def text_source(path: Path) -> TextSource:
+    key = Path(path).resolve()
+    with _SOURCES_LOCK:
+        src = _SOURCES.get(key)
+        if src is None or src.replaced():
+            src = _SOURCES[key] = TextSource(key)
+        return src
+
+
+class Doc:
+    __slots__ = ("id", "title", "_text", "_src", "_offset", "_meta_keys", "_meta_vals")
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        text: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        src: Optional[TextSource] = None,
+        offset: int = -1,
+    ):
+        if text is None and src is None:
+            raise ValueError(f"Doc {id!r} needs either text or a text source")
+        self.id = id
+        self.title = title
+        self._text = text
+        self._src = src
+        self._offset = offset
+        meta = meta or {}
+        keys = tuple(meta)
+        self._meta_keys = _KEY_TUPLES.setdefault(keys, keys)
+        self._meta_vals = tuple(_compact_value(k, meta[k]) for k in keys)
+
+    @property
+    def text(self) -> str:
+        if self._text is not None:
+            return self._text
+        return self._src.read_text(self._offset)
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return {k: list(v) if k == "tags" else v for k, v in zip(self._meta_keys, self._meta_vals)}
+
+    def __repr__(self) -> str:
+        return f"Doc(id={self.id!r}, title={self.title!r})"
+
+
+def doc_from_obj(obj: Dict[str, Any], kind: str, src: Optional[TextSource] = None, offset: int = -1) -> Doc:
+    """src verilirse metin bellekte tutulmaz, gerektiğinde src'den offset ile okunur."""
+    if kind == "law":
+        meta = {"source": obj.get("source", "UNKNOWN"), "demo": obj.get("demo", False)}
+    else:
+        meta = {
+            "chamber": obj.get("chamber"),
+            "date": obj.get("date"),
+            "ek": obj.get("ek"),
+            "kk": obj.get("kk"),
+            "tags": obj.get("tags", []),
+            "demo": obj.get("demo", False),
+        }
+    text = obj["text"]
+    return Doc(
+        id=obj["id"],
+        title=obj.get("title", obj["id"]),
+        text=None if src is not None else text,
+        meta=meta,
+        src=src,
+        offset=offset,
+    )
+
+
+def iter_jsonl(path: Path, offset: int = 0, complete_only: bool = True) -> Iterator[Tuple[int, Dict[str, Any], int]]:
+    """
+    Dosyayı satır satır akıtır: (satır_offset, obj, sonraki_offset).
+    complete_only ise '\\n' ile bitmeyen (yarım yazılmış) son satırda durur.
+    """
+    with Path(path).open("rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if complete_only and not raw.endswith(b"\n"):
+                break
+            start, offset = offset, offset + len(raw)
+            line = raw.decode("utf-8").strip()
+            if not line:
+                continue
+            yield start, json.loads(line), offset
+
+
+class DocTexts:
+    """Dokümanların metinlerine tekrar gezilebilir, tembel görünüm (vectorizer fit'i için liste kurmadan)."""
+
+    def __init__(self, docs: Sequence[Doc]):
+        self.docs = docs
+
+    def __iter__(self) -> Iterator[str]:
+        return (d.text for d in self.docs)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+
+def doc_texts(docs: Iterable[Doc]) -> DocTexts:
+    return DocTexts(docs if isinstance(docs, (list, tuple)) else list(docs))
+
@@ -0,0 +1,293 @@
+"""
+Kalıcı TF-IDF indeksi (disk formatı).
+
+Her koleksiyon (law / precedent) için:
+  <kind>.vocab.json   -> sütun sırasına göre terim listesi
+  <kind>.ids.json     -> satır sırasına göre doküman id'leri
+  <kind>.idf.npy      -> IDF ağırlıkları
+  <kind>.data.npy / <kind>.indices.npy / <kind>.indptr.npy -> CSR dizileri
+  <kind>.inv_*.npy    -> aynı matrisin terim-majör (CSC) dizileri, posting listeleri (v2)
+  <kind>.<scorer>.*   -> TF-IDF dışındaki skorlayıcıların (ör. bm25) ağırlık posting'leri ve dizileri
+  precedent.dense.* -> opsiyonel yoğun vektör indeksi (bkz. dense.py); manifest'te "dense"
+manifest.json en son yazılır; format sürümünü ve parametreleri (analizör dahil, v3) taşır.
+
+Her build kendi sürüm klasörüne (<out>.v<ns>-<pid>) yazılır; <out> bu klasöre işaret eden
+bir symlink'tir ve atomik olarak (os.replace) yeni sürüme çevrilir. Böylece diskte
+indeksin olmadığı bir an olmaz. Yazan süreçler index_lock ile tek tek çalışır.
+
+.npy dosyaları mmap ile açılır; böylece aynı makinedeki tüm worker'lar
+page cache'teki tek kopyayı paylaşır.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası dosya kilidi yok
+    fcntl = None
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .analyzer import analyzer_name, make_vectorizer
+from .dense import DenseConfig, DenseIndex, read_dense
+from .scorers import SCORERS
+from .topk import InvertedIndex
+
+FORMAT_VERSION = 3
+# v1: yalnızca CSR; posting listeleri açılışta bellekte türetilir.
+# v3: params.analyzer; v1/v2 indeksleri sklearn varsayılan analizörüyle kurulmuştur.
+READABLE_VERSIONS = (1, 2, 3)
+MANIFEST_NAME = "manifest.json"
+KINDS = ("law", "precedent")
+# Yeni sürüm yayımlandıktan sonra diskte tutulan sürüm sayısı (yeni + bir önceki);
+# önceki sürümü açmakta olan worker'lar yarıda kalmaz.
+KEEP_VERSIONS = 2
+
+
+@dataclass
+class IndexedCollection:
+    vectorizer: TfidfVectorizer
+    matrix: csr_matrix
+    ids: List[str]
+    # skorlayıcı adı -> (fit edilmiş skorlayıcı, ağırlık posting'leri); "tfidf" matristen türetilir.
+    scorers: Optional[Dict[str, Tuple[Any, InvertedIndex]]] = None
+
+
+def corpus_fingerprint(ids: List[str]) -> str:
+    h = hashlib.sha256()
+    for doc_id in ids:
+        h.update(doc_id.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _scorer_prefix(kind: str, name: str) -> str:
+    # TF-IDF posting'leri v2 ile gelen <kind>.inv_* adlarını korur.
+    return kind if name == "tfidf" else f"{kind}.{name}"
+
+
+def _vectorizer_params(vec: TfidfVectorizer) -> Dict[str, Any]:
+    return {"ngram_range": list(vec.ngram_range), "max_features": vec.max_features, "analyzer": analyzer_name(vec)}
+
+
+def _write_collection(
+    out_dir: Path,
+    kind: str,
+    vec: TfidfVectorizer,
+    matrix,
+    ids: List[str],
+    scorers: Optional[Dict[str, Tuple[Any, InvertedIndex]]],
+) -> Dict[str, Any]:
+    m = csr_matrix(matrix)
+    m.sort_indices()
+    scorers = dict(scorers or {})
+    if "tfidf" not in scorers:
+        scorers["tfidf"] = (SCORERS["tfidf"](), InvertedIndex.from_matrix(m))
+
+    terms = vec.get_feature_names_out().tolist()
+    (out_dir / f"{kind}.vocab.json").write_text(json.dumps(terms, ensure_ascii=False), encoding="utf-8")
+    (out_dir / f"{kind}.ids.json").write_text(json.dumps(ids, ensure_ascii=False), encoding="utf-8")
+    np.save(out_dir / f"{kind}.idf.npy", np.asarray(vec.idf_, dtype=np.float64))
+    np.save(out_dir / f"{kind}.data.npy", m.data)
+    np.save(out_dir / f"{kind}.indices.npy", m.indices)
+    np.save(out_dir / f"{kind}.indptr.npy", m.indptr)
+
+    scorer_states: Dict[str, Any] = {}
+    for name, (scorer, inv) in scorers.items():
+        prefix = _scorer_prefix(kind, name)
+        np.save(out_dir / f"{prefix}.inv_data.npy", inv.data)
+        np.save(out_dir / f"{prefix}.inv_indices.npy", inv.indices)
+        np.save(out_dir / f"{prefix}.inv_indptr.npy", inv.indptr)
+        for arr_name, arr in scorer.arrays().items():
+            np.save(out_dir / f"{prefix}.{arr_name}.npy", arr)
+        scorer_states[name] = {"state": scorer.state(), "arrays": sorted(scorer.arrays())}
+
+    return {
+        "n_docs": m.shape[0],
+        "n_features": m.shape[1],
+        "nnz": int(m.nnz),
+        "params": _vectorizer_params(vec),
+        "fingerprint": corpus_fingerprint(ids),
+        "scorers": scorer_states,
+    }
+
+
+@contextmanager
+def index_lock(out_dir: Path, blocking: bool = True) -> Iterator[bool]:
+    """
+    <out>.lock üzerinde süreçler arası kilit; kilit alındıysa True verir.
+    blocking=False iken başka bir süreç tutuyorsa beklemeden False verir.
+    """
+    out_dir = Path(out_dir)
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_dir.with_name(f"{out_dir.name}.lock"), "a") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+
+
+def published_version(out_dir: Path) -> Optional[str]:
+    """<out> symlink'inin gösterdiği sürüm klasörünün adı (eski düz klasör / yoksa None)."""
+    out_dir = Path(out_dir)
+    return os.readlink(out_dir) if out_dir.is_symlink() else None
+
+
+def _version_key(path: Path) -> int:
+    try:
+        return int(path.name.rsplit(".v", 1)[1].split("-", 1)[0])
+    except (IndexError, ValueError):
+        return -1
+
+
+def _publish(out_dir: Path, version_dir: Path) -> None:
+    link_tmp = out_dir.with_name(f"{out_dir.name}.link-{os.getpid()}")
+    if link_tmp.is_symlink() or link_tmp.exists():
+        link_tmp.unlink()
+    os.symlink(version_dir.name, link_tmp)
+    if out_dir.exists() and not out_dir.is_symlink():
+        # Eski biçim (düz klasör): bir kereye mahsus en eski sürüm olarak kenara al.
+        os.replace(out_dir, out_dir.with_name(f"{out_dir.name}.v0-{os.getpid()}"))
+    os.replace(link_tmp, out_dir)
+
+
+def _prune(out_dir: Path, keep: int = KEEP_VERSIONS) -> None:
+    versions = sorted(
+        (p for p in out_dir.parent.glob(f"{out_dir.name}.v*") if p.is_dir() and not p.is_symlink()),
+        key=_version_key,
+    )
+    current = published_version(out_dir)
+    old = [p for p in versions if p.name != current][: max(0, len(versions) - keep)]
+    for p in old:
+        # mmap ile açık dosyalar etkilenmez (Linux'ta inode yaşamaya devam eder).
+        shutil.rmtree(p, ignore_errors=True)
+
+
+def save_index(
+    out_dir: Path, collections: Dict[str, Optional[IndexedCollection]], dense: Optional[DenseIndex] = None
+) -> Path:
+    """
+    İndeksi yeni bir sürüm klasörüne yazar, sonra <out> symlink'ini atomik olarak ona çevirir.
+    Eş zamanlı yazarlar için çağıran index_lock(out_dir) tutmalıdır.
+    """
+    out_dir = Path(out_dir)
+    version_dir = out_dir.with_name(f"{out_dir.name}.v{time.time_ns()}-{os.getpid()}")
+    version_dir.mkdir(parents=True)
+
+    manifest: Dict[str, Any] = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "collections": {},
+    }
+    for kind in KINDS:
+        col = collections.get(kind)
+        if col is None:
+            manifest["collections"][kind] = None
+            continue
+        manifest["collections"][kind] = _write_collection(
+            version_dir, kind, col.vectorizer, col.matrix, col.ids, col.scorers
+        )
+    if dense is not None and collections.get("precedent") is not None:
+        manifest["dense"] = dense.write(version_dir)
+
+    (version_dir / MANIFEST_NAME).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    _publish(out_dir, version_dir)
+    _prune(out_dir)
+    return out_dir
+
+
+def read_manifest(index_dir: Path) -> Optional[Dict[str, Any]]:
+    path = Path(index_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("format_version") not in READABLE_VERSIONS:
+        raise ValueError(
+            f"Unsupported index format_version={manifest.get('format_version')} "
+            f"(expected one of {READABLE_VERSIONS}). Rebuild with tools/build_index.py."
+        )
+    return manifest
+
+
+def _restore_vectorizer(params: Dict[str, Any], terms: List[str], idf: np.ndarray) -> TfidfVectorizer:
+    vec = make_vectorizer(
+        {"ngram_range": tuple(params["ngram_range"]), "max_features": params["max_features"]},
+        params.get("analyzer", "default"),
+    )
+    vec.vocabulary_ = {t: i for i, t in enumerate(terms)}
+    vec.idf_ = idf
+    return vec
+
+
+def _read_collection(index_dir: Path, kind: str, info: Dict[str, Any], mmap: bool) -> IndexedCollection:
+    mode = "r" if mmap else None
+    terms = json.loads((index_dir / f"{kind}.vocab.json").read_text(encoding="utf-8"))
+    ids = json.loads((index_dir / f"{kind}.ids.json").read_text(encoding="utf-8"))
+    idf = np.load(index_dir / f"{kind}.idf.npy")
+    data = np.load(index_dir / f"{kind}.data.npy", mmap_mode=mode)
+    indices = np.load(index_dir / f"{kind}.indices.npy", mmap_mode=mode)
+    indptr = np.load(index_dir / f"{kind}.indptr.npy", mmap_mode=mode)
+
+    matrix = csr_matrix((data, indices, indptr), shape=(info["n_docs"], info["n_features"]), copy=False)
+    matrix.has_sorted_indices = True
+
+    # v1: hiç posting yok; v2 (bm25 öncesi): manifest'te "scorers" yok ama tfidf posting'leri var.
+    scorer_infos = info.get("scorers")
+    if scorer_infos is None:
+        scorer_infos = {"tfidf": {"state": {}, "arrays": []}} if (index_dir / f"{kind}.inv_indptr.npy").exists() else {}
+
+    scorers: Dict[str, Tuple[Any, InvertedIndex]] = {}
+    for name, sinfo in scorer_infos.items():
+        if name not in SCORERS:
+            continue
+        prefix = _scorer_prefix(kind, name)
+        inv = InvertedIndex(
+            indptr=np.load(index_dir / f"{prefix}.inv_indptr.npy", mmap_mode=mode),
+            indices=np.load(index_dir / f"{prefix}.inv_indices.npy", mmap_mode=mode),
+            data=np.load(index_dir / f"{prefix}.inv_data.npy", mmap_mode=mode),
+            n_docs=info["n_docs"],
+        )
+        arrays = {a: np.load(index_dir / f"{prefix}.{a}.npy") for a in sinfo.get("arrays", [])}
+        scorers[name] = (SCORERS[name].restore(sinfo.get("state", {}), arrays), inv)
+
+    return IndexedCollection(
+        vectorizer=_restore_vectorizer(info["params"], terms, idf),
+        matrix=matrix,
+        ids=ids,
+        scorers=scorers,
+    )
+
+
+def load_index(index_dir: Path, mmap: bool = True, dense: Optional[DenseConfig] = None) -> Dict[str, Any]:
+    """
+    {"law", "precedent"} koleksiyonları; dense verilirse ve indekste yoğun vektörler
+    varsa "dense" anahtarında DenseIndex (yoksa None).
+    """
+    # Symlink bir kez çözülür: okuma sırasında yeni sürüm yayımlansa da tüm dosyalar aynı sürümden gelir.
+    index_dir = Path(index_dir).resolve()
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No index manifest in {index_dir}")
+
+    out: Dict[str, Any] = {}
+    for kind in KINDS:
+        info = manifest["collections"].get(kind)
+        out[kind] = _read_collection(index_dir, kind, info, mmap) if info else None
+    dense_info = manifest.get("dense")
+    out["dense"] = None
+    if dense is not None and dense_info and out["precedent"] is not None:
+        out["dense"] = read_dense(index_dir, dense_info, out["precedent"].vectorizer, mmap, dense)
+    return out
@@ -0,0 +1,240 @@
+"""
+Artımlı içtihat ekleme + arka planda compaction.
+
+- precedents.jsonl append-only kabul edilir; her worker dosyanın sonunu
+  (byte offset) takip eder ve yeni satırları Retriever'ın delta segmentine ekler.
+  Böylece birden çok uvicorn worker'ı aynı dosyadan senkron kalır.
+- compaction: güncel doküman listesiyle yeni bir Retriever fit edilir ve tek bir
+  referans ataması ile yerine konur. Devam eden istekler eski nesneyi kullanmayı
+  sürdürür; istek düşmez.
+- Diskteki indeksi yalnızca bir süreç compact eder (index_lock); diğer worker'lar
+  yayımlanan yeni sürümü reload ile mmap üzerinden açar, kendileri refit etmez.
+- id'ler tekildir: korpusta zaten olan ya da aynı partide tekrarlanan id reddedilir.
+- Dosya yerinde yeniden yazılırsa (ör. tools/ingest_pdfs.py değişen bir PDF'in eski
+  kaydını çıkardı) offset takibi geçersizdir: içtihatlar baştan yüklenip refit edilir.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası dosya kilidi yok
+    fcntl = None
+
+from .index_store import index_lock, published_version
+from .retrieval import Doc, Retriever, doc_from_obj, load_jsonl_from
+
+
+class DuplicateIdError(ValueError):
+    def __init__(self, ids: List[str], where: str = "korpus"):
+        super().__init__(f"Tekrarlanan içtihat id'leri ({where}): {', '.join(ids)}")
+        self.ids = ids
+
+
+def _inode(path: Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+class IndexManager:
+    def __init__(
+        self,
+        retriever: Retriever,
+        law_docs: List[Doc],
+        prec_path: Path,
+        prec_offset: int,
+        index_dir: Optional[Path] = None,
+    ):
+        self.retriever = retriever
+        self.law_docs = law_docs
+        self.prec_path = prec_path
+        self.index_dir = index_dir
+
+        self._offset = prec_offset
+        self._inode = _inode(prec_path)
+        self._ids = {d.id for d in retriever.prec_docs}
+        self._lock = threading.Lock()
+        # compact çağrıları sırayla çalışır (arka plan thread'i + /admin/compact).
+        self._compact_lock = threading.RLock()
+        self._published = published_version(index_dir) if index_dir is not None else None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_compaction: Optional[float] = None
+
+    def sync(self) -> int:
+        """precedents.jsonl'e (bu veya başka bir worker tarafından) eklenen satırları delta'ya alır."""
+        with self._lock:
+            if not self._rewritten():
+                return self._sync_locked()
+        self.rebuild()
+        return 0
+
+    def _rewritten(self) -> bool:
+        inode = _inode(self.prec_path)
+        if inode is None or self._inode is None:
+            self._inode = self._inode or inode
+            return False
+        return inode != self._inode
+
+    def _sync_locked(self) -> int:
+        if self._rewritten():
+            return 0  # bir sonraki sync baştan yükler
+        docs, self._offset = load_jsonl_from(self.prec_path, "precedent", self._offset)
+        self._ids.update(d.id for d in docs)
+        return self.retriever.add_precedents(docs)
+
+    def append(self, objs: List[Dict[str, Any]]) -> int:
+        # Önce doğrula (eksik alan / tekrarlı id varsa dosyaya hiç yazma), sonra tek write ile ekle.
+        docs = [doc_from_obj(obj, "precedent") for obj in objs]
+        repeated = sorted(i for i, n in Counter(d.id for d in docs).items() if n > 1)
+        if repeated:
+            raise DuplicateIdError(repeated, "parti")
+        payload = "".join(json.dumps(o, ensure_ascii=False) + "\n" for o in objs)
+        self.sync()
+        with self._lock:
+            self.prec_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._open_locked() as f:
+                # Diğer worker'ların eklemeleriyle yarışmamak için: kilitle, dosyanın sonunu oku,
+                # id'leri kontrol et, yaz. Kilit dosya kapanınca bırakılır.
+                self._sync_locked()
+                taken = sorted({d.id for d in docs} & self._ids)
+                if taken:
+                    raise DuplicateIdError(taken)
+                f.write(payload)
+        return self.sync()
+
+    def _open_locked(self):
+        while True:
+            f = self.prec_path.open("a", encoding="utf-8")
+            if fcntl is None:
+                return f
+            fcntl.flock(f, fcntl.LOCK_EX)
+            # Kilidi beklerken dosya yeniden yazıldıysa eski inode'a yazma.
+            if os.fstat(f.fileno()).st_ino == _inode(self.prec_path):
+                return f
+            f.close()
+
+    def _fit(self, docs: List[Doc]) -> Retriever:
+        current = self.retriever
+        return Retriever(
+            self.law_docs,
+            docs,
+            search_mode=current.search_mode,
+            scorers=current.scorer_names,
+            build_workers=current.build_workers,
+            analyzer=current.analyzer,
+            dense=current.dense_config,
+        )
+
+    def rebuild(self) -> None:
+        """Yeniden yazılmış precedents.jsonl'i baştan yükler, refit eder ve (kilit alınabilirse) yayımlar."""
+        print(f"[WARN] {self.prec_path} yeniden yazılmış; içtihatlar baştan yükleniyor (refit).")
+        with self._compact_lock:
+            with self._lock:
+                inode = _inode(self.prec_path)
+                docs, offset = load_jsonl_from(self.prec_path, "precedent", 0)
+            fresh = self._fit(docs)
+            with self._lock:
+                self.retriever = fresh
+                self._inode, self._offset = inode, offset
+                self._ids = {d.id for d in docs}
+                self._sync_locked()
+            if self.index_dir is not None:
+                with index_lock(self.index_dir, blocking=False) as held:
+                    if held:
+                        fresh.save(self.index_dir)
+                        self._published = published_version(self.index_dir)
+
+    def _swap(self, fresh: Retriever, snapshot: List[Doc]) -> None:
+        with self._lock:
+            # Fit / yükleme sürerken eklenenleri yeni nesnenin delta'sına taşı.
+            fresh.add_precedents(self.retriever.prec_docs[len(snapshot):])
+            self.retriever = fresh
+
+    def reload(self) -> bool:
+        """Başka bir sürecin yayımladığı indeks sürümünü açar (refit yok); değişmediyse False."""
+        if self.index_dir is None:
+            return False
+        version = published_version(self.index_dir)
+        if version is None or version == self._published:
+            return False
+        self.sync()
+        current = self.retriever
+        snapshot = list(current.prec_docs)
+        fresh = Retriever.from_index(
+            self.index_dir.parent / version,
+            self.law_docs,
+            snapshot,
+            search_mode=current.search_mode,
+            scorers=current.scorer_names,
+            build_workers=current.build_workers,
+            analyzer=current.analyzer,
+            dense=current.dense_config,
+        )
+        self._swap(fresh, snapshot)
+        self._published = version
+        return True
+
+    def compact(self, min_delta: int = 1) -> bool:
+        """Delta yeterince büyükse tam refit yapıp yeni base indeksi atomik olarak devreye alır."""
+        with self._compact_lock:
+            self.sync()
+            if self.index_dir is None:
+                return self._compact(min_delta)
+            with index_lock(self.index_dir, blocking=False) as held:
+                if not held:
+                    # Başka bir süreç compact ediyor; yayımladığı sürüm reload ile alınır.
+                    return False
+                self.reload()
+                return self._compact(min_delta)
+
+    def _compact(self, min_delta: int) -> bool:
+        self.sync()
+        current = self.retriever
+        if current.delta_size < min_delta:
+            return False
+
+        snapshot = list(current.prec_docs)
+        # Yavaş kısım kilit dışında: bu sırada search ve append devam eder.
+        fresh = self._fit(snapshot)
+        if self.index_dir is not None:
+            fresh.save(self.index_dir)
+            self._published = published_version(self.index_dir)
+
+        self._swap(fresh, snapshot)
+        self.last_compaction = time.time()
+        return True
+
+    def _run(self, poll_s: float, compact_s: float, min_delta: int) -> None:
+        next_compact = time.monotonic() + compact_s
+        while not self._stop.wait(poll_s):
+            try:
+                self.reload()
+                self.sync()
+                if compact_s > 0 and time.monotonic() >= next_compact:
+                    self.compact(min_delta)
+                    next_compact = time.monotonic() + compact_s
+            except Exception as e:
+                print(f"[WARN] Index maintenance failed: {e}")
+
+    def start(self, poll_s: float, compact_s: float, min_delta: int = 1) -> None:
+        if self._thread is not None or poll_s <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(poll_s, compact_s, min_delta), name="index-maintenance", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
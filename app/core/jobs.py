@@ -0,0 +1,358 @@
+"""
+Uzun süren üretimler için iş kuyruğu (POST /jobs, GET /jobs/{id}).
+
+- Durum SQLite'ta (SQLAlchemy Core) tutulur: queued -> running -> done | failed | cancelled.
+  Çalışan işlerin sahibi olan süreç her turda nabız (heartbeat_at) yazar; nabzı stale_s'den
+  eski running işler (süreç öldü / yeniden başladı) kuyruğa geri alınır. Bir iş en fazla
+  max_attempts kez denenir.
+- İşler dava türüne göre ayrı eşzamanlılık sınırıyla yürür (ör. CEZA=2, OZEL_HUKUK=4);
+  her türde öncelik (büyük önce) ve sonra geliş sırası uygulanır.
+- Alma (claim) tek UPDATE ... WHERE status='queued' ile yapılır: aynı veritabanını paylaşan
+  birden çok API süreci aynı işi iki kez çalıştırmaz.
+- Uzun sorgulama (long-poll) bu süreçte biten işler için olayla anında, diğer süreçlerde
+  bitenler için veritabanı yoklamasıyla döner.
+"""
+import asyncio
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import (
+    Column,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    create_engine,
+    event,
+    func,
+    select,
+    update,
+)
+from starlette.concurrency import run_in_threadpool
+
+JOB_STATUSES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED = ("done", "failed", "cancelled")
+
+
+class JobError(Exception):
+    """İş başarısız: status_code + detail (HTTPException karşılığı) saklanır."""
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def parse_limits(spec: str, default: int) -> Dict[str, int]:
+    """'OZEL_HUKUK=4,CEZA=2' -> {'OZEL_HUKUK': 4, 'CEZA': 2}; '*=n' varsayılanı değiştirir."""
+    limits: Dict[str, int] = {"*": default}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, n = part.split("=", 1)
+            limits[name.strip()] = int(n)
+    return limits
+
+
+class JobStore:
+    def __init__(self, path: Path, max_attempts: int = 3):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.engine = create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30}
+        )
+
+        @event.listens_for(self.engine, "connect")
+        def _pragmas(conn, _):
+            # WAL: okuyucular (GET /jobs) yazıcıyı beklemez.
+            cur = conn.cursor()
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.close()
+
+        meta = MetaData()
+        self.table = Table(
+            "jobs",
+            meta,
+            Column("id", String(32), primary_key=True),
+            Column("status", String(16), nullable=False),
+            Column("dava_turu", String(32), nullable=False),
+            Column("priority", Integer, nullable=False, default=0),
+            Column("request", Text, nullable=False),
+            Column("result", Text),
+            Column("error", Text),
+            Column("attempts", Integer, nullable=False, default=0),
+            Column("created_at", Float, nullable=False),
+            Column("started_at", Float),
+            Column("finished_at", Float),
+            Column("heartbeat_at", Float),
+            Index("ix_jobs_queue", "status", "dava_turu", "priority", "created_at"),
+        )
+        meta.create_all(self.engine)
+
+    @staticmethod
+    def _row(row) -> Dict[str, Any]:
+        out = dict(row._mapping)
+        out["request"] = json.loads(out["request"])
+        out["result"] = json.loads(out["result"]) if out["result"] else None
+        out["error"] = json.loads(out["error"]) if out["error"] else None
+        return out
+
+    def create(self, request: Dict[str, Any], dava_turu: str, priority: int = 0) -> Dict[str, Any]:
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "dava_turu": dava_turu,
+            "priority": priority,
+            "request": json.dumps(request, ensure_ascii=False),
+            "attempts": 0,
+            "created_at": time.time(),
+        }
+        with self.engine.begin() as conn:
+            conn.execute(self.table.insert().values(**job))
+        return self.get(job["id"])  # type: ignore[return-value]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            row = conn.execute(select(self.table).where(self.table.c.id == job_id)).first()
+        return self._row(row) if row is not None else None
+
+    def claim(self, dava_turu: str) -> Optional[Dict[str, Any]]:
+        """Bu türün sıradaki işini running yapar ve döndürür (başka süreç kaptıysa bir sonrakini dener)."""
+        t = self.table
+        order = (t.c.priority.desc(), t.c.created_at)
+        while True:
+            with self.engine.begin() as conn:
+                job_id = conn.execute(
+                    select(t.c.id).where(t.c.status == "queued", t.c.dava_turu == dava_turu).order_by(*order).limit(1)
+                ).scalar()
+                if job_id is None:
+                    return None
+                claimed = conn.execute(
+                    update(t)
+                    .where(t.c.id == job_id, t.c.status == "queued")
+                    .values(status="running", started_at=time.time(), heartbeat_at=time.time(), attempts=t.c.attempts + 1)
+                ).rowcount
+            if claimed:
+                return self.get(job_id)
+
+    def queued_types(self) -> Set[str]:
+        t = self.table
+        with self.engine.connect() as conn:
+            return set(conn.execute(select(t.c.dava_turu).where(t.c.status == "queued").distinct()).scalars())
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._close(job_id, "done", result=json.dumps(result, ensure_ascii=False))
+
+    def fail(self, job_id: str, status_code: int, detail: Any) -> None:
+        error = {"status_code": status_code, "detail": detail}
+        self._close(job_id, "failed", error=json.dumps(error, ensure_ascii=False))
+
+    def _close(self, job_id: str, status: str, **values: Any) -> None:
+        t = self.table
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(t)
+                .where(t.c.id == job_id, t.c.status == "running")
+                .values(status=status, finished_at=time.time(), **values)
+            )
+
+    def cancel(self, job_id: str) -> bool:
+        """Sıradaki ya da çalışan işi iptal eder; bitmiş işe dokunmaz."""
+        t = self.table
+        with self.engine.begin() as conn:
+            return bool(
+                conn.execute(
+                    update(t)
+                    .where(t.c.id == job_id, t.c.status.in_(("queued", "running")))
+                    .values(status="cancelled", finished_at=time.time())
+                ).rowcount
+            )
+
+    def heartbeat(self, job_ids: List[str]) -> None:
+        if not job_ids:
+            return
+        t = self.table
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(t).where(t.c.id.in_(job_ids), t.c.status == "running").values(heartbeat_at=time.time())
+            )
+
+    def requeue_stale(self, stale_s: float) -> int:
+        """Nabzı kesilmiş running işler: deneme hakkı varsa kuyruğa, yoksa failed."""
+        t = self.table
+        now = time.time()
+        stale = (t.c.status == "running") & (t.c.heartbeat_at < now - stale_s)
+        error = json.dumps({"status_code": 500, "detail": "İşi yürüten süreç yanıt vermiyor (yeniden başlatma?)."})
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(t).where(stale, t.c.attempts >= self.max_attempts).values(
+                    status="failed", finished_at=now, error=error
+                )
+            )
+            return conn.execute(update(t).where(stale).values(status="queued", started_at=None)).rowcount
+
+    def prune(self, retention_s: float) -> int:
+        t = self.table
+        with self.engine.begin() as conn:
+            return conn.execute(
+                t.delete().where(t.c.status.in_(FINISHED), t.c.finished_at < time.time() - retention_s)
+            ).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        t = self.table
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(t.c.status, func.count()).group_by(t.c.status)).all()
+        return {status: n for status, n in rows}
+
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class JobRunner:
+    """
+    Olay döngüsünde çalışan dağıtıcı: her dava türü için boş yuva oldukça iş alır ve
+    handler(request) -> sonuç (dict) çalıştırır. handler JobError fırlatırsa iş failed olur.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Handler,
+        limits: Dict[str, int],
+        poll_s: float = 2.0,
+        stale_s: float = 30.0,
+        retention_s: float = 7 * 86400,
+    ):
+        self.store = store
+        self.handler = handler
+        self.limits = limits
+        self.poll_s = poll_s
+        self.stale_s = max(stale_s, 3 * poll_s)
+        self.retention_s = retention_s
+        self.running: Dict[str, Dict[str, "asyncio.Task[Any]"]] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._done_events: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}
+        self._task: Optional["asyncio.Task[Any]"] = None
+        self.completed = 0
+        self.failed = 0
+
+    def limit(self, dava_turu: str) -> int:
+        return self.limits.get(dava_turu, self.limits.get("*", 1))
+
+    def start(self) -> None:
+        self._wake = asyncio.Event()
+        self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> None:
+        # Çalışan işler iptal edilir; durumları running kalır, nabız kesilince (stale_s) sıraya döner.
+        tasks = [task for jobs in self.running.values() for task in jobs.values()]
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _loop(self) -> None:
+        last_prune = 0.0
+        while True:
+            # Dağıtımdan önce: dağıtım sırasında gelen notify() bir sonraki turu hemen başlatır.
+            self._wake.clear()
+            try:
+                ids = [job_id for jobs in self.running.values() for job_id in jobs]
+                await run_in_threadpool(self.store.heartbeat, ids)
+                requeued = await run_in_threadpool(self.store.requeue_stale, self.stale_s)
+                if requeued:
+                    print(f"[WARN] Nabzı kesilmiş {requeued} iş kuyruğa geri alındı.")
+                await self._dispatch()
+                if time.time() - last_prune > 3600:
+                    await run_in_threadpool(self.store.prune, self.retention_s)
+                    last_prune = time.time()
+            except Exception as e:  # veritabanı kilitli vb.: döngü ölmesin
+                print(f"[WARN] İş dağıtıcı hatası: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_s)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch(self) -> None:
+        for dava_turu in await run_in_threadpool(self.store.queued_types):
+            active = self.running.setdefault(dava_turu, {})
+            while len(active) < self.limit(dava_turu):
+                job = await run_in_threadpool(self.store.claim, dava_turu)
+                if job is None:
+                    break
+                active[job["id"]] = asyncio.ensure_future(self._run(job))
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        try:
+            result = await self.handler(job["request"])
+            await run_in_threadpool(self.store.finish, job_id, result)
+            self.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except JobError as e:
+            await run_in_threadpool(self.store.fail, job_id, e.status_code, e.detail)
+            self.failed += 1
+        except Exception as e:
+            await run_in_threadpool(self.store.fail, job_id, 500, str(e))
+            self.failed += 1
+        finally:
+            self.running.get(job["dava_turu"], {}).pop(job_id, None)
+            ev = self._done_events.pop(job_id, None)
+            if ev is not None:
+                ev.set()
+            self.notify()
+
+    def cancel_local(self, job_id: str) -> bool:
+        for jobs in self.running.values():
+            task = jobs.get(job_id)
+            if task is not None:
+                task.cancel()
+                return True
+        return False
+
+    async def wait(self, job_id: str, timeout_s: float) -> Optional[Dict[str, Any]]:
+        """İş bitene ya da süre dolana kadar bekler; işin son durumunu döndürür."""
+        deadline = time.monotonic() + timeout_s
+        self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+        try:
+            while True:
+                # Olay, durum okunmadan önce kaydedilir: arada biten iş kaçırılmaz.
+                ev = self._done_events.setdefault(job_id, asyncio.Event())
+                job = await run_in_threadpool(self.store.get, job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job["status"] in FINISHED or remaining <= 0:
+                    return job
+                try:
+                    await asyncio.wait_for(ev.wait(), timeout=min(remaining, self.poll_s))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Son bekleyen çıkarken kayıt silinir (bitmiş / silinmiş / zaman aşımı).
+            left = self._waiters.pop(job_id, 1) - 1
+            if left > 0:
+                self._waiters[job_id] = left
+            else:
+                self._done_events.pop(job_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": {k: len(v) for k, v in self.running.items() if v},
+            "limits": self.limits,
+            "completed": self.completed,
+            "failed": self.failed,
+            "by_status": self.store.counts(),
+        }
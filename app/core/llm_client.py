@@ -0,0 +1,193 @@
+"""
+Ollama için async, bağlantı havuzlu istemci.
+
+- Tek bir httpx.AsyncClient (keep-alive) tüm istekler arasında paylaşılır.
+- max_concurrency: LLM sunucusuna aynı anda giden en fazla istek.
+- max_queue: slot bekleyen en fazla istek; dolarsa LLMBusyError (HTTP 503).
+Bekleyen istekler thread tutmaz; tek worker yüzlerce beklemeyi taşıyabilir.
+
+Sabit önek (prompt_prefix) yeniden kullanımı, prefix_cache ile:
+- "off": Ollama varsayılanları.
+- "keep_alive": her istekte keep_alive gönderilir; model bellekte kalır ve sunucu,
+  önceki istekle ortak önekin KV-cache'ini yeniden kullanır (önek bayt bayt aynı olmalı).
+- "context": önek bir kez (raw, num_predict=1) gönderilir, dönen `context` token'ları
+  saklanır; sonraki isteklerde yalnızca değişken kısım + context gönderilir. Bu modda
+  istek raw gider (modelin sohbet şablonu uygulanmaz).
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+
+PREFIX_CACHE_MODES = ("off", "keep_alive", "context")
+
+
+class LLMBusyError(Exception):
+    """LLM kuyruğu dolu; istemci daha sonra tekrar denemeli."""
+
+
+class OllamaClient:
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        options: Optional[Dict[str, Any]] = None,
+        timeout_s: float = 180.0,
+        max_concurrency: int = 8,
+        max_queue: int = 256,
+        prefix_cache: str = "off",
+        keep_alive: Optional[str] = None,
+    ):
+        if prefix_cache not in PREFIX_CACHE_MODES:
+            raise ValueError(f"prefix_cache must be one of {PREFIX_CACHE_MODES}, got {prefix_cache!r}")
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.options = options or {}
+        self.timeout_s = timeout_s
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.prefix_cache = prefix_cache
+        self.keep_alive = keep_alive if prefix_cache != "off" else None
+        # önek metni -> önekin token'ları (context modu); dava türü başına bir kayıt
+        self._contexts: Dict[str, List[int]] = {}
+        self.prefix_hits = 0
+        self.prefix_misses = 0
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _ensure(self) -> httpx.AsyncClient:
+        # Event loop'a bağlı nesneler ilk kullanımda (loop içinde) oluşturulur.
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout_s, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def payload(self, prompt: str, stream: bool = False, context: Optional[List[int]] = None) -> Dict[str, Any]:
+        body = {"model": self.model, "prompt": prompt, "stream": stream, "options": self.options}
+        if self.keep_alive is not None:
+            body["keep_alive"] = self.keep_alive
+        if context is not None:
+            body["context"] = context
+            body["raw"] = True
+        return body
+
+    async def _prefix_context(self, client: httpx.AsyncClient, prefix: str) -> Optional[List[int]]:
+        """Önekin context token'ları; ilk kullanımda önek tek başına işlenir (eşzamanlı ilk istekler tekrar edebilir)."""
+        ctx = self._contexts.get(prefix)
+        if ctx is not None:
+            self.prefix_hits += 1
+            return ctx
+        self.prefix_misses += 1
+        body = self.payload(prefix)
+        body["raw"] = True
+        body["options"] = {**self.options, "num_predict": 1}
+        resp = await client.post("/api/generate", json=body)
+        if resp.status_code >= 400:
+            raise RuntimeError(f"Ollama HTTPError: {resp.status_code} {resp.reason_phrase} | {resp.text}")
+        obj = resp.json()
+        ctx = obj.get("context")
+        if not ctx:
+            return None
+        # context = önek + üretilen token(lar); üretileni at.
+        ctx = ctx[: len(ctx) - int(obj.get("eval_count") or 0)]
+        self._contexts[prefix] = ctx
+        return ctx
+
+    async def _request(
+        self, client: httpx.AsyncClient, prompt: str, prefix: Optional[str], stream: bool = False
+    ) -> Dict[str, Any]:
+        if self.prefix_cache == "context" and prefix and prompt.startswith(prefix):
+            ctx = await self._prefix_context(client, prefix)
+            if ctx is not None:
+                return self.payload(prompt[len(prefix):], stream, context=ctx)
+        return self.payload(prompt, stream)
+
+    @asynccontextmanager
+    async def _slot(self, reject_when_full: bool) -> AsyncIterator[httpx.AsyncClient]:
+        client = self._ensure()
+        if reject_when_full and self.waiting >= self.max_queue and self._sem.locked():
+            raise LLMBusyError(f"LLM queue is full ({self.waiting} waiting).")
+
+        self.waiting += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            yield client
+        except httpx.TransportError as e:
+            # Ollama'ya erişememe (en sık Render'da olur)
+            raise RuntimeError(
+                f"Ollama URL error: {e!r}. OLLAMA_URL={self.base_url}. "
+                "Render'da local ollama çalışmaz; dış erişilebilir bir Ollama endpoint'i vermelisin."
+            )
+        except (RuntimeError, asyncio.CancelledError, GeneratorExit):
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Ollama request failed: {e!r}")
+        finally:
+            self.in_flight -= 1
+            self._sem.release()
+
+    async def generate(self, prompt: str, reject_when_full: bool = True, prefix: Optional[str] = None) -> str:
+        """prefix: prompt'un istekler arasında sabit öneki (context modunda ayrı gönderilir)."""
+        async with self._slot(reject_when_full) as client:
+            resp = await client.post("/api/generate", json=await self._request(client, prompt, prefix))
+            if resp.status_code >= 400:
+                raise RuntimeError(f"Ollama HTTPError: {resp.status_code} {resp.reason_phrase} | {resp.text}")
+            return (resp.json().get("response") or "").strip()
+
+    async def generate_stream(
+        self, prompt: str, reject_when_full: bool = True, prefix: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Ollama'nın stream=True NDJSON çıktısını token parçaları olarak verir; slot akış boyunca tutulur."""
+        async with self._slot(reject_when_full) as client:
+            body = await self._request(client, prompt, prefix, stream=True)
+            async with client.stream("POST", "/api/generate", json=body) as resp:
+                if resp.status_code >= 400:
+                    body = (await resp.aread()).decode("utf-8", errors="ignore")
+                    raise RuntimeError(f"Ollama HTTPError: {resp.status_code} {resp.reason_phrase} | {body}")
+                async for line in resp.aiter_lines():
+                    if not line.strip():
+                        continue
+                    obj = json.loads(line)
+                    if obj.get("error"):
+                        raise RuntimeError(f"Ollama stream error: {obj['error']}")
+                    if obj.get("response"):
+                        yield obj["response"]
+                    if obj.get("done"):
+                        break
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "prefix_cache": self.prefix_cache,
+            "keep_alive": self.keep_alive,
+            "prefix_contexts": len(self._contexts),
+            "prefix_hits": self.prefix_hits,
+            "prefix_misses": self.prefix_misses,
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._sem = None
@@ -0,0 +1,361 @@
+"""
+Birden çok Ollama sunucusu arasında yük dağıtan LLM yönlendiricisi (OllamaClient ile aynı arayüz).
+
+- Yönlendirme: en az bekleyen iş (in_flight + waiting, kapasiteye oranla); eşitlikte
+  gecikme ortalaması (EWMA) düşük olan.
+- Her sunucunun bir devre kesicisi vardır: art arda failure_threshold hata -> açık
+  (cooldown_s boyunca istek gitmez) -> yarı açık (tek deneme isteği) -> başarıysa kapalı,
+  hataysa bekleme süresi ikiye katlanır (max_cooldown_s'e kadar).
+- Sağlık kontrolü: health_interval_s'de bir GET /api/tags. Başarısızsa devre hemen açılır;
+  açık devrede başarılıysa bekleme beklenmeden yarı açığa geçer.
+- Hata durumunda istek başka sunucuya aktarılır (failover). hedge_after_s içinde yanıt
+  gelmezse aynı istek ikinci bir sunucuya da gönderilir; ilk gelen yanıt kullanılır, diğeri
+  iptal edilir. Akışlı üretimde yalnızca ilk token'dan önceki hatalar aktarılır.
+- Tüm sunucular başarısızsa RuntimeError (çağıran mock'a düşer ve uyarı ekler); hepsi
+  doluysa LLMBusyError.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+import httpx
+
+from .llm_client import LLMBusyError, OllamaClient
+
+LATENCY_WINDOW = 256
+EWMA_ALPHA = 0.2
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, cooldown_s: float = 10.0, max_cooldown_s: float = 120.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_cooldown_s = cooldown_s
+        self.max_cooldown_s = max(cooldown_s, max_cooldown_s)
+        self.cooldown_s = cooldown_s
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._probing = False
+
+    def available(self, now: float) -> bool:
+        """İstek kabul edebilir mi (durum değiştirmez)."""
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            return now - self.opened_at >= self.cooldown_s
+        return not self._probing
+
+    def acquire(self, now: float) -> bool:
+        """İstek göndermeden hemen önce; yarı açıkta tek deneme isteği ayırır."""
+        if self.state == "open" and now - self.opened_at >= self.cooldown_s:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open":
+            if self._probing:
+                return False
+            self._probing = True
+        return self.state != "open"
+
+    def success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.cooldown_s = self.base_cooldown_s
+        self._probing = False
+
+    def failure(self, now: float) -> None:
+        self.failures += 1
+        if self.state == "half_open":
+            self.cooldown_s = min(self.cooldown_s * 2, self.max_cooldown_s)
+            self._open(now)
+        elif self.state == "closed" and self.failures >= self.failure_threshold:
+            self._open(now)
+
+    def release(self) -> None:
+        """Sonuçsuz biten istek (iptal, hedge kaybeden): deneme hakkı geri verilir."""
+        self._probing = False
+
+    def trip(self, now: float) -> None:
+        if self.state != "open":
+            self._open(now)
+
+    def half_open(self) -> None:
+        if self.state == "open":
+            self.state = "half_open"
+            self._probing = False
+
+    def _open(self, now: float) -> None:
+        self.state = "open"
+        self.opened_at = now
+        self.opens += 1
+        self._probing = False
+
+
+class Backend:
+    def __init__(self, client: OllamaClient, breaker: CircuitBreaker):
+        self.client = client
+        self.breaker = breaker
+        self.healthy: Optional[bool] = None  # henüz kontrol edilmedi
+        self.requests = 0
+        self.errors = 0
+        self.hedge_wins = 0
+        self.last_error: Optional[str] = None
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.ewma_s: Optional[float] = None
+
+    @property
+    def url(self) -> str:
+        return self.client.base_url
+
+    def load(self) -> float:
+        return (self.client.in_flight + self.client.waiting) / self.client.max_concurrency
+
+    def observe(self, latency_s: float) -> None:
+        self.latencies.append(latency_s)
+        self.ewma_s = latency_s if self.ewma_s is None else (1 - EWMA_ALPHA) * self.ewma_s + EWMA_ALPHA * latency_s
+
+    def stats(self) -> Dict[str, Any]:
+        lat = sorted(self.latencies)
+
+        def pct(q: float) -> Optional[float]:
+            return round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000, 1) if lat else None
+
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "breaker": self.breaker.state,
+            "breaker_opens": self.breaker.opens,
+            "in_flight": self.client.in_flight,
+            "waiting": self.client.waiting,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "ewma": round(self.ewma_s * 1000, 1) if self.ewma_s else None},
+            "last_error": self.last_error,
+            "prefix_hits": self.client.prefix_hits,
+            "prefix_misses": self.client.prefix_misses,
+        }
+
+
+class LLMRouter:
+    def __init__(
+        self,
+        clients: List[OllamaClient],
+        hedge_after_s: float = 0.0,
+        failure_threshold: int = 3,
+        cooldown_s: float = 10.0,
+        max_cooldown_s: float = 120.0,
+        health_interval_s: float = 15.0,
+        health_timeout_s: float = 5.0,
+    ):
+        if not clients:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = [Backend(c, CircuitBreaker(failure_threshold, cooldown_s, max_cooldown_s)) for c in clients]
+        self.hedge_after_s = hedge_after_s
+        self.health_interval_s = health_interval_s
+        self.health_timeout_s = health_timeout_s
+        self.hedges = 0
+        self.failovers = 0
+        self._health_task: Optional["asyncio.Task[Any]"] = None
+        self._health_client: Optional[httpx.AsyncClient] = None
+
+    # OllamaClient uyumluluğu (main.llm_cache_key vb.)
+    @property
+    def model(self) -> str:
+        return self.backends[0].client.model
+
+    @property
+    def prefix_cache(self) -> str:
+        return self.backends[0].client.prefix_cache
+
+    # --- seçim ---
+
+    def _pick(self, exclude: Set[int]) -> Optional[int]:
+        now = time.monotonic()
+        candidates = [
+            i for i, b in enumerate(self.backends) if i not in exclude and b.breaker.available(now)
+        ]
+        candidates.sort(key=lambda i: (self.backends[i].load(), self.backends[i].ewma_s or 0.0))
+        for i in candidates:
+            if self.backends[i].breaker.acquire(now):
+                return i
+        return None
+
+    def _success(self, b: Backend, started: float) -> None:
+        b.observe(time.monotonic() - started)
+        b.breaker.success()
+
+    def _failure(self, b: Backend, e: Exception) -> None:
+        b.errors += 1
+        b.last_error = str(e)[:300]
+        b.breaker.failure(time.monotonic())
+
+    @staticmethod
+    def _give_up(errors: List[Exception]) -> Exception:
+        if errors and all(isinstance(e, LLMBusyError) for e in errors):
+            return errors[-1]
+        if not errors:
+            return RuntimeError("Kullanılabilir LLM backend'i yok (tüm devreler açık).")
+        return RuntimeError("Tüm LLM backend'leri başarısız: " + " | ".join(str(e)[:200] for e in errors))
+
+    # --- üretim ---
+
+    async def _call(self, i: int, prompt: str, reject_when_full: bool, prefix: Optional[str]) -> str:
+        b = self.backends[i]
+        b.requests += 1
+        started = time.monotonic()
+        try:
+            out = await b.client.generate(prompt, reject_when_full=reject_when_full, prefix=prefix)
+        except LLMBusyError:
+            b.breaker.release()
+            raise
+        except asyncio.CancelledError:
+            b.breaker.release()
+            raise
+        except Exception as e:
+            self._failure(b, e)
+            raise
+        self._success(b, started)
+        return out
+
+    async def generate(self, prompt: str, reject_when_full: bool = True, prefix: Optional[str] = None) -> str:
+        tried: Set[int] = set()
+        errors: List[Exception] = []
+        pending: Dict["asyncio.Task[str]", int] = {}
+        hedge: Optional[int] = None
+        started = 0.0
+
+        def launch(i: int) -> None:
+            nonlocal started
+            tried.add(i)
+            pending[asyncio.ensure_future(self._call(i, prompt, reject_when_full, prefix))] = i
+            # Hedge gecikmesi her denemede (failover dahil) baştan sayılır.
+            started = time.monotonic()
+
+        first = self._pick(tried)
+        if first is None:
+            raise self._give_up(errors)
+        launch(first)
+        try:
+            while pending:
+                timeout = None
+                if hedge is None and self.hedge_after_s > 0 and len(tried) < len(self.backends):
+                    timeout = max(0.0, self.hedge_after_s - (time.monotonic() - started))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Gecikme eşiği aşıldı: aynı isteği ikinci bir sunucuya da gönder.
+                    hedge = self._pick(tried)
+                    if hedge is None:
+                        hedge = -1  # hedge edilecek sunucu yok; tekrar deneme
+                    else:
+                        self.hedges += 1
+                        launch(hedge)
+                    continue
+                for task in done:
+                    i = pending.pop(task)
+                    if task.exception() is None:
+                        if i == hedge:
+                            self.backends[i].hedge_wins += 1
+                        return task.result()
+                    errors.append(task.exception())
+                if not pending:
+                    nxt = self._pick(tried)
+                    if nxt is not None:
+                        self.failovers += 1
+                        launch(nxt)
+            raise self._give_up(errors)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate_stream(
+        self, prompt: str, reject_when_full: bool = True, prefix: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        tried: Set[int] = set()
+        errors: List[Exception] = []
+        while True:
+            i = self._pick(tried)
+            if i is None:
+                raise self._give_up(errors)
+            if tried:
+                self.failovers += 1
+            tried.add(i)
+            b = self.backends[i]
+            b.requests += 1
+            started = time.monotonic()
+            sent = False
+            try:
+                async for tok in b.client.generate_stream(prompt, reject_when_full=reject_when_full, prefix=prefix):
+                    sent = True
+                    yield tok
+            except LLMBusyError as e:
+                b.breaker.release()
+                errors.append(e)
+                continue
+            except (asyncio.CancelledError, GeneratorExit):
+                b.breaker.release()
+                raise
+            except Exception as e:
+                self._failure(b, e)
+                if sent:
+                    raise
+                errors.append(e)
+                continue
+            self._success(b, started)
+            return
+
+    # --- sağlık kontrolü ---
+
+    def start(self) -> None:
+        if self._health_task is None and self.health_interval_s > 0:
+            self._health_task = asyncio.ensure_future(self._health_loop())
+
+    async def check_health(self) -> None:
+        if self._health_client is None:
+            self._health_client = httpx.AsyncClient(timeout=self.health_timeout_s)
+
+        async def probe(b: Backend) -> None:
+            try:
+                resp = await self._health_client.get(f"{b.url}/api/tags")
+                ok = resp.status_code < 500
+            except httpx.HTTPError:
+                ok = False
+            b.healthy = ok
+            if not ok:
+                b.breaker.trip(time.monotonic())
+            else:
+                b.breaker.half_open()
+
+        await asyncio.gather(*(probe(b) for b in self.backends))
+
+    async def _health_loop(self) -> None:
+        while True:
+            try:
+                await self.check_health()
+            except Exception as e:
+                print(f"[WARN] LLM sağlık kontrolü başarısız: {e!r}")
+            await asyncio.sleep(self.health_interval_s)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backends": [b.stats() for b in self.backends],
+            "in_flight": sum(b.client.in_flight for b in self.backends),
+            "waiting": sum(b.client.waiting for b in self.backends),
+            "hedge_after_s": self.hedge_after_s,
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "prefix_cache": self.prefix_cache,
+        }
+
+    async def aclose(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        if self._health_client is not None:
+            await self._health_client.aclose()
+            self._health_client = None
+        for b in self.backends:
+            await b.client.aclose()
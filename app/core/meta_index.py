@@ -0,0 +1,125 @@
+"""
+İçtihat meta verisi üzerinde önceden hesaplanmış filtre indeksleri.
+
+- chamber: satır başına int32 kod + farklı değerler tablosu (az sayıda daire)
+- date:    datetime64[D] dizisi + tarihe göre sıralı satır dizisi (aralık = 2 searchsorted)
+- tags:    etiket -> satır posting listesi
+
+`mask(filter)` satır sayısı uzunluğunda bir bool bitmap döner; Retriever bunu
+skorlamadan önce aday kümesini daraltmak için kullanır (posting yürüyüşünde
+filtre dışı satırlar toplanmaz, top-k yalnızca adaylar arasından seçilir).
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .analyzer import turkish_fold
+from .doc_store import Doc
+
+NO_DATE = np.datetime64("NaT", "D")
+
+
+@dataclass(frozen=True)
+class MetaFilter:
+    # Daire adında geçen ifadelerden herhangi biri (büyük/küçük harf duyarsız), ör. ["Ceza"]
+    chambers: Optional[List[str]] = None
+    # "YYYY-MM-DD", iki uç dahil; tarihi olmayan içtihatlar tarih filtresinde elenir
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    # Etiketlerden en az biri (büyük/küçük harf duyarsız, tam eşleşme)
+    tags: Optional[List[str]] = None
+
+    def is_empty(self) -> bool:
+        return not (self.chambers or self.date_from or self.date_to or self.tags)
+
+    def key(self) -> str:
+        """Önbellek anahtarı için kanonik gösterim."""
+        if self.is_empty():
+            return ""
+        chambers = ",".join(sorted(turkish_fold(c) for c in self.chambers or []))
+        tags = ",".join(sorted(turkish_fold(t) for t in self.tags or []))
+        return f"c={chambers};d={self.date_from or ''}..{self.date_to or ''};t={tags}"
+
+
+def _parse_date(value) -> np.datetime64:
+    if not value:
+        return NO_DATE
+    try:
+        return np.datetime64(str(value)[:10], "D")
+    except ValueError:
+        return NO_DATE
+
+
+class MetaIndex:
+    def __init__(self, docs: Optional[List[Doc]] = None):
+        self.n = 0
+        self.chamber_values: List[str] = []
+        self._chamber_ids: Dict[Optional[str], int] = {}
+        self.chamber_codes = np.empty(0, dtype=np.int32)
+        self.dates = np.empty(0, dtype="datetime64[D]")
+        self.date_order = np.empty(0, dtype=np.int64)
+        self.sorted_dates = np.empty(0, dtype="datetime64[D]")
+        self.tag_rows: Dict[str, np.ndarray] = {}
+        if docs:
+            self.extend(docs)
+
+    def _chamber_id(self, chamber: Optional[str]) -> int:
+        if chamber not in self._chamber_ids:
+            self._chamber_ids[chamber] = len(self.chamber_values)
+            self.chamber_values.append(turkish_fold(chamber or ""))
+        return self._chamber_ids[chamber]
+
+    def extend(self, docs: List[Doc]) -> None:
+        """Yeni satırları sona ekler (Retriever.prec_docs ile aynı sıra)."""
+        if not docs:
+            return
+        codes, dates = [], []
+        new_tags: Dict[str, List[int]] = {}
+        for row, d in enumerate(docs, start=self.n):
+            meta = d.meta
+            codes.append(self._chamber_id(meta.get("chamber")))
+            dates.append(_parse_date(meta.get("date")))
+            for tag in meta.get("tags") or []:
+                new_tags.setdefault(turkish_fold(tag), []).append(row)
+
+        self.chamber_codes = np.concatenate([self.chamber_codes, np.asarray(codes, dtype=np.int32)])
+        self.dates = np.concatenate([self.dates, np.asarray(dates, dtype="datetime64[D]")])
+        # NaT'ler sona sıralanır; sorted_dates yalnızca geçerli tarihleri tutar.
+        self.date_order = np.argsort(self.dates, kind="stable")
+        self.sorted_dates = self.dates[self.date_order[: int((~np.isnat(self.dates)).sum())]]
+        for tag, rows in new_tags.items():
+            prev = self.tag_rows.get(tag)
+            arr = np.asarray(rows, dtype=np.int64)
+            self.tag_rows[tag] = arr if prev is None else np.concatenate([prev, arr])
+        self.n += len(docs)
+
+    def mask(self, f: Optional[MetaFilter]) -> Optional[np.ndarray]:
+        """Filtreye uyan satırlar için bool bitmap; filtre boşsa None (kısıtlama yok)."""
+        if f is None or f.is_empty():
+            return None
+        mask = np.ones(self.n, dtype=bool)
+
+        if f.chambers:
+            needles = [turkish_fold(c) for c in f.chambers]
+            wanted = np.array([any(n in v for n in needles) for v in self.chamber_values], dtype=bool)
+            mask &= wanted[self.chamber_codes]
+
+        if f.date_from or f.date_to:
+            lo = 0 if not f.date_from else np.searchsorted(self.sorted_dates, _parse_date(f.date_from), "left")
+            hi = len(self.sorted_dates) if not f.date_to else np.searchsorted(
+                self.sorted_dates, _parse_date(f.date_to), "right"
+            )
+            in_range = np.zeros(self.n, dtype=bool)
+            in_range[self.date_order[lo:hi]] = True
+            mask &= in_range
+
+        if f.tags:
+            tagged = np.zeros(self.n, dtype=bool)
+            for tag in f.tags:
+                rows = self.tag_rows.get(turkish_fold(tag))
+                if rows is not None:
+                    tagged[rows] = True
+            mask &= tagged
+
+        return mask
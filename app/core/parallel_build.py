@@ -0,0 +1,147 @@
+"""
+Paralel, parçalı vectorizer fit'i (indeks kurulumu için).
+
+TfidfVectorizer.fit_transform tüm korpusu tek çekirdekte tokenize edip
+bigram sayar. Burada iş üç adıma bölünür:
+
+1) sayım: dokümanlar parçalara bölünür, her parça bir süreçte tokenize edilip
+   kendi sözlüğüyle CSR sayım shard'ına çevrilir (metin bir kez tokenize edilir).
+2) birleştirme + budama: parça sözlükleri global sıralı sözlükte birleşir;
+   max_df / min_df / max_features, sklearn'ün _limit_features'ı ile aynı sırayla
+   ve aynı argsort çağrısıyla uygulanır (eşitlikler dahil aynı sözlük).
+3) shard'ların sütunları global sözlüğe taşınıp alt alta eklenir; IDF ve L2
+   normalizasyon ana süreçte uygulanır.
+
+Sözlük, IDF ve sayımlar tek süreçli `vec.fit_transform` ile birebir aynıdır;
+TF-IDF değerleri satır içi toplama sırası nedeniyle en fazla ~1 ulp farklı
+olabilir. Not: budama öncesi tüm shard'lar ana süreçte tutulur (tek süreçli
+fit de budamasız matrisi bellekte kurar).
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from numbers import Integral
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
+
+from .doc_store import Doc
+
+CHUNK_SIZE = 5000
+
+# Süreç başına bir kez kurulur (initializer).
+_WORKER_CV: Optional[CountVectorizer] = None
+
+
+def _init_worker(params: Dict[str, Any]) -> None:
+    """TfidfVectorizer'ın analyzer ayarlarıyla budamasız bir CountVectorizer."""
+    global _WORKER_CV
+    _WORKER_CV = CountVectorizer()
+    _WORKER_CV.set_params(**{k: v for k, v in params.items() if k in _WORKER_CV.get_params()})
+    _WORKER_CV.set_params(max_df=1.0, min_df=1, max_features=None, vocabulary=None, dtype=np.int64)
+
+
+def _count_chunk(texts: List[str]) -> Tuple[np.ndarray, csr_matrix]:
+    """Parçanın kendi (sıralı) sözlüğü ve o sözlükle sayım matrisi."""
+    try:
+        x = _WORKER_CV.fit_transform(texts)
+    except ValueError:
+        # Parçada hiç token yok (ör. yalnızca stop-word).
+        return np.empty(0, dtype=object), csr_matrix((len(texts), 0), dtype=np.int64)
+    return _WORKER_CV.get_feature_names_out(), x
+
+
+def _map_window(pool: ProcessPoolExecutor, fn: Callable, items: Iterable[Any], window: int) -> Iterator[Any]:
+    """pool.map gibi sıralı sonuç verir ama en fazla `window` parçayı uçuşta tutar."""
+    pending: deque = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _chunks(docs: Sequence[Doc], size: int) -> Iterator[List[str]]:
+    for i in range(0, len(docs), size):
+        yield [d.text for d in docs[i:i + size]]
+
+
+def _limit(vec: TfidfVectorizer, tf: np.ndarray, df: np.ndarray, n_doc: int) -> np.ndarray:
+    """CountVectorizer.fit_transform + _limit_features'ın maske hesabı (sıralı sözlük üzerinde)."""
+    max_df, min_df = vec.max_df, vec.min_df
+    high = max_df if isinstance(max_df, Integral) else max_df * n_doc
+    low = min_df if isinstance(min_df, Integral) else min_df * n_doc
+    if high < low:
+        raise ValueError("max_df corresponds to < documents than min_df")
+
+    mask = (df <= high) & (df >= low)
+    limit = vec.max_features
+    if limit is not None and mask.sum() > limit:
+        # sklearn'de tfs float64 sayım matrisinin sütun toplamıdır; aynı dizi -> aynı argsort.
+        tfs = tf.astype(np.float64)
+        mask_inds = (-tfs[mask]).argsort()[:limit]
+        new_mask = np.zeros(len(df), dtype=bool)
+        new_mask[np.where(mask)[0][mask_inds]] = True
+        mask = new_mask
+    if not mask.any():
+        raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+    return mask
+
+
+def _remap(x: csr_matrix, cols: np.ndarray, n_features: int) -> csr_matrix:
+    """Parça matrisinin sütunlarını global sözlüğe taşır; cols[j] < 0 olan (budanmış) terimleri atar."""
+    new = cols[x.indices]
+    keep = new >= 0
+    rows = np.repeat(np.arange(x.shape[0]), np.diff(x.indptr))[keep]
+    indptr = np.zeros(x.shape[0] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=x.shape[0]), out=indptr[1:])
+    out = csr_matrix((x.data[keep], new[keep], indptr), shape=(x.shape[0], n_features))
+    out.sort_indices()
+    return out
+
+
+def fit_transform_parallel(
+    vec: TfidfVectorizer,
+    docs: Sequence[Doc],
+    workers: int,
+    chunk_size: int = CHUNK_SIZE,
+) -> Tuple[csr_matrix, csr_matrix]:
+    """
+    `vec.fit_transform(texts)` karşılığını süreç havuzunda üretir; vec yerinde fit edilir.
+    (tfidf_matrix, sayım_matrisi) döner; sayımlar BM25 gibi skorlayıcılar için yeniden kullanılır.
+    """
+    params = vec.get_params()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(params,)) as pool:
+        parts = list(_map_window(pool, _count_chunk, _chunks(docs, chunk_size), 2 * workers))
+
+    # Parça sözlüklerini birleştir: global sıralı sözlük + parça -> global sütun eşlemesi.
+    all_terms = np.concatenate([terms for terms, _ in parts]) if parts else np.empty(0, dtype=object)
+    if len(all_terms) == 0:
+        raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+    terms, inverse = np.unique(all_terms, return_inverse=True)
+    local_to_global = np.split(inverse, np.cumsum([len(t) for t, _ in parts])[:-1])
+
+    n_doc = sum(x.shape[0] for _, x in parts)
+    tf = np.zeros(len(terms), dtype=np.int64)
+    df = np.zeros(len(terms), dtype=np.int64)
+    for (_, x), cols in zip(parts, local_to_global):
+        tf[cols] += np.bincount(x.indices, weights=x.data, minlength=len(cols)).astype(np.int64)
+        df[cols] += np.bincount(x.indices, minlength=len(cols))
+
+    mask = _limit(vec, tf, df, n_doc)
+    new_index = np.where(mask, np.cumsum(mask) - 1, -1)
+    n_features = int(mask.sum())
+    counts = vstack(
+        [_remap(x, new_index[cols], n_features) for (_, x), cols in zip(parts, local_to_global)], format="csr"
+    ).astype(vec.dtype)
+
+    vec.vocabulary_ = {t: i for i, t in enumerate(terms[mask].tolist())}
+    vec.fixed_vocabulary_ = False
+    tfidf = TfidfTransformer(
+        norm=vec.norm, use_idf=vec.use_idf, smooth_idf=vec.smooth_idf, sublinear_tf=vec.sublinear_tf
+    ).fit(counts)
+    if vec.use_idf:
+        vec.idf_ = tfidf.idf_
+    return tfidf.transform(counts, copy=True), counts
@@ -0,0 +1,173 @@
+"""
+Yargıtay karar PDF'lerinden precedents.jsonl kayıtları (toplu ingest; bkz. tools/ingest_pdfs.py).
+
+- Metin pypdf ile çıkarılır; sayfa sonu tirelemeleri birleştirilir, boşluklar sadeleştirilir.
+- Üst bilgiler kurallı ifadelerle ayrıştırılır: daire, karar tarihi, E./K. numaraları ve
+  atıf yapılan kanun maddeleri ("TBK'nın 56. maddesi", "6098 sayılı ... Kanunu'nun 49.
+  maddesi", "TCK m. 86/1" -> "TBK-56", "TCK-86"). Atıflar tags'e yazılır; atıf grafı
+  (citation_graph) bunları kanun id'leriyle eşleştirir.
+- Kayıt id'si içerik özetinden türetilir (YRG-<content_key>): aynı PDF iki kez eklenmez.
+
+İşçi süreçte çalışan ingest_file dosyayı önce özetler; içerik anahtarı daha önce
+işlenmişse (yeniden adlandırma, yalnızca mtime değişimi) metin çıkarılmaz.
+"""
+import hashlib
+import re
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from .analyzer import turkish_fold
+
+HASH_BLOCK = 1 << 20
+ID_PREFIX = "YRG-"
+
+# Kanun numarası -> kısaltma (laws.jsonl id önekleri)
+LAW_NUMBERS = {
+    "6098": "TBK",
+    "4721": "TMK",
+    "5237": "TCK",
+    "5271": "CMK",
+    "6100": "HMK",
+    "2004": "İİK",
+    "6102": "TTK",
+    "2577": "İYUK",
+}
+# Katlanmış yazım (turkish_fold) -> kısaltma
+LAW_CODES = {turkish_fold(c): c for c in ("TBK", "TMK", "TCK", "CMK", "HMK", "İİK", "TTK", "İYUK")}
+
+_CODE_ALT = "|".join(sorted(LAW_CODES, key=len, reverse=True))
+# Tüm desenler turkish_fold edilmiş (küçük harf) metinde çalışır.
+_ARTICLE_RE = re.compile(
+    r"\b(?P<code>" + _CODE_ALT + r")(?:\s*['’]\s*\w+)?\s*(?:(?:m|md)\s*\.\s*)?(?P<art>\d{1,4})(?:\s*/\s*\d+)?\b"
+    r"|\b(?P<no>\d{4})\s+sayılı\s+(?:[^\W\d]+\s+){0,4}?(?:kanun|yasa)\w*(?:\s*['’]\s*\w+)?\s+"
+    r"(?P<art2>\d{1,4})(?:\s*/\s*\d+)?\s*\.?\s*madde"
+)
+_CHAMBER_RE = re.compile(r"\b(?P<n>\d{1,2})\s*\.\s*(?P<kind>hukuk|ceza)\s+dairesi|\b(?P<gk>hukuk|ceza)\s+genel\s+kurulu")
+# "2019/1001 E." / "2019/1001 esas" ya da "E. 2019/1001" / "Esas No: 2019/1001"
+_DOCKET_RE = re.compile(
+    r"\b(?P<y1>\d{4})\s*/\s*(?P<n1>\d+)\s*(?P<t1>e|k|esas|karar)\b"
+    r"|\b(?P<t2>e|k|esas|karar)(?:\s+no|\s+sayısı)?\s*[.:]\s*(?P<y2>\d{4})\s*/\s*(?P<n2>\d+)"
+)
+_DATE_RE = re.compile(r"\b(?P<d>\d{1,2})\s*[./]\s*(?P<m>\d{1,2})\s*[./]\s*(?P<y>\d{4})\b")
+_LABELED_DATE_RE = re.compile(r"(?:\bt\s*\.|\bkarar\s+tarihi|\btarih(?:i)?)\s*:?\s*" + _DATE_RE.pattern)
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\n(\w)")
+_SPACES_RE = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def content_key(sha256: str) -> str:
+    """Kayıt id'sinde kullanılan kısa içerik anahtarı."""
+    return sha256[:16]
+
+
+def extract_text(path: Path) -> str:
+    """PDF -> düz metin (metin katmanı yoksa boş)."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(str(path))
+    pages = [(page.extract_text() or "").strip() for page in reader.pages]
+    text = "\n\n".join(p for p in pages if p)
+    text = _HYPHEN_BREAK_RE.sub(r"\1\2", text)
+    text = _SPACES_RE.sub(" ", text)
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def _iso_date(m: "re.Match") -> Optional[str]:
+    try:
+        return date(int(m.group("y")), int(m.group("m")), int(m.group("d"))).isoformat()
+    except ValueError:
+        return None
+
+
+def parse_decision(text: str) -> Dict[str, Any]:
+    """Karar metninden daire, tarih, E./K. ve atıf yapılan maddeler (bulunamayan alan None)."""
+    folded = turkish_fold(text)
+
+    chamber = None
+    m = _CHAMBER_RE.search(folded)
+    if m and m.group("n"):
+        chamber = f"Yargıtay {int(m.group('n'))}. {m.group('kind').capitalize()} Dairesi"
+    elif m:
+        chamber = f"Yargıtay {m.group('gk').capitalize()} Genel Kurulu"
+
+    dockets: Dict[str, str] = {}
+    for m in _DOCKET_RE.finditer(folded):
+        kind = (m.group("t1") or m.group("t2"))[0]
+        year, no = (m.group("y1"), m.group("n1")) if m.group("y1") else (m.group("y2"), m.group("n2"))
+        dockets.setdefault(kind, f"{year}/{int(no)} {kind.upper()}.")
+        if len(dockets) == 2:
+            break
+
+    # Etiketli tarih ("T. 12.03.2019", "Karar Tarihi: ...") yoksa metindeki son geçerli tarih
+    # (Yargıtay kararlarında karar tarihi genellikle sonda yazılır).
+    decided = None
+    m = _LABELED_DATE_RE.search(folded)
+    if m:
+        decided = _iso_date(m)
+    if decided is None:
+        for m in _DATE_RE.finditer(folded):
+            decided = _iso_date(m) or decided
+
+    tags: List[str] = []
+    for m in _ARTICLE_RE.finditer(folded):
+        if m.group("code"):
+            code, art = LAW_CODES[m.group("code")], m.group("art")
+        else:
+            code, art = LAW_NUMBERS.get(m.group("no")), m.group("art2")
+        tag = f"{code}-{int(art)}" if code else None
+        if tag and tag not in tags:
+            tags.append(tag)
+
+    return {"chamber": chamber, "date": decided, "ek": dockets.get("e"), "kk": dockets.get("k"), "tags": tags}
+
+
+def build_record(text: str, sha256: str, source: str) -> Dict[str, Any]:
+    """precedents.jsonl satırı (load_jsonl / doc_from_obj şeması)."""
+    fields = parse_decision(text)
+    title = " ".join(v for v in (fields["chamber"], fields["ek"], fields["kk"]) if v) or Path(source).stem
+    return {
+        "id": ID_PREFIX + content_key(sha256),
+        "title": title,
+        **fields,
+        "demo": False,
+        "source_file": source,
+        "text": text,
+    }
+
+
+# İşçi süreç durumu (initializer): daha önce işlenmiş içerik anahtarları.
+_KNOWN: Set[str] = set()
+
+
+def init_worker(known_keys: Set[str]) -> None:
+    global _KNOWN
+    _KNOWN = known_keys
+
+
+def ingest_file(path: str, size: int, mtime_ns: int) -> Dict[str, Any]:
+    """
+    Tek PDF: durum satırı (path, size, mtime_ns, sha256, status, id) + varsa kayıt.
+    status: ok | empty (metin katmanı yok) | duplicate (içerik zaten işlenmiş) | error
+    """
+    state: Dict[str, Any] = {"path": path, "size": size, "mtime_ns": mtime_ns, "sha256": None, "id": None}
+    try:
+        sha = file_sha256(Path(path))
+        state["sha256"] = sha
+        if content_key(sha) in _KNOWN:
+            return {"state": {**state, "status": "duplicate"}, "record": None}
+        text = extract_text(Path(path))
+    except Exception as e:  # bozuk/şifreli PDF: işi durdurmaz, durumda kalır
+        return {"state": {**state, "status": "error", "error": f"{type(e).__name__}: {e}"}, "record": None}
+    if not text:
+        return {"state": {**state, "status": "empty"}, "record": None}
+    record = build_record(text, sha, path)
+    return {"state": {**state, "status": "ok", "id": record["id"]}, "record": record}
@@ -1,5 +1,8 @@
-from typing import List, Optional, Dict, Any
-from .retrieval import Doc
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Tuple
+from .retrieval import Doc, Hits
+from .sections import postprocess_karar
+from .token_budget import TokenBudget, plan_context
 
 
 def format_laws(laws: List[Doc]) -> str:
@@ -36,29 +39,13 @@ def format_evidence(evidences: Optional[List[dict]]) -> str:
     return "\n".join(out)
 
 
-def build_prompt(
-    *,
-    kisa_karar: str,
-    dava_turu: str,
-    evidences: Optional[List[dict]],
-    laws: List[Doc],
-    precedents: List[Doc],
-    criminal_scoring: Optional[Dict[str, Any]] = None,
-) -> str:
-    scoring_block = ""
-    if dava_turu == "CEZA" and criminal_scoring:
-        s = criminal_scoring["scores"]
-        scoring_block = f"""
-CEZA TAKDİR PUANLARI (0–10):
-- Kast/Taksir: {s['kast_taksir']}
-- Sanığın geçmişi: {s['gecmis']}
-- Suçun işleniş şekli: {s['islenis_sekli']}
-- Mağdur üzerindeki etki: {s['magdur_etki']}
-- Toplumsal zarar: {s['toplumsal_zarar']}
-TOPLAM: {criminal_scoring['total']}  |  Bant: {criminal_scoring['band']}
-Takdir açıklaması: {criminal_scoring['takdir_aciklama']}
-"""
-
+@lru_cache(maxsize=16)
+def prompt_prefix(dava_turu: str) -> str:
+    """
+    Rol, kurallar ve çıktı şablonu: aynı dava türündeki tüm isteklerde bayt bayt aynı.
+    İsteğe özgü her şey (kısa karar, deliller, retrieval, puanlar) bundan SONRA gelir;
+    böylece LLM sunucusu bu önekin KV-cache'ini istekler arasında yeniden kullanabilir.
+    """
     format_block = f"""
 ÇIKTI FORMAT ZORUNLULUĞU (UYGULANACAK):
 - Çıktı tek parça metin olmalı, aşağıdaki başlıkları AYNI sırayla içermelidir.
@@ -129,7 +116,34 @@ KATI KURALLAR:
 
 {format_block}
 
-GİRDİ:
+"""
+
+
+def build_prompt(
+    *,
+    kisa_karar: str,
+    dava_turu: str,
+    evidences: Optional[List[dict]],
+    laws: List[Doc],
+    precedents: List[Doc],
+    criminal_scoring: Optional[Dict[str, Any]] = None,
+) -> str:
+    """prompt_prefix(dava_turu) + isteğe özgü kısım."""
+    scoring_block = ""
+    if dava_turu == "CEZA" and criminal_scoring:
+        s = criminal_scoring["scores"]
+        scoring_block = f"""
+CEZA TAKDİR PUANLARI (0–10):
+- Kast/Taksir: {s['kast_taksir']}
+- Sanığın geçmişi: {s['gecmis']}
+- Suçun işleniş şekli: {s['islenis_sekli']}
+- Mağdur üzerindeki etki: {s['magdur_etki']}
+- Toplumsal zarar: {s['toplumsal_zarar']}
+TOPLAM: {criminal_scoring['total']}  |  Bant: {criminal_scoring['band']}
+Takdir açıklaması: {criminal_scoring['takdir_aciklama']}
+"""
+
+    return prompt_prefix(dava_turu) + f"""GİRDİ:
 KISA KARAR:
 \"\"\"{kisa_karar}\"\"\"
 
@@ -148,109 +162,61 @@ DELİLLER:
 - Resmi gerekçeli karar diliyle yaz.
 - Deliller ile sonuç arasında illiyet bağını açıkla.
 """
-def format_gerekceli_karar(raw: str, dava_turu: str) -> str:
-    """
-    Model çıktısını daha 'mahkeme kararı' görünümüne zorlayan hafif post-process.
-    Varsayım üretmez, sadece biçim düzeltir.
-    """
-    text = (raw or "").strip()
-
-    # Üst başlık yoksa ekle
-    header = (
-        "T.C.\n"
-        "RATIOAI HUKUKİ KARAR DESTEK SİSTEMİ\n"
-        "(Akademik Prototip)\n\n"
-        f"DOSYA TÜRÜ: {dava_turu}\n"
-        "--------------------------------------------------\n\n"
-    )
-    if "RATIOAI HUKUKİ KARAR DESTEK SİSTEMİ" not in text:
-        text = header + text
-
-    # Başlıkları normalize et (farklı yazılmışsa)
-    def normalize_section(s: str) -> str:
-        s2 = s.upper().replace("İ", "İ").replace("İ", "İ")
-        return re.sub(r"\s+", " ", s2).strip()
-
-    normalized = text
-    # Eğer hiç bölüm başlığı yoksa, metni bölümlere kaba şekilde yerleştir
-    has_any = any(sec in normalize_section(normalized) for sec in REQUIRED_SECTIONS)
-    if not has_any:
-        normalized = (
-            header
-            + "I. TARAF BEYANLARI\n"
-            + "(Kısa karardan anlaşılan beyanlar özetlenmiştir.)\n\n"
-            + "II. UYUŞMAZLIĞIN HUKUKİ NİTELİĞİ\n\n"
-            + "III. DELİLLERİN DEĞERLENDİRİLMESİ\n\n"
-            + "IV. UYGULANAN HUKUK KURALLARI\n\n"
-            + "V. YARGITAY İÇTİHATLARI\n\n"
-            + "VI. HUKUKİ DEĞERLENDİRME\n\n"
-            + "VII. SONUÇ VE HÜKÜM\n"
-            + text
-        )
-        return normalized
-
-    # Eksik başlık varsa en sona ekle (boş bile olsa format tutarlı dursun)
-    up = normalize_section(normalized)
-    for sec in REQUIRED_SECTIONS:
-        if sec not in up:
-            normalized += f"\n\n{sec}\n(İşbu başlık altında dosya kapsamına göre ayrıca değerlendirme yapılır.)\n"
-            up = normalize_section(normalized)
-
-    # Ayırıcı çizgileri güzelleştir
-    normalized = re.sub(r"\n-{10,}\n", "\n--------------------------------------------------\n", normalized)
-
-    # "VII. SONUÇ VE HÜKÜM" içinde numara yoksa 1) ile başlatmayı dene
-    if "VII. SONUÇ VE HÜKÜM" in normalized:
-        part = normalized.split("VII. SONUÇ VE HÜKÜM", 1)[1]
-        if not re.search(r"\n\s*1\)", part):
-            normalized = normalized.replace(
-                "VII. SONUÇ VE HÜKÜM",
-                "VII. SONUÇ VE HÜKÜM\n1) (Hüküm fıkrası burada numaralı şekilde yazılır.)",
-                1
-            )
-
-    return normalized.strip()
-
-import re
-
-REQUIRED_SECTIONS = [
-    "I. TARAF BEYANLARI",
-    "II. UYUŞMAZLIĞIN HUKUKİ NİTELİĞİ",
-    "III. DELİLLERİN DEĞERLENDİRİLMESİ",
-    "IV. UYGULANAN HUKUK KURALLARI",
-    "V. YARGITAY İÇTİHATLARI",
-    "VI. HUKUKİ DEĞERLENDİRME",
-    "VII. SONUÇ VE HÜKÜM",
-]
 
-def format_gerekceli_karar(raw: str, dava_turu: str) -> str:
-    text = (raw or "").strip()
-
-    header = (
-        "T.C.\n"
-        "RATIOAI HUKUKİ KARAR DESTEK SİSTEMİ\n"
-        "(Akademik Prototip)\n\n"
-        f"DOSYA TÜRÜ: {dava_turu}\n"
-        "--------------------------------------------------\n\n"
-    )
-    if "RATIOAI HUKUKİ KARAR DESTEK SİSTEMİ" not in text:
-        text = header + text
 
-    def norm(s: str) -> str:
-        return re.sub(r"\s+", " ", (s or "").upper()).strip()
+def _with_text(d: Doc, text: str) -> Doc:
+    # Retrieval önbelleğindeki Doc paylaşılır; kısaltılmış metin için kopya.
+    return Doc(id=d.id, title=d.title, text=text, meta=d.meta)
 
-    up = norm(text)
-    for sec in REQUIRED_SECTIONS:
-        if sec not in up:
-            text += f"\n\n{sec}\n(İşbu başlık altında dosya kapsamına göre ayrıca değerlendirme yapılır.)\n"
-            up = norm(text)
 
-    text = re.sub(r"\n-{10,}\n", "\n--------------------------------------------------\n", text)
+def build_budgeted_prompt(
+    *,
+    kisa_karar: str,
+    dava_turu: str,
+    evidences: Optional[List[dict]],
+    laws: Hits,
+    precedents: Hits,
+    criminal_scoring: Optional[Dict[str, Any]] = None,
+    budget: TokenBudget,
+    query: str,
+) -> Tuple[str, List[Doc], List[Doc], Dict[str, Any]]:
+    """
+    build_prompt + token bütçesi: pasajlar skora göre num_ctx'e sığdırılır (bkz. token_budget).
+    (prompt, prompt'a giren kanunlar, içtihatlar, istatistik) döner.
+    """
+    fixed = build_prompt(
+        kisa_karar=kisa_karar,
+        dava_turu=dava_turu,
+        evidences=None,
+        laws=[],
+        precedents=[],
+        criminal_scoring=criminal_scoring,
+    )
+    kept_laws, kept_precs, kept_evs, stats = plan_context(
+        budget=budget,
+        fixed_tokens=budget.estimate(fixed),
+        query=query,
+        laws=laws,
+        precedents=precedents,
+        evidences=evidences or [],
+        law_overhead=lambda d: budget.estimate(format_laws([_with_text(d, "")])),
+        prec_overhead=lambda d: budget.estimate(format_precedents([_with_text(d, "")])),
+    )
+    prompt = build_prompt(
+        kisa_karar=kisa_karar,
+        dava_turu=dava_turu,
+        evidences=kept_evs or None,
+        laws=[d if t == d.text else _with_text(d, t) for d, t in kept_laws],
+        precedents=[d if t == d.text else _with_text(d, t) for d, t in kept_precs],
+        criminal_scoring=criminal_scoring,
+    )
+    stats["prompt_tokens"] = budget.estimate(prompt)
+    return prompt, [d for d, _ in kept_laws], [d for d, _ in kept_precs], stats
 
-    # Hüküm fıkrası numaralandırma kontrolü
-    if "VII. SONUÇ VE HÜKÜM" in text:
-        after = text.split("VII. SONUÇ VE HÜKÜM", 1)[1]
-        if not re.search(r"\n\s*1\)", after):
-            text = text.replace("VII. SONUÇ VE HÜKÜM", "VII. SONUÇ VE HÜKÜM\n1) ", 1)
 
-    return text.strip()
\ No newline at end of file
+def format_gerekceli_karar(raw: str, dava_turu: str) -> str:
+    """
+    Model çıktısını daha 'mahkeme kararı' görünümüne zorlayan hafif post-process.
+    Varsayım üretmez, sadece biçim düzeltir (bkz. sections.postprocess_karar).
+    """
+    return postprocess_karar(raw, dava_turu).text
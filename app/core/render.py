@@ -0,0 +1,233 @@
+"""
+Gerekçeli kararın PDF (reportlab) / DOCX (python-docx) çıktısı (bkz. /render/{format}).
+
+- Türkçe karakterli TTF font süreç başına bir kez aranır ve kaydedilir (pdf_font);
+  bulunamazsa Helvetica (ğ/ş/ı gibi karakterler eksik çizilir, uyarı basılır).
+- Satırlar sabit karakter sayısıyla değil, fontun gerçek genişliğiyle kırılır.
+- Çıktılar içerik özetiyle (biçim + başlık + metin + font) önbelleğe alınır; aynı karar
+  tekrar indirildiğinde yeniden üretilmez. Özet ETag olarak da kullanılır.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .sections import REQUIRED_SECTIONS, SEPARATOR
+
+RENDER_FORMATS = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+DEFAULT_TITLE = "Gerekçeli Karar (RatioAI Demo)"
+CHUNK_SIZE = 64 * 1024
+
+# Türkçe karakterleri kapsayan yaygın fontlar (Linux, macOS, Windows)
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+    r"C:\Windows\Fonts\DejaVuSans.ttf",
+    r"C:\Windows\Fonts\arial.ttf",
+    r"C:\Windows\Fonts\calibri.ttf",
+]
+FONT_NAME = "RatioTR"
+FALLBACK_FONT = "Helvetica"
+
+PAGE_MARGIN = 40
+TITLE_SIZE = 14
+HEADING_SIZE = 11
+BODY_SIZE = 10
+LINE_HEIGHT = 14
+
+_HEADINGS = frozenset(REQUIRED_SECTIONS)
+
+
+@lru_cache(maxsize=None)
+def pdf_font(path: Optional[str] = None) -> str:
+    """Font adı; verilen yol ya da ilk bulunan aday bir kez kaydedilir."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    for p in [path] if path else FONT_CANDIDATES:
+        if p and os.path.exists(p):
+            try:
+                pdfmetrics.registerFont(TTFont(FONT_NAME, p))
+                return FONT_NAME
+            except Exception as e:
+                print(f"[WARN] Font yüklenemedi ({p}): {e}")
+    print(f"[WARN] Türkçe karakterli TTF font bulunamadı; {FALLBACK_FONT} kullanılıyor (RENDER_FONT_PATH).")
+    return FALLBACK_FONT
+
+
+def wrap_lines(text: str, font: str, size: float, max_width: float) -> List[Tuple[str, bool]]:
+    """(satır, başlık mı); paragraflar font genişliğine göre kırılır, boş satırlar korunur."""
+    from reportlab.lib.utils import simpleSplit
+
+    out: List[Tuple[str, bool]] = []
+    for para in (text or "").splitlines():
+        line = para.strip()
+        if not line:
+            out.append(("", False))
+        elif line in _HEADINGS:
+            out.append((line, True))
+        else:
+            out.extend((part, False) for part in simpleSplit(para.rstrip(), font, size, max_width))
+    return out
+
+
+def render_pdf(title: str, text: str, font_path: Optional[str] = None) -> bytes:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    font = pdf_font(font_path)
+    width, height = A4
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+    c.setTitle(title)
+
+    y = height - PAGE_MARGIN
+    c.setFont(font, TITLE_SIZE)
+    c.drawString(PAGE_MARGIN, y, title)
+    y -= LINE_HEIGHT + 8
+
+    # Sayfa başına tek metin nesnesi (satır başına drawString yerine).
+    tx = c.beginText(PAGE_MARGIN, y)
+    for line, heading in wrap_lines(text, font, BODY_SIZE, width - 2 * PAGE_MARGIN):
+        if y <= PAGE_MARGIN:
+            c.drawText(tx)
+            c.showPage()
+            y = height - PAGE_MARGIN
+            tx = c.beginText(PAGE_MARGIN, y)
+        tx.setFont(font, HEADING_SIZE if heading else BODY_SIZE, LINE_HEIGHT)
+        tx.textLine(line)
+        y -= LINE_HEIGHT
+    c.drawText(tx)
+    c.save()
+    return buffer.getvalue()
+
+
+def render_docx(title: str, text: str) -> bytes:
+    from docx import Document
+
+    doc = Document()
+    doc.core_properties.title = title
+    doc.add_heading(title, level=1)
+    for para in (text or "").splitlines():
+        line = para.strip()
+        if line in _HEADINGS:
+            doc.add_heading(line, level=2)
+        elif line and line != SEPARATOR:
+            doc.add_paragraph(para.rstrip())
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def render_key(fmt: str, title: str, text: str, font_path: Optional[str] = None) -> str:
+    h = hashlib.sha256()
+    for part in (fmt, title, font_path or "", text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], key: str) -> bool:
+    """If-None-Match: virgülle ayrılmış tırnaklı ETag listesi ya da "*"; W/ (zayıf) öneki yok sayılır."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if len(tag) >= 2 and tag[0] == tag[-1] == '"' and tag[1:-1] == key:
+            return True
+    return False
+
+
+def iter_chunks(data: bytes, size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Bellekte hazır dosyayı CHUNK_SIZE'lık parçalar halinde verir (chunked output; üretim akıtılmaz)."""
+    view = memoryview(data)
+    for i in range(0, len(data), size):
+        yield bytes(view[i : i + size])
+
+
+class RenderCache:
+    """İçerik özeti -> üretilmiş dosya (bayt). Girdi sayısı ve toplam boyutla sınırlı LRU."""
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 64 * 1024 * 1024, font_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.font_path = font_path or None
+        self._data: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def key(self, fmt: str, title: str, text: str) -> str:
+        return render_key(fmt, title, text, self.font_path if fmt == "pdf" else None)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._data.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return data
+
+    def set(self, key: str, data: bytes) -> None:
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            self._bytes -= len(old) if old is not None else 0
+            self._data[key] = data
+            self._bytes += len(data)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, dropped = self._data.popitem(last=False)
+                self._bytes -= len(dropped)
+                self.evictions += 1
+
+    def render(self, fmt: str, title: str, text: str) -> Tuple[str, bytes]:
+        """(özet, dosya); önbellekte yoksa üretir (CPU-bound; thread havuzunda çağrılmalı)."""
+        key = self.key(fmt, title, text)
+        data = self.get(key)
+        if data is not None:
+            return key, data
+        if fmt == "pdf":
+            data = render_pdf(title, text, self.font_path)
+        elif fmt == "docx":
+            data = render_docx(title, text)
+        else:
+            raise ValueError(f"Bilinmeyen biçim: {fmt}")
+        self.set(key, data)
+        return key, data
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "capacity": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
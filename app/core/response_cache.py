@@ -0,0 +1,183 @@
+"""
+LLM yanıt önbelleği (içerik adresli).
+
+Anahtar = sha256(final prompt + model + options). Aynı kısa karar tekrar
+üretildiğinde (UI'da tekrar tıklama, batch yeniden koşuları) LLM'e gidilmez.
+
+İki katman:
+- bellek: LRU (girdi sayısı + TTL)
+- disk (opsiyonel): SQLite / SQLAlchemy; TTL + toplam boyut sınırı, en eski erişilen önce silinir.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, Text, create_engine, delete, func, select, update
+
+
+def cache_key(prompt: str, model: str, options: Dict[str, Any]) -> str:
+    raw = json.dumps({"prompt": prompt, "model": model, "options": options}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    def __init__(self, max_entries: int, ttl_s: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            created, value = item
+            if self.ttl_s > 0 and time.time() - created > self.ttl_s:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, created: Optional[float] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (created or time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache:
+    def __init__(self, path: Path, ttl_s: float, max_bytes: int):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        meta = MetaData()
+        self.table = Table(
+            "llm_response_cache",
+            meta,
+            Column("key", String(64), primary_key=True),
+            Column("value", Text, nullable=False),
+            Column("size", Integer, nullable=False),
+            Column("created_at", Float, nullable=False),
+            Column("last_access", Float, nullable=False, index=True),
+        )
+        meta.create_all(self.engine)
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        t = self.table
+        now = time.time()
+        with self.engine.begin() as conn:
+            row = conn.execute(select(t.c.value, t.c.created_at).where(t.c.key == key)).first()
+            if row is None:
+                return None
+            if self.ttl_s > 0 and now - row.created_at > self.ttl_s:
+                conn.execute(delete(t).where(t.c.key == key))
+                return None
+            conn.execute(update(t).where(t.c.key == key).values(last_access=now))
+            return row.created_at, row.value
+
+    def set(self, key: str, value: str, created: float) -> None:
+        t = self.table
+        size = len(value.encode("utf-8"))
+        with self.engine.begin() as conn:
+            conn.execute(delete(t).where(t.c.key == key))
+            conn.execute(t.insert().values(key=key, value=value, size=size, created_at=created, last_access=created))
+            self._evict(conn)
+
+    def _evict(self, conn) -> None:
+        t = self.table
+        if self.ttl_s > 0:
+            conn.execute(delete(t).where(t.c.created_at < time.time() - self.ttl_s))
+        if self.max_bytes <= 0:
+            return
+        total = conn.execute(select(func.coalesce(func.sum(t.c.size), 0))).scalar_one()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for row in conn.execute(select(t.c.key, t.c.size).order_by(t.c.last_access)):
+            victims.append(row.key)
+            excess -= row.size
+            if excess <= 0:
+                break
+        conn.execute(delete(t).where(t.c.key.in_(victims)))
+
+    def count(self) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(self.table)).scalar_one()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_s: float = 86400.0,
+        db_path: Optional[Path] = None,
+        db_max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.memory = LRUCache(max_entries, ttl_s)
+        self.disk = SQLiteCache(db_path, ttl_s, db_max_bytes) if db_path else None
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory.max_entries > 0 or self.disk is not None
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("hits_memory")
+            return value
+        if self.disk is not None:
+            item = self.disk.get(key)
+            if item is not None:
+                created, value = item
+                self.memory.set(key, value, created)
+                self._count("hits_disk")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        if not value:
+            return
+        now = time.time()
+        self.memory.set(key, value, now)
+        if self.disk is not None:
+            self.disk.set(key, value, now)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "disk_entries": self.disk.count() if self.disk is not None else None,
+        }
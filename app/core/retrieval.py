@@ -1,85 +1,650 @@
-import json
+import itertools
+import threading
 from pathlib import Path
-from dataclasses import dataclass
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix, vstack
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
+from .analyzer import ANALYZERS, analyzer_name, make_vectorizer
+from .citation_graph import CitationGraph
+from .dense import DENSE_MODES, DenseConfig, DenseIndex, build_dense
+from .doc_store import Doc, doc_from_obj, doc_texts, iter_jsonl, text_source
+from .index_store import IndexedCollection, load_index, save_index
+from .meta_index import MetaFilter, MetaIndex
+from .parallel_build import CHUNK_SIZE as PARALLEL_CHUNK_SIZE, fit_transform_parallel
+from .scorers import SCORERS, make_scorer
+from .topk import InvertedIndex, posting_scores, select_topk
 
-@dataclass
-class Doc:
-    id: str
-    title: str
-    text: str
-    meta: Dict[str, Any]
+LAW_VEC_PARAMS: Dict[str, Any] = {"ngram_range": (1, 2), "max_features": 60000}
+PREC_VEC_PARAMS: Dict[str, Any] = {"ngram_range": (1, 2), "max_features": 80000}
 
+# "inverted": yalnızca sorgu terimlerinin posting listelerini yürür + argpartition top-k.
+# "exhaustive": eski yol (tüm dokümanlara karşı dense skor; seçim select_topk ile).
+SEARCH_MODES = ("inverted", "exhaustive")
 
-def load_jsonl(path: Path, kind: str) -> List[Doc]:
+# Atıf genişletmesinde graf desteğinin ağırlığı (doğrudan skor [0, 1]'e ölçeklenir).
+GRAPH_WEIGHT = 0.3
+# Hibrit aramada sözcüksel ve yoğun aday havuzlarının her biri k * HYBRID_POOL.
+HYBRID_POOL = 4
+
+
+# (doküman, skor) çiftleri, skora göre azalan
+Hits = List[Tuple[Doc, float]]
+
+
+def strip_scores(hits: Hits) -> List[Doc]:
+    return [d for d, _ in hits]
+
+
+def _row(qm: Optional[csr_matrix], i: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    if qm is None:
+        return None
+    s, e = qm.indptr[i], qm.indptr[i + 1]
+    return qm.indices[s:e], qm.data[s:e]
+
+
+def _unit(scores: np.ndarray) -> np.ndarray:
+    top = scores.max() if len(scores) else 0.0
+    return scores / top if top > 0 else scores
+
+
+def load_jsonl_from(path: Path, kind: str, offset: int = 0) -> Tuple[List[Doc], int]:
+    """
+    offset'ten itibaren tamamlanmış satırları akıtarak okur; (docs, yeni_offset) döner.
+    Yarım yazılmış son satır atlanır, bir sonraki çağrıda okunur. Metinler
+    bellekte tutulmaz (bkz. doc_store).
+    """
     docs: List[Doc] = []
     if not path.exists():
-        return docs
-
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            obj = json.loads(line)
-
-            if kind == "law":
-                docs.append(
-                    Doc(
-                        id=obj["id"],
-                        title=obj.get("title", obj["id"]),
-                        text=obj["text"],
-                        meta={"source": obj.get("source", "UNKNOWN"), "demo": obj.get("demo", False)},
-                    )
-                )
-            else:
-                docs.append(
-                    Doc(
-                        id=obj["id"],
-                        title=obj.get("title", obj["id"]),
-                        text=obj["text"],
-                        meta={
-                            "chamber": obj.get("chamber"),
-                            "date": obj.get("date"),
-                            "ek": obj.get("ek"),
-                            "kk": obj.get("kk"),
-                            "tags": obj.get("tags", []),
-                            "demo": obj.get("demo", False),
-                        },
-                    )
-                )
-    return docs
+        return docs, offset
+
+    src = text_source(path)
+    for start, obj, offset in iter_jsonl(path, offset):
+        docs.append(doc_from_obj(obj, kind, src=src, offset=start))
+    return docs, offset
+
+
+def load_jsonl(path: Path, kind: str) -> List[Doc]:
+    if not path.exists():
+        return []
+
+    src = text_source(path)
+    return [doc_from_obj(obj, kind, src=src, offset=start) for start, obj, _ in iter_jsonl(path, complete_only=False)]
+
+
+_GENERATIONS = itertools.count(1)
+
+
+def _check_ids(kind: str, col: Optional[IndexedCollection], docs: List[Doc], allow_tail: bool = False) -> int:
+    """İndeksteki id'ler korpusla (veya allow_tail ise korpusun başıyla) aynı olmalı; indekslenen sayıyı döner."""
+    indexed = col.ids if col is not None else []
+    head = [d.id for d in docs[: len(indexed)]] if allow_tail else [d.id for d in docs]
+    if indexed != head:
+        raise ValueError(
+            f"Index for '{kind}' does not match the loaded corpus "
+            f"({len(indexed)} indexed vs {len(docs)} loaded). Rebuild with tools/build_index.py."
+        )
+    return len(indexed)
 
 
 class Retriever:
-    def __init__(self, law_docs: List[Doc], precedent_docs: List[Doc]):
+    def __init__(
+        self,
+        law_docs: List[Doc],
+        precedent_docs: List[Doc],
+        index: Optional[Dict[str, Optional[IndexedCollection]]] = None,
+        search_mode: str = "inverted",
+        scorers: Tuple[str, ...] = ("tfidf",),
+        build_workers: int = 1,
+        analyzer: str = "default",
+        dense: Optional[DenseConfig] = None,
+    ):
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"search_mode must be one of {SEARCH_MODES}, got {search_mode!r}")
+        for name in scorers:
+            if name not in SCORERS:
+                raise ValueError(f"Unknown scorer {name!r}; expected one of {tuple(SCORERS)}")
+        if analyzer not in ANALYZERS:
+            raise ValueError(f"Unknown analyzer {analyzer!r}; expected one of {ANALYZERS}")
+        self.search_mode = search_mode
+        self.scorer_names = tuple(scorers)
+        self.default_scorer = self.scorer_names[0]
+        # >1 ise vectorizer fit'i parçalar halinde süreç havuzunda yapılır (bkz. parallel_build).
+        self.build_workers = build_workers
         self.law_docs = law_docs
         self.prec_docs = precedent_docs
 
-        self.law_vec = TfidfVectorizer(ngram_range=(1, 2), max_features=60000)
-        self.prec_vec = TfidfVectorizer(ngram_range=(1, 2), max_features=80000)
+        # Artımlı ekleme: yeni içtihatlar dondurulmuş sözlükle vektörlenip
+        # delta segmentine eklenir; search base + delta'yı birlikte tarar.
+        self._lock = threading.Lock()
+        self._generation = next(_GENERATIONS)
+        self._prec_delta = None
+        self._delta_weights: Dict[str, Any] = {}
+        # İçtihat meta filtreleri (daire / tarih / etiket) ve kanun <-> içtihat atıf grafı;
+        # satır sırası prec_docs ile aynı.
+        self._meta = MetaIndex()
+        self._graph = CitationGraph(law_docs)
+        # Opsiyonel yoğun vektör indeksi (içtihatlar); bkz. dense.py
+        self.dense_config = dense
+        self._dense: Optional[DenseIndex] = None
+
+        # koleksiyon -> skorlayıcı adı -> fit edilmiş skorlayıcı / posting'ler
+        self._scorers: Dict[str, Dict[str, Any]] = {"law": {}, "precedent": {}}
+        self._inv: Dict[str, Dict[str, InvertedIndex]] = {"law": {}, "precedent": {}, "precedent_delta": {}}
+
+        if index is not None:
+            _check_ids("law", index.get("law"), law_docs)
+            n_base = _check_ids("precedent", index.get("precedent"), precedent_docs, allow_tail=True)
+            law, prec = index.get("law"), index.get("precedent")
+            # Analizör indeksle birlikte saklanır; istenen analizör yalnızca yeni fit'lerde kullanılır.
+            analyzer = analyzer_name((prec or law).vectorizer) if (prec or law) else analyzer
+            self.analyzer = analyzer
+            self.law_vec = law.vectorizer if law else make_vectorizer(LAW_VEC_PARAMS, analyzer)
+            self.prec_vec = prec.vectorizer if prec else make_vectorizer(PREC_VEC_PARAMS, analyzer)
+            self._law_matrix = law.matrix if law else None
+            self._prec_matrix = prec.matrix if prec else None
+            self._attach("law", law, law_docs)
+            self._attach("precedent", prec, precedent_docs[:n_base])
+            # İndeks kurulduktan sonra jsonl'e eklenmiş içtihatlar delta olarak yüklenir.
+            self.prec_docs = precedent_docs[:n_base]
+            self._extend_meta(self.prec_docs)
+            if dense is not None:
+                self._dense = index.get("dense")
+                if self._dense is None:
+                    self._build_dense(self.prec_docs)
+            self.add_precedents(precedent_docs[n_base:])
+            return
+
+        self.analyzer = analyzer
+        self.law_vec = make_vectorizer(LAW_VEC_PARAMS, analyzer)
+        self.prec_vec = make_vectorizer(PREC_VEC_PARAMS, analyzer)
+
+        self._law_matrix = self._fit_collection("law", self.law_vec, law_docs) if law_docs else None
+        self._prec_matrix = self._fit_collection("precedent", self.prec_vec, precedent_docs) if precedent_docs else None
+        self._extend_meta(precedent_docs)
+        self._build_dense(precedent_docs)
+
+    def _extend_meta(self, docs: List[Doc]) -> None:
+        self._meta.extend(docs)
+        self._graph.extend(docs)
+
+    def _build_dense(self, docs: List[Doc]) -> None:
+        if self.dense_config is None or self._prec_matrix is None:
+            return
+        self._dense = build_dense(self.dense_config, self.prec_vec, self._prec_matrix, docs, doc_texts(docs))
+
+    def _fit_collection(self, kind: str, vec: TfidfVectorizer, docs: List[Doc]):
+        """vec'i docs üzerinde fit eder, skorlayıcıları kurar; TF-IDF matrisini döner."""
+        counts = None
+        if self.build_workers > 1 and len(docs) > PARALLEL_CHUNK_SIZE:
+            matrix, counts = fit_transform_parallel(vec, docs, self.build_workers, PARALLEL_CHUNK_SIZE)
+        else:
+            matrix = vec.fit_transform(doc_texts(docs))
+        self._fit_scorers(kind, vec, docs, matrix, counts)
+        return matrix
+
+    def _fit_scorers(self, kind: str, vec: TfidfVectorizer, docs: List[Doc], tfidf_matrix, counts=None) -> None:
+        need_texts = counts is None and any(n != "tfidf" for n in self.scorer_names)
+        texts = doc_texts(docs) if need_texts else []
+        for name in self.scorer_names:
+            scorer = make_scorer(name)
+            weights = scorer.fit_transform(vec, texts, tfidf_matrix if name == "tfidf" else None, counts)
+            self._scorers[kind][name] = scorer
+            self._inv[kind][name] = InvertedIndex.from_matrix(weights)
+
+    def _attach(self, kind: str, col: Optional[IndexedCollection], docs: List[Doc]) -> None:
+        if col is None:
+            return
+        stored = col.scorers or {}
+        missing = []
+        for name in self.scorer_names:
+            if name in stored:
+                self._scorers[kind][name], self._inv[kind][name] = stored[name]
+            elif name == "tfidf":
+                # v1 indekslerinde posting yok; bellekte bir kez türet.
+                self._scorers[kind][name] = make_scorer(name)
+                self._inv[kind][name] = InvertedIndex.from_matrix(col.matrix)
+            else:
+                missing.append(name)
+        if missing:
+            # İndeks bu skorlayıcı olmadan kurulmuş: metinlerden fit et (yavaş yol).
+            vec = col.vectorizer
+            texts = doc_texts(docs)
+            for name in missing:
+                scorer = make_scorer(name)
+                self._inv[kind][name] = InvertedIndex.from_matrix(scorer.fit_transform(vec, texts))
+                self._scorers[kind][name] = scorer
+
+    @classmethod
+    def from_index(
+        cls,
+        index_dir: Path,
+        law_docs: List[Doc],
+        precedent_docs: List[Doc],
+        mmap: bool = True,
+        search_mode: str = "inverted",
+        scorers: Tuple[str, ...] = ("tfidf",),
+        build_workers: int = 1,
+        analyzer: str = "default",
+        dense: Optional[DenseConfig] = None,
+    ) -> "Retriever":
+        """tools/build_index.py ile yazılmış indeksi (mmap) açar; vectorizer'ları yeniden fit etmez."""
+        return cls(
+            law_docs,
+            precedent_docs,
+            index=load_index(index_dir, mmap=mmap, dense=dense),
+            search_mode=search_mode,
+            scorers=scorers,
+            build_workers=build_workers,
+            analyzer=analyzer,
+            dense=dense,
+        )
+
+    @property
+    def delta_size(self) -> int:
+        return 0 if self._prec_delta is None else self._prec_delta.shape[0]
+
+    def add_precedents(self, docs: List[Doc]) -> int:
+        """
+        Yeni içtihatları refit yapmadan ekler. Sözlük, IDF (ve BM25 avgdl) donuktur;
+        yeni terimler bir sonraki compaction'a (yeniden fit) kadar skorlamaya katılmaz.
+        """
+        docs = list(docs)
+        if not docs:
+            return 0
+        with self._lock:
+            if self._prec_matrix is None:
+                # Henüz base yok: dondurulacak sözlük de yok, doğrudan fit et.
+                all_docs = self.prec_docs + docs
+                self._prec_matrix = self._fit_collection("precedent", self.prec_vec, all_docs)
+                self._extend_meta(docs)
+                self._build_dense(all_docs)
+                self.prec_docs = all_docs
+                return len(docs)
 
-        self._law_matrix = self.law_vec.fit_transform([d.text for d in law_docs]) if law_docs else None
-        self._prec_matrix = self.prec_vec.fit_transform([d.text for d in precedent_docs]) if precedent_docs else None
+            texts = doc_texts(docs)
+            x = self.prec_vec.transform(texts)
+            delta = x if self._prec_delta is None else vstack([self._prec_delta, x], format="csr")
+            delta_weights, delta_inv = {}, {}
+            for name, scorer in self._scorers["precedent"].items():
+                w = scorer.transform(self.prec_vec, texts, x if name == "tfidf" else None)
+                prev = self._delta_weights.get(name)
+                delta_weights[name] = w if prev is None else vstack([prev, w], format="csr")
+                delta_inv[name] = InvertedIndex.from_matrix(delta_weights[name])
+            self._extend_meta(docs)
+            if self._dense is not None:
+                self._dense.extend(self._dense.embedder.embed_docs(texts, x))
+            self.prec_docs = self.prec_docs + docs
+            self._prec_delta = delta
+            self._delta_weights = delta_weights
+            self._inv["precedent_delta"] = delta_inv
+        return len(docs)
 
-    def search(self, query: str, topk_laws: int = 8, topk_precedents: int = 8) -> Tuple[List[Doc], List[Doc]]:
-        laws: List[Doc] = []
-        precs: List[Doc] = []
+    def save(self, index_dir: Path) -> Path:
+        collections: Dict[str, Optional[IndexedCollection]] = {"law": None, "precedent": None}
+        if self._law_matrix is not None:
+            collections["law"] = IndexedCollection(
+                self.law_vec, self._law_matrix, [d.id for d in self.law_docs], self._stored_scorers("law")
+            )
+        if self._prec_matrix is not None:
+            n_base = self._prec_matrix.shape[0]
+            collections["precedent"] = IndexedCollection(
+                self.prec_vec,
+                self._prec_matrix,
+                [d.id for d in self.prec_docs[:n_base]],
+                self._stored_scorers("precedent"),
+            )
+        return save_index(index_dir, collections, dense=self._dense)
+
+    def _stored_scorers(self, kind: str) -> Dict[str, Tuple[Any, InvertedIndex]]:
+        return {name: (sc, self._inv[kind][name]) for name, sc in self._scorers[kind].items()}
+
+    def _topk(
+        self,
+        terms: np.ndarray,
+        weights: np.ndarray,
+        segments,
+        k: int,
+        threshold: float,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        segments: (posting'ler, satır_offset) listesi; base + delta birlikte sıralanır. (indeksler, skorlar) döner.
+        mask: tüm satırlar için aday bitmap'i (meta filtre); None ise kısıtlama yok.
+        """
+        if mask is not None and not mask.any():
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        # Terimleri sütun sırasına koy: iki modda da toplama sırası aynı olsun (eşit skorlar birebir eşit kalır).
+        order = np.argsort(terms, kind="stable")
+        terms, weights = np.asarray(terms)[order], np.asarray(weights)[order]
+        if self.search_mode == "exhaustive":
+            parts = []
+            for inv, _ in segments:
+                n_terms = len(inv.indptr) - 1
+                q = np.zeros(n_terms)
+                q[terms] = weights
+                m = csc_matrix((inv.data, inv.indices, inv.indptr), shape=(inv.n_docs, n_terms))
+                parts.append(m @ q)
+            sims = np.concatenate(parts)
+            if mask is not None:
+                sims[~mask] = -np.inf
+            # Eşitlik sırası inverted yol ile aynı olsun diye aynı seçim (küçük indeks önce).
+            return select_topk(np.arange(len(sims), dtype=np.int64), sims, k, threshold)
+
+        docs, scores = [], []
+        for inv, offset in segments:
+            seg_mask = None if mask is None else mask[offset:offset + inv.n_docs]
+            d, sc = posting_scores(inv, terms, weights, seg_mask)
+            docs.append(d + offset)
+            scores.append(sc)
+        return select_topk(np.concatenate(docs), np.concatenate(scores), k, threshold)
+
+    def _topk_batch(
+        self, qm: csr_matrix, segments, k: int, threshold: float, mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Tüm sorgular için tek seyrek x seyrek çarpım (Q · Wᵀ); satır başına top-k."""
+        qm = csr_matrix(qm)
+        qm.sort_indices()
+        if self.search_mode == "exhaustive" or (mask is not None and not mask.any()):
+            return [
+                self._topk(qm.indices[qm.indptr[i]:qm.indptr[i + 1]], qm.data[qm.indptr[i]:qm.indptr[i + 1]],
+                           segments, k, threshold, mask)
+                for i in range(qm.shape[0])
+            ]
+
+        products = []
+        for inv, offset in segments:
+            # Terim-majör posting dizileri, CSR olarak okunduğunda doğrudan Wᵀ'dir (kopya yok).
+            wt = csr_matrix((inv.data, inv.indices, inv.indptr), shape=(len(inv.indptr) - 1, inv.n_docs))
+            products.append((csr_matrix(qm @ wt), offset))
+
+        out = []
+        for i in range(qm.shape[0]):
+            docs, scores = [], []
+            for prod, offset in products:
+                s, e = prod.indptr[i], prod.indptr[i + 1]
+                docs.append(prod.indices[s:e].astype(np.int64) + offset)
+                scores.append(prod.data[s:e])
+            docs_i, scores_i = np.concatenate(docs), np.concatenate(scores)
+            if mask is not None:
+                keep = mask[docs_i]
+                docs_i, scores_i = docs_i[keep], scores_i[keep]
+            out.append(select_topk(docs_i, scores_i, k, threshold))
+        return out
+
+    def _rerank(
+        self,
+        query: Tuple[np.ndarray, np.ndarray],
+        segments,
+        n_rows: int,
+        direct: np.ndarray,
+        linked: np.ndarray,
+        support: np.ndarray,
+        k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Aday = doğrudan isabetler ∪ graf komşuları. Adayların doğrudan skorları maske ile
+        (yalnızca adaylar) tam hesaplanır; birleşik skor = skor / max + GRAPH_WEIGHT * destek / max.
+        """
+        cands = np.union1d(direct, linked)
+        cand_mask = np.zeros(n_rows, dtype=bool)
+        cand_mask[cands] = True
+        idxs, scores = self._topk(query[0], query[1], segments, len(cands), -np.inf, cand_mask)
+        lexical = np.zeros(len(cands))
+        lexical[np.searchsorted(cands, idxs)] = scores
+        graph = np.zeros(len(cands))
+        graph[np.searchsorted(cands, linked)] = support
+        return select_topk(cands, _unit(lexical) + GRAPH_WEIGHT * _unit(graph), k, 0.0)
+
+    def _expand(
+        self,
+        name: str,
+        law_query: Tuple[np.ndarray, np.ndarray],
+        prec_query: Tuple[np.ndarray, np.ndarray],
+        laws: Tuple[np.ndarray, np.ndarray],
+        precs: Tuple[np.ndarray, np.ndarray],
+        n_precs: int,
+        segments,
+        mask: Optional[np.ndarray],
+        topk_laws: int,
+        topk_precedents: int,
+    ) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+        """
+        Atıf grafıyla genişletme: en iyi kanunlara atıf yapan içtihatlar ve en iyi
+        içtihatların atıf yaptığı kanunlar aday kümesine girer, birlikte yeniden sıralanır.
+        """
+        linked_precs, prec_support = self._graph.citing_precedents(laws[0], _unit(laws[1]))
+        # Graf, anlık görüntüden sonra eklenen satırları içerebilir; meta filtre de burada uygulanır.
+        keep = linked_precs < n_precs
+        linked_precs, prec_support = linked_precs[keep], prec_support[keep]
+        if mask is not None:
+            keep = mask[linked_precs]
+            linked_precs, prec_support = linked_precs[keep], prec_support[keep]
+        linked_laws, law_support = self._graph.cited_laws(precs[0], _unit(precs[1]))
+
+        if len(linked_precs) and segments:
+            precs = self._rerank(prec_query, segments, n_precs, precs[0], linked_precs, prec_support, topk_precedents)
+        if len(linked_laws):
+            law_segments = [(self._inv["law"][name], 0)]
+            laws = self._rerank(law_query, law_segments, len(self.law_docs), laws[0], linked_laws, law_support, topk_laws)
+        return laws, precs
+
+    def citation_stats(self) -> Dict[str, int]:
+        return self._graph.stats()
+
+    def _resolve_dense(self, dense_mode: str) -> str:
+        if dense_mode not in DENSE_MODES:
+            raise ValueError(f"dense_mode must be one of {DENSE_MODES}, got {dense_mode!r}")
+        if dense_mode != "off" and self._dense is None:
+            raise ValueError("Dense retrieval is not enabled for this retriever")
+        return dense_mode
+
+    def _dense_precs(
+        self,
+        dense_mode: str,
+        query: Tuple[np.ndarray, np.ndarray],
+        qvec: np.ndarray,
+        segments,
+        n_rows: int,
+        mask: Optional[np.ndarray],
+        k: int,
+        threshold: float,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        "dense": yalnızca ANN. "hybrid": sözcüksel ve yoğun havuzların birleşimi; her adayın
+        iki skoru da tam hesaplanır, birleşik skor = (1 - alpha) * sözcüksel / max + alpha * kosinüs.
+        """
+        dense = self._dense
+        if dense_mode == "dense":
+            # Hybrid'deki gibi yalnızca pozitif skorlar: eşleşme yoksa korpus sırası dönmesin.
+            idxs, scores = dense.search(qvec, k, n_rows, mask)
+            return select_topk(idxs, scores, k, 0.0)
+
+        pool = k * HYBRID_POOL
+        lex_idx, lex_scores = self._topk(query[0], query[1], segments, pool, threshold, mask)
+        den_idx, _ = dense.search(qvec, pool, n_rows, mask)
+        # Yalnızca yoğun havuzdan gelen adayların sözcüksel skoru eksik: maske ile tam hesapla.
+        extra = np.setdiff1d(den_idx, lex_idx)
+        lexical = np.concatenate([lex_scores, np.zeros(len(extra))])
+        if len(extra):
+            extra_mask = np.zeros(n_rows, dtype=bool)
+            extra_mask[extra] = True
+            idxs, scores = self._topk(query[0], query[1], segments, len(extra), -np.inf, extra_mask)
+            lexical[len(lex_idx) + np.searchsorted(extra, idxs)] = scores
+        cands = np.concatenate([lex_idx, extra])
+        if not len(cands):
+            return cands, lexical
+        cosine = np.maximum(dense.score_rows(qvec, cands), 0.0)
+        alpha = dense.config.alpha
+        return select_topk(cands, (1 - alpha) * _unit(lexical) + alpha * cosine, k, 0.0)
+
+    def dense_stats(self) -> Optional[Dict[str, Any]]:
+        return None if self._dense is None else self._dense.stats()
+
+    def _resolve_scorer(self, scorer: Optional[str]) -> str:
+        name = scorer or self.default_scorer
+        if name not in self.scorer_names:
+            raise ValueError(f"Scorer {name!r} is not enabled; enabled: {self.scorer_names}")
+        return name
+
+    def _precedent_view(self, name: str, filters: Optional[MetaFilter] = None):
+        with self._lock:
+            prec_docs, prec_matrix = self.prec_docs, self._prec_matrix
+            prec_inv, delta_inv = self._inv["precedent"].get(name), self._inv["precedent_delta"].get(name)
+            # Bitmap, doküman listesiyle aynı anda alınır (ekleme ile uzunlukları tutarlı kalır).
+            mask = self._meta.mask(filters)
+        segments = []
+        if prec_matrix is not None and prec_docs:
+            segments.append((prec_inv, 0))
+            if delta_inv is not None:
+                segments.append((delta_inv, prec_matrix.shape[0]))
+        return prec_docs, segments, mask
+
+    def normalize_query(self, query: str, dense_mode: str = "off") -> str:
+        """Vectorizer'ın gördüğü token dizisi: aynı token dizisine sahip sorgular aynı vektörü üretir."""
+        if dense_mode != "off" and self._dense is not None and self._dense.embedder.name != "lsa":
+            # Model tabanlı embedder ham metni görür (noktalama, büyük harf); normalize edilmez.
+            return query
+        vec = self.prec_vec if self._prec_matrix is not None else self.law_vec
+        return " ".join(vec.build_tokenizer()(vec.build_preprocessor()(query)))
+
+    @property
+    def version(self) -> str:
+        """Korpus/indeks sürüm damgası: compaction (yeni nesne) veya ekleme ile değişir."""
+        return f"{self._generation}:{len(self.prec_docs)}"
+
+    def search_batch_scored(
+        self,
+        queries: List[str],
+        topk_laws: int = 8,
+        topk_precedents: int = 8,
+        scorer: Optional[str] = None,
+        filters: Optional[MetaFilter] = None,
+        expand: bool = False,
+        dense_mode: str = "off",
+    ) -> List[Tuple[Hits, Hits]]:
+        """search_scored() ile aynı sonuç; tüm sorgular tek transform + tek matris çarpımıyla skorlanır."""
+        name = self._resolve_scorer(scorer)
+        dense_mode = self._resolve_dense(dense_mode)
+        if not queries:
+            return []
+
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        law_res = [empty] * len(queries)
+        prec_res = [empty] * len(queries)
+        law_qm = prec_qm = None
+
+        if self._law_matrix is not None and self.law_docs:
+            sc = self._scorers["law"][name]
+            law_qm = csr_matrix(sc.query_matrix(self.law_vec, queries))
+            law_res = self._topk_batch(law_qm, [(self._inv["law"][name], 0)], topk_laws, sc.threshold)
+
+        prec_docs, segments, mask = self._precedent_view(name, filters)
+        if segments:
+            sc = self._scorers["precedent"][name]
+            prec_qm = csr_matrix(sc.query_matrix(self.prec_vec, queries))
+            if dense_mode == "off":
+                prec_res = self._topk_batch(prec_qm, segments, topk_precedents, sc.threshold, mask)
+            else:
+                qvecs = self._dense.embed_queries(queries)
+                prec_res = [
+                    self._dense_precs(dense_mode, _row(prec_qm, i), qvecs[i], segments, len(prec_docs), mask,
+                                      topk_precedents, sc.threshold)
+                    for i in range(len(queries))
+                ]
+
+        if expand and law_qm is not None:
+            for i in range(len(queries)):
+                law_res[i], prec_res[i] = self._expand(
+                    name, _row(law_qm, i), _row(prec_qm, i), law_res[i], prec_res[i],
+                    len(prec_docs), segments, mask, topk_laws, topk_precedents,
+                )
+
+        return [
+            (
+                [(self.law_docs[j], float(v)) for j, v in zip(*law_res[i])],
+                [(prec_docs[j], float(v)) for j, v in zip(*prec_res[i])],
+            )
+            for i in range(len(queries))
+        ]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        topk_laws: int = 8,
+        topk_precedents: int = 8,
+        scorer: Optional[str] = None,
+        filters: Optional[MetaFilter] = None,
+        expand: bool = False,
+        dense_mode: str = "off",
+    ) -> List[Tuple[List[Doc], List[Doc]]]:
+        return [
+            (strip_scores(laws), strip_scores(precs))
+            for laws, precs in self.search_batch_scored(
+                queries, topk_laws, topk_precedents, scorer, filters, expand, dense_mode
+            )
+        ]
+
+    def search_scored(
+        self,
+        query: str,
+        topk_laws: int = 8,
+        topk_precedents: int = 8,
+        scorer: Optional[str] = None,
+        filters: Optional[MetaFilter] = None,
+        expand: bool = False,
+        dense_mode: str = "off",
+    ) -> Tuple[Hits, Hits]:
+        """
+        filters yalnızca içtihatlara uygulanır (kanunlarda daire/tarih/etiket yok).
+        expand ise sonuçlar atıf grafıyla genişletilip yeniden sıralanır; skorlar birleşik skordur.
+        dense_mode ("hybrid" / "dense") yalnızca içtihat aramasını etkiler.
+        """
+        name = self._resolve_scorer(scorer)
+        dense_mode = self._resolve_dense(dense_mode)
+
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        laws, precs = empty, empty
+        law_query = prec_query = None
 
         if self._law_matrix is not None and self.law_docs:
-            qv = self.law_vec.transform([query])
-            sims = cosine_similarity(qv, self._law_matrix)[0]
-            idxs = sims.argsort()[::-1][:topk_laws]
-            laws = [self.law_docs[i] for i in idxs if sims[i] > 0.04]
-
-        if self._prec_matrix is not None and self.prec_docs:
-            qv = self.prec_vec.transform([query])
-            sims = cosine_similarity(qv, self._prec_matrix)[0]
-            idxs = sims.argsort()[::-1][:topk_precedents]
-            precs = [self.prec_docs[i] for i in idxs if sims[i] > 0.04]
-
-        return laws, precs
\ No newline at end of file
+            sc = self._scorers["law"][name]
+            law_query = sc.query(self.law_vec, query)
+            laws = self._topk(*law_query, [(self._inv["law"][name], 0)], topk_laws, sc.threshold)
+
+        prec_docs, segments, mask = self._precedent_view(name, filters)
+        if segments:
+            sc = self._scorers["precedent"][name]
+            prec_query = sc.query(self.prec_vec, query)
+            if dense_mode == "off":
+                precs = self._topk(*prec_query, segments, topk_precedents, sc.threshold, mask)
+            else:
+                qvec = self._dense.embed_queries([query])[0]
+                precs = self._dense_precs(
+                    dense_mode, prec_query, qvec, segments, len(prec_docs), mask, topk_precedents, sc.threshold
+                )
+
+        if expand and law_query is not None:
+            laws, precs = self._expand(
+                name, law_query, prec_query, laws, precs, len(prec_docs), segments, mask, topk_laws, topk_precedents
+            )
+
+        return (
+            [(self.law_docs[i], float(v)) for i, v in zip(*laws)],
+            [(prec_docs[i], float(v)) for i, v in zip(*precs)],
+        )
+
+    def search(
+        self,
+        query: str,
+        topk_laws: int = 8,
+        topk_precedents: int = 8,
+        scorer: Optional[str] = None,
+        filters: Optional[MetaFilter] = None,
+        expand: bool = False,
+        dense_mode: str = "off",
+    ) -> Tuple[List[Doc], List[Doc]]:
+        laws, precs = self.search_scored(query, topk_laws, topk_precedents, scorer, filters, expand, dense_mode)
+        return strip_scores(laws), strip_scores(precs)
@@ -0,0 +1,124 @@
+"""
+Retrieval sonuç önbelleği.
+
+Retriever.search, aynı sorgu ve aynı korpus için deterministiktir. Anahtar:
+(sürüm damgası, skorlayıcı, topk'lar, meta filtre, atıf genişletmesi, yoğun mod, normalize sorgu);
+değer: skorlu (kanun, içtihat) isabetleri (Doc referansları, kopya değil).
+Sürüm damgası (Retriever.version) anahtarın parçasıdır: ekleme/compaction sonrası eski ve yeni
+retriever'lar yan yana istek alırken önbellek boşaltılmaz, eski sürümün girdileri LRU ile düşer.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .response_cache import LRUCache
+from .meta_index import MetaFilter
+from .retrieval import Doc, Hits, Retriever, strip_scores
+
+class RetrievalCache:
+    def __init__(self, max_entries: int = 2048):
+        self.lru = LRUCache(max_entries, ttl_s=0)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.lru.max_entries > 0
+
+    def _key(
+        self,
+        retriever: Retriever,
+        version: str,
+        query: str,
+        scorer: Optional[str],
+        topk_laws: int,
+        topk_precedents: int,
+        fkey: str,
+        expand: bool,
+        dense_mode: str,
+    ) -> str:
+        name = scorer or retriever.default_scorer
+        q = retriever.normalize_query(query, dense_mode)
+        return f"{version}|{name}|{topk_laws}|{topk_precedents}|{fkey}|{int(expand)}|{dense_mode}|{q}"
+
+    def search_scored(
+        self,
+        retriever: Retriever,
+        query: str,
+        topk_laws: int = 8,
+        topk_precedents: int = 8,
+        scorer: Optional[str] = None,
+        filters: Optional[MetaFilter] = None,
+        expand: bool = False,
+        dense_mode: str = "off",
+    ) -> Tuple[Hits, Hits]:
+        return self.search_batch_scored(
+            retriever, [query], topk_laws, topk_precedents, scorer, filters, expand, dense_mode
+        )[0]
+
+    def search_batch_scored(
+        self,
+        retriever: Retriever,
+        queries: List[str],
+        topk_laws: int = 8,
+        topk_precedents: int = 8,
+        scorer: Optional[str] = None,
+        filters: Optional[MetaFilter] = None,
+        expand: bool = False,
+        dense_mode: str = "off",
+    ) -> List[Tuple[Hits, Hits]]:
+        if not self.enabled:
+            return retriever.search_batch_scored(
+                queries, topk_laws, topk_precedents, scorer, filters, expand, dense_mode
+            )
+
+        version = retriever.version
+        fkey = filters.key() if filters is not None else ""
+        keys = [
+            self._key(retriever, version, q, scorer, topk_laws, topk_precedents, fkey, expand, dense_mode)
+            for q in queries
+        ]
+        out: List[Optional[Tuple[Hits, Hits]]] = [None] * len(queries)
+        missing: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            entry = self.lru.get(key)
+            if entry is not None:
+                out[i] = entry
+            else:
+                missing.setdefault(key, []).append(i)
+
+        with self._lock:
+            self.hits += len(queries) - sum(len(v) for v in missing.values())
+            self.misses += sum(len(v) for v in missing.values())
+
+        if missing:
+            todo = list(missing)
+            results = retriever.search_batch_scored(
+                [queries[missing[k][0]] for k in todo], topk_laws, topk_precedents, scorer, filters, expand,
+                dense_mode,
+            )
+            for key, res in zip(todo, results):
+                for i in missing[key]:
+                    out[i] = res
+                # Arada sürüm değiştiyse (ekleme/compaction) eski sonucu saklama.
+                if retriever.version == version:
+                    self.lru.set(key, res)
+        return out  # type: ignore[return-value]
+
+    def search(self, retriever: Retriever, query: str, **kw) -> Tuple[List[Doc], List[Doc]]:
+        laws, precs = self.search_scored(retriever, query, **kw)
+        return strip_scores(laws), strip_scores(precs)
+
+    def search_batch(self, retriever: Retriever, queries: List[str], **kw) -> List[Tuple[List[Doc], List[Doc]]]:
+        return [(strip_scores(l), strip_scores(p)) for l, p in self.search_batch_scored(retriever, queries, **kw)]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.lru),
+            "capacity": self.lru.max_entries,
+            "evictions": self.lru.evictions,
+        }
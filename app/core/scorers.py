@@ -0,0 +1,127 @@
+"""
+Retriever için takılabilir skorlayıcılar.
+
+Her skorlayıcı, bir koleksiyonun dokümanlarını sorgudan bağımsız bir ağırlık
+matrisine (doküman x terim, CSR) çevirir; sorgu skoru = sorgu ağırlıkları ·
+doküman ağırlıkları. Böylece aynı posting-list yürüyüşü (topk.posting_scores)
+hem TF-IDF hem BM25 için kullanılır.
+
+Tokenizasyon her iki skorlayıcıda da koleksiyonun TfidfVectorizer'ından gelir
+(aynı analyzer, aynı sözlük).
+"""
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+
+SIM_THRESHOLD = 0.04
+
+
+def term_counts(vec: TfidfVectorizer, texts: List[str]) -> csr_matrix:
+    """Vectorizer'ın sözlüğüyle ham terim frekansları (IDF/normalize uygulanmadan)."""
+    return CountVectorizer.transform(vec, texts).astype(np.float64)
+
+
+class TfidfScorer:
+    """Mevcut davranış: L2-normalize TF-IDF, skor = kosinüs benzerliği."""
+
+    name = "tfidf"
+    threshold = SIM_THRESHOLD
+
+    def fit_transform(self, vec: TfidfVectorizer, texts: List[str], tfidf_matrix=None, counts=None) -> csr_matrix:
+        return tfidf_matrix if tfidf_matrix is not None else vec.transform(texts)
+
+    def transform(self, vec: TfidfVectorizer, texts: List[str], tfidf_matrix=None) -> csr_matrix:
+        return tfidf_matrix if tfidf_matrix is not None else vec.transform(texts)
+
+    def query(self, vec: TfidfVectorizer, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        qv = vec.transform([query])
+        return qv.indices, qv.data
+
+    def query_matrix(self, vec: TfidfVectorizer, queries: List[str]) -> csr_matrix:
+        return vec.transform(queries)
+
+    def state(self) -> Dict[str, Any]:
+        return {}
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {}
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> "TfidfScorer":
+        return cls()
+
+
+class BM25Scorer:
+    """
+    Okapi BM25, vektörize: doküman uzunlukları ve IDF dizileri fit sırasında
+    hesaplanır, her (doküman, terim) ağırlığı önceden çıkarılır. rank_bm25'teki
+    doküman başına Python döngüsü yerine sorgu yalnızca posting listelerini toplar.
+
+    IDF: log(1 + (N - df + 0.5) / (df + 0.5)) — negatif olmayan (Lucene) varyantı.
+    """
+
+    name = "bm25"
+    threshold = 0.0
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.idf: np.ndarray = np.empty(0)
+        self.avgdl: float = 1.0
+
+    def _weights(self, counts: csr_matrix) -> csr_matrix:
+        counts = csr_matrix(counts)
+        dl = np.asarray(counts.sum(axis=1)).ravel()
+        row_of_nnz = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+        tf = counts.data
+        norm = self.k1 * (1.0 - self.b + self.b * dl[row_of_nnz] / self.avgdl)
+        data = self.idf[counts.indices] * tf * (self.k1 + 1.0) / (tf + norm)
+        return csr_matrix((data, counts.indices.copy(), counts.indptr.copy()), shape=counts.shape)
+
+    def fit_transform(self, vec: TfidfVectorizer, texts: List[str], tfidf_matrix=None, counts=None) -> csr_matrix:
+        # counts: paralel indeks kurulumunun ürettiği ham sayımlar (yoksa metinlerden sayılır).
+        counts = term_counts(vec, texts) if counts is None else counts.astype(np.float64)
+        n_docs = counts.shape[0]
+        df = np.bincount(counts.indices, minlength=counts.shape[1])
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        self.avgdl = float(counts.sum() / n_docs) if n_docs else 1.0
+        self.avgdl = self.avgdl or 1.0
+        return self._weights(counts)
+
+    def transform(self, vec: TfidfVectorizer, texts: List[str], tfidf_matrix=None) -> csr_matrix:
+        # Delta segmenti: base koleksiyonun IDF ve avgdl değerleri donuk kalır.
+        return self._weights(term_counts(vec, texts))
+
+    def query(self, vec: TfidfVectorizer, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        qc = term_counts(vec, [query])
+        return qc.indices, qc.data
+
+    def query_matrix(self, vec: TfidfVectorizer, queries: List[str]) -> csr_matrix:
+        return term_counts(vec, queries)
+
+    def state(self) -> Dict[str, Any]:
+        return {"k1": self.k1, "b": self.b, "avgdl": self.avgdl}
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"idf": self.idf}
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> "BM25Scorer":
+        sc = cls(k1=state["k1"], b=state["b"])
+        sc.avgdl = state["avgdl"]
+        sc.idf = np.asarray(arrays["idf"])
+        return sc
+
+
+SCORERS = {
+    TfidfScorer.name: TfidfScorer,
+    BM25Scorer.name: BM25Scorer,
+}
+
+
+def make_scorer(name: str):
+    if name not in SCORERS:
+        raise ValueError(f"Unknown scorer {name!r}; expected one of {tuple(SCORERS)}")
+    return SCORERS[name]()
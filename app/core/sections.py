@@ -0,0 +1,177 @@
+"""
+Gerekçeli karar başlıkları: tek geçişte bulma, biçim düzeltme ve bölüm haritası.
+
+Tüm desenler modül yüklenirken derlenir. Tek bir alternation deseni metni bir kez tarar:
+zorunlu başlıklar (büyük/küçük harf ve İ/I/ı/i farkı, satır kırılması önemsiz),
+ayırıcı çizgiler ve hüküm fıkrası numarası ("1)"). Sonuç parça listesinden bir kez
+birleştirilir. Sonuç (FormattedKarar) başlık konumlarını ve bölümleri (başlık + gövde
+aralıkları) bir kez hesaplanmış olarak taşır; validate_has_sections ve API yanıtı
+(GenerateResponse.sections) metni yeniden taramaz.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+REQUIRED_SECTIONS = [
+    "I. TARAF BEYANLARI",
+    "II. UYUŞMAZLIĞIN HUKUKİ NİTELİĞİ",
+    "III. DELİLLERİN DEĞERLENDİRİLMESİ",
+    "IV. UYGULANAN HUKUK KURALLARI",
+    "V. YARGITAY İÇTİHATLARI",
+    "VI. HUKUKİ DEĞERLENDİRME",
+    "VII. SONUÇ VE HÜKÜM",
+]
+VERDICT_SECTION = REQUIRED_SECTIONS[-1]
+
+SYSTEM_TITLE = "RATIOAI HUKUKİ KARAR DESTEK SİSTEMİ"
+SEPARATOR = "-" * 50
+MISSING_SECTION_TEXT = "(İşbu başlık altında dosya kapsamına göre ayrıca değerlendirme yapılır.)"
+
+Spans = Dict[str, Tuple[int, int]]
+
+
+# Başlık = Roma rakamı + "." + ad. Desen "." ile başlar (re'nin hızlı önek araması);
+# rakam eşleşmeden sonra geriye bakılarak doğrulanır.
+_ROMANS = [sec.split(".", 1)[0] for sec in REQUIRED_SECTIONS]
+_TITLES = [
+    f"(?P<s{i}>" + r"\s+".join(re.escape(w) for w in sec.split(".", 1)[1].split()) + ")"
+    for i, sec in enumerate(REQUIRED_SECTIONS)
+]
+_HEADING_RE = re.compile(r"\.\s+(?:" + "|".join(_TITLES) + ")", re.IGNORECASE)
+_SCAN_RE = re.compile(
+    _HEADING_RE.pattern + r"|\n(?:(?P<sep>-{10,}(?=\n|\Z))|(?P<num>\s*1\)))",
+    re.IGNORECASE,
+)
+_LEADING_SEP_RE = re.compile(r"-{10,}(?=\n|\Z)")
+_I_FOLD = str.maketrans({"İ": "I", "ı": "I"})
+
+
+def _heading_start(text: str, m: "re.Match", i: int) -> int:
+    """Başlığın (Roma rakamı dahil) başlangıcı; rakam uymuyorsa -1."""
+    start = m.start() - len(_ROMANS[i])
+    if start < 0 or text[start : m.start()].translate(_I_FOLD).upper() != _ROMANS[i]:
+        return -1
+    if start > 0 and text[start - 1].isalnum():
+        return -1
+    return start
+
+
+def _header(dava_turu: str) -> str:
+    return f"T.C.\n{SYSTEM_TITLE}\n(Akademik Prototip)\n\nDOSYA TÜRÜ: {dava_turu}\n{SEPARATOR}\n\n"
+
+
+def find_sections(text: str) -> Spans:
+    """Zorunlu başlıkların ilk geçtiği yerler: başlık -> (başlangıç, bitiş)."""
+    spans: Spans = {}
+    for m in _HEADING_RE.finditer(text):
+        i = int(m.lastgroup[1:])
+        start = _heading_start(text, m, i)
+        if start >= 0:
+            spans.setdefault(REQUIRED_SECTIONS[i], (start, m.end()))
+            if len(spans) == len(REQUIRED_SECTIONS):
+                break
+    return spans
+
+
+@dataclass(frozen=True)
+class Section:
+    title: str
+    start: int  # başlığın başı
+    body_start: int  # başlığın sonu = gövdenin başı
+    end: int  # bir sonraki başlığa (ya da metin sonuna) kadar
+    added: bool  # model çıktısında yoktu, post-process ekledi
+
+
+@dataclass
+class FormattedKarar:
+    text: str
+    # Tüm zorunlu başlıklar, son metindeki konumlarıyla
+    spans: Spans
+    # Model çıktısında olmayıp sona boş olarak eklenen başlıklar
+    added: List[str] = field(default_factory=list)
+    # Metindeki sırayla bölümler (spans'tan bir kez türetilir)
+    sections: List[Section] = field(init=False)
+
+    def __post_init__(self) -> None:
+        ordered = sorted(self.spans.items(), key=lambda kv: kv[1][0])
+        ends = [span[0] for _, span in ordered[1:]] + [len(self.text)]
+        self.sections = [
+            Section(title=sec, start=s, body_start=e, end=end, added=sec in self.added)
+            for (sec, (s, e)), end in zip(ordered, ends)
+        ]
+
+    @property
+    def found(self) -> Spans:
+        """Yalnızca model çıktısında bulunan başlıklar."""
+        return {sec: span for sec, span in self.spans.items() if sec not in self.added}
+
+    def body(self, section: Section) -> str:
+        return self.text[section.body_start : section.end].strip()
+
+
+def postprocess_karar(raw: str, dava_turu: str) -> FormattedKarar:
+    """
+    Model çıktısını 'mahkeme kararı' biçimine getirir; varsayım üretmez, sadece biçim düzeltir:
+    üst başlık, başlıkların standart yazımı, ayırıcı çizgiler, eksik başlıklar (sona, boş),
+    hüküm fıkrası numarası.
+    """
+    text = (raw or "").strip()
+    parts: List[str] = []
+    size = 0
+    if SYSTEM_TITLE not in text:
+        parts.append(_header(dava_turu))
+        size = len(parts[0])
+
+    spans: Spans = {}
+    verdict_at: Optional[int] = None  # hüküm başlığından sonraki parça indeksi
+    numbered = False
+    pos = 0
+    lead = _LEADING_SEP_RE.match(text)
+    if lead:
+        parts.append(SEPARATOR)
+        size += len(SEPARATOR)
+        pos = lead.end()
+    for m in _SCAN_RE.finditer(text, pos):
+        kind = m.lastgroup
+        if kind == "num":
+            numbered = numbered or verdict_at is not None
+            continue
+        if kind == "sep":
+            start, out = m.start(), "\n" + SEPARATOR
+        else:
+            start = _heading_start(text, m, int(kind[1:]))
+            if start < pos:
+                continue
+            out = REQUIRED_SECTIONS[int(kind[1:])]
+        before = text[pos:start]
+        parts.append(before)
+        size += len(before)
+        if out not in spans and kind != "sep":
+            spans[out] = (size, size + len(out))
+            if out == VERDICT_SECTION:
+                verdict_at = len(parts) + 1
+        parts.append(out)
+        size += len(out)
+        pos = m.end()
+    parts.append(text[pos:])
+    size += len(parts[-1])
+
+    added = [sec for sec in REQUIRED_SECTIONS if sec not in spans]
+    for sec in added:
+        parts.append("\n\n")
+        size += 2
+        spans[sec] = (size, size + len(sec))
+        parts.append(sec)
+        size += len(sec)
+        if sec == VERDICT_SECTION:
+            verdict_at = len(parts)
+        parts.append(f"\n{MISSING_SECTION_TEXT}\n")
+        size += len(parts[-1])
+
+    if not numbered:
+        # Hüküm fıkrası numarasız: başlığın hemen ardından "1) " ile başlat.
+        parts.insert(verdict_at, "\n1) ")
+        shift = spans[VERDICT_SECTION][1]
+        spans = {sec: (s + 4, e + 4) if s >= shift else (s, e) for sec, (s, e) in spans.items()}
+
+    return FormattedKarar(text="".join(parts).rstrip(), spans=spans, added=added)
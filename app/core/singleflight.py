@@ -0,0 +1,47 @@
+"""
+Single-flight: aynı anahtarla eşzamanlı gelen çağrılar tek bir işi paylaşır.
+
+İlk çağıran işi ayrı bir task olarak başlatır; iş sürerken aynı anahtarla
+gelenler aynı future'ı bekler. İş bitince anahtar silinir (sonuç saklanmaz;
+kalıcı önbellek için response_cache). Bekleyenlerden biri iptal edilirse
+(ör. istemci bağlantıyı kapattı) paylaşılan iş iptal olmaz.
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+def payload_key(payload: Any) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Future[Any]"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _done(self, key: str, fut: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is fut:
+            del self._calls[key]
+        # Tüm bekleyenler iptal edildiyse "exception was never retrieved" uyarısını bastır.
+        if not fut.cancelled():
+            fut.exception()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        fut = self._calls.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(fn())
+            self._calls[key] = fut
+            fut.add_done_callback(lambda f: self._done(key, f))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(fut)
+
+    def stats(self) -> Dict[str, int]:
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls)}
@@ -0,0 +1,186 @@
+"""
+Prompt token bütçesi: retrieval ile build_prompt arasında.
+
+Model bağlamı (num_ctx) = prompt + üretilecek çıktı. Sabit kısım (rol, kurallar, şablon,
+kısa karar, ceza puanları) kesilmez; kalan bütçe kanun, içtihat ve delil pasajlarına
+skora göre dağıtılır:
+
+1) her pasaj, ağırlık sırasıyla, başlık satırı + MIN_PASSAGE_TOKENS alır; sığmayan
+   (en düşük skorlu) pasajlar düşer,
+2) kalan bütçe ağırlıkla orantılı dağıtılır (tam metne ulaşan pasajın artanı diğerlerine),
+3) payını aşan metin, sorgu terimleriyle en çok örtüşen cümleler (özgün sırayla) seçilerek
+   kısaltılır; tek cümle bile sığmazsa kelime sınırında kesilir.
+
+Ağırlık: kanun/içtihat skoru / koleksiyondaki en yüksek skor; deliller 1.0 (kullanıcının
+sunduğu olgular). Token sayısı tokenizer olmadan karakterden tahmin edilir.
+"""
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from .analyzer import turkish_fold
+
+CHARS_PER_TOKEN = 3.0
+MIN_PASSAGE_TOKENS = 64
+# Tahmin hatası için bütçeden ayrılan pay.
+SAFETY_MARGIN = 0.05
+ELLIPSIS = " … "
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+_WORD_RE = re.compile(r"\w{3,}")
+
+
+@dataclass(frozen=True)
+class TokenBudget:
+    num_ctx: int = 8192
+    # Üretilecek gerekçeli karar için ayrılan token (num_ctx içinden)
+    reserve_tokens: int = 2048
+    chars_per_token: float = CHARS_PER_TOKEN
+    min_passage_tokens: int = MIN_PASSAGE_TOKENS
+
+    def estimate(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    @property
+    def prompt_limit(self) -> int:
+        return self.num_ctx - self.reserve_tokens
+
+
+@dataclass
+class Passage:
+    kind: str  # "law" | "precedent" | "evidence"
+    text: str
+    weight: float
+    # Pasajın metin dışındaki kısmı (id, başlık, daire/tarih satırı)
+    overhead: int
+    tokens: int
+
+
+def query_terms(text: str) -> Set[str]:
+    return set(_WORD_RE.findall(turkish_fold(text)))
+
+
+def fit_passage(text: str, max_tokens: int, terms: Set[str], budget: TokenBudget) -> str:
+    """Metni max_tokens'a sığdırır: önce sorguyla örtüşen cümleler, gerekirse kelime sınırında kesme."""
+    if budget.estimate(text) <= max_tokens:
+        return text
+    max_chars = int(max_tokens * budget.chars_per_token)
+    sentences = [s for s in _SENTENCE_RE.split(text.strip()) if s]
+    # İlk cümle genellikle olayın/hükmün özeti: küçük bir öncelik.
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: (-(len(terms & query_terms(sentences[i])) + (0.5 if i == 0 else 0.0)), i),
+    )
+    chosen: List[int] = []
+    used = 0
+    for i in ranked:
+        cost = len(sentences[i]) + (len(ELLIPSIS) if chosen else 0)
+        if used + cost <= max_chars:
+            chosen.append(i)
+            used += cost
+    if chosen:
+        return ELLIPSIS.join(sentences[i] for i in sorted(chosen)) + ELLIPSIS.rstrip()
+    cut = text[: max(0, max_chars - len(ELLIPSIS))]
+    return (cut.rsplit(" ", 1)[0] if " " in cut else cut) + ELLIPSIS.rstrip()
+
+
+def allocate(passages: Sequence[Passage], available: int, min_tokens: int) -> List[Optional[int]]:
+    """Pasaj başına metin token payı; None = pasaj prompt'a girmez."""
+    order = sorted(range(len(passages)), key=lambda i: -passages[i].weight)
+    shares: List[Optional[int]] = [None] * len(passages)
+    remaining = available
+    for i in order:
+        p = passages[i]
+        need = p.overhead + min(p.tokens, min_tokens)
+        if need <= remaining:
+            shares[i] = min(p.tokens, min_tokens)
+            remaining -= need
+
+    # Su doldurma: artan bütçe, tam metne ulaşmamış pasajlara ağırlıkla orantılı.
+    while remaining > 0:
+        open_ = [i for i in order if shares[i] is not None and shares[i] < passages[i].tokens]
+        total_w = sum(max(passages[i].weight, 1e-6) for i in open_)
+        if not open_:
+            break
+        given = 0
+        for i in open_:
+            extra = int(remaining * max(passages[i].weight, 1e-6) / total_w)
+            extra = min(extra, passages[i].tokens - shares[i])
+            shares[i] += extra
+            given += extra
+        if given == 0:
+            # Yuvarlama: kalan birkaç token'ı en ağır açık pasaja ver.
+            i = open_[0]
+            extra = min(remaining, passages[i].tokens - shares[i])
+            shares[i] += extra
+            given = extra
+        remaining -= given
+    return shares
+
+
+def _weights(hits: Sequence[Tuple[Any, float]]) -> List[float]:
+    top = max((s for _, s in hits), default=0.0)
+    return [s / top if top > 0 else 1.0 for _, s in hits]
+
+
+def plan_context(
+    *,
+    budget: TokenBudget,
+    fixed_tokens: int,
+    query: str,
+    laws: Sequence[Tuple[Any, float]],
+    precedents: Sequence[Tuple[Any, float]],
+    evidences: Sequence[Dict[str, str]],
+    law_overhead,
+    prec_overhead,
+) -> Tuple[List[Tuple[Any, str]], List[Tuple[Any, str]], List[Dict[str, str]], Dict[str, Any]]:
+    """
+    (kanunlar, içtihatlar) için [(doküman, prompt metni)], kısaltılmış deliller ve istatistik döner.
+    law_overhead / prec_overhead: dokümanın başlık satırının token sayısı (doküman -> int).
+    """
+    available = int((budget.prompt_limit - fixed_tokens) * (1 - SAFETY_MARGIN))
+    passages: List[Passage] = []
+    for (doc, _), w in zip(laws, _weights(laws)):
+        passages.append(Passage("law", doc.text, w, law_overhead(doc), budget.estimate(doc.text)))
+    for (doc, _), w in zip(precedents, _weights(precedents)):
+        passages.append(Passage("precedent", doc.text, w, prec_overhead(doc), budget.estimate(doc.text)))
+    for ev in evidences:
+        overhead = budget.estimate(f"10) {ev['name']}: ")
+        passages.append(Passage("evidence", ev["content"], 1.0, overhead, budget.estimate(ev["content"])))
+
+    shares = allocate(passages, max(0, available), budget.min_passage_tokens)
+    terms = query_terms(query)
+    texts = [
+        None if share is None else fit_passage(p.text, share, terms, budget) for p, share in zip(passages, shares)
+    ]
+
+    n_laws, n_precs = len(laws), len(precedents)
+    kept_laws = [(laws[i][0], texts[i]) for i in range(n_laws) if texts[i] is not None]
+    kept_precs = [(precedents[i][0], texts[n_laws + i]) for i in range(n_precs) if texts[n_laws + i] is not None]
+    kept_evs = [
+        {"name": ev["name"], "content": texts[n_laws + n_precs + i]}
+        for i, ev in enumerate(evidences)
+        if texts[n_laws + n_precs + i] is not None
+    ]
+
+    def section(kind: str) -> Dict[str, int]:
+        idx = [i for i, p in enumerate(passages) if p.kind == kind]
+        return {
+            "total": len(idx),
+            "kept": sum(shares[i] is not None for i in idx),
+            "trimmed": sum(shares[i] is not None and texts[i] != passages[i].text for i in idx),
+            "tokens": sum(passages[i].overhead + budget.estimate(texts[i]) for i in idx if texts[i] is not None),
+        }
+
+    stats = {
+        "num_ctx": budget.num_ctx,
+        "reserved_output": budget.reserve_tokens,
+        "budget": budget.prompt_limit,
+        "fixed_tokens": fixed_tokens,
+        "context_budget": max(0, available),
+        "laws": section("law"),
+        "precedents": section("precedent"),
+        "evidence": section("evidence"),
+    }
+    return kept_laws, kept_precs, kept_evs, stats
@@ -0,0 +1,114 @@
+"""
+Seyrek skorlama ve top-k seçimi.
+
+TfidfVectorizer satırları L2-normalize olduğundan kosinüs benzerliği nokta
+çarpımına eşittir. Sorgunun terimlerinin posting listeleri (CSC / terim-majör
+form) üzerinden yalnızca en az bir terimi paylaşan dokümanlar skorlanır.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csc_matrix
+
+
+@dataclass
+class InvertedIndex:
+    """Doküman matrisinin terim-majör (CSC) dizileri: indptr[t]..indptr[t+1] = terim t'nin posting listesi."""
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    n_docs: int
+
+    @classmethod
+    def from_matrix(cls, matrix) -> "InvertedIndex":
+        csc = csc_matrix(matrix)
+        csc.sort_indices()
+        return cls(indptr=csc.indptr, indices=csc.indices, data=csc.data, n_docs=matrix.shape[0])
+
+
+def _candidate_scores(
+    inv: InvertedIndex, terms: np.ndarray, weights: np.ndarray, cands: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Seçici filtre: posting'leri yürümek yerine her terimde adayları ikili arama ile bulur."""
+    scores = np.zeros(len(cands))
+    touched = np.zeros(len(cands), dtype=bool)
+    for t, w in zip(terms, weights):
+        s, e = inv.indptr[t], inv.indptr[t + 1]
+        if s == e:
+            continue
+        postings = inv.indices[s:e]
+        pos = np.searchsorted(postings, cands)
+        hit = pos < (e - s)
+        hit[hit] = postings[pos[hit]] == cands[hit]
+        scores[hit] += inv.data[s + pos[hit]] * w
+        touched |= hit
+    return cands[touched].astype(np.int64), scores[touched]
+
+
+def posting_scores(
+    inv: InvertedIndex, terms: np.ndarray, weights: np.ndarray, mask: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorgu terimlerinin posting listelerini yürüyerek (doc_idx, skor) döner.
+    Maliyet korpus boyutuna değil, dokunulan posting sayısına bağlıdır.
+
+    mask (n_docs uzunluğunda bool) verilirse yalnızca adaylar döner. Aday sayısı
+    dokunulacak posting sayısına göre küçükse posting'ler hiç yürünmez, adaylar
+    posting listelerinde aranır; böylece seçici filtreler sorguyu ucuzlatır.
+    """
+    n_postings = sum(int(inv.indptr[t + 1] - inv.indptr[t]) for t in terms)
+    if mask is not None:
+        cands = np.flatnonzero(mask)
+        # ikili arama ~log2(posting) adım; kaba maliyet karşılaştırması
+        if len(cands) * len(terms) * 8 < n_postings:
+            return _candidate_scores(inv, terms, weights, cands)
+
+    rows, vals = [], []
+    for t, w in zip(terms, weights):
+        s, e = inv.indptr[t], inv.indptr[t + 1]
+        if s == e:
+            continue
+        rows.append(inv.indices[s:e])
+        vals.append(inv.data[s:e] * w)
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    rows_all = np.concatenate(rows)
+    vals_all = np.concatenate(vals)
+    if len(rows_all) * 8 >= inv.n_docs:
+        # Posting'ler korpusun önemli kısmına dokunuyorsa sıralama yerine yoğun toplama daha ucuz.
+        dense = np.bincount(rows_all, weights=vals_all, minlength=inv.n_docs)
+        touched = np.bincount(rows_all, minlength=inv.n_docs) > 0
+        if mask is not None:
+            touched &= mask
+        docs = np.flatnonzero(touched)
+        return docs.astype(np.int64), dense[docs]
+    docs, inverse = np.unique(rows_all, return_inverse=True)
+    scores = np.bincount(inverse, weights=vals_all, minlength=len(docs))
+    if mask is not None:
+        keep = mask[docs]
+        docs, scores = docs[keep], scores[keep]
+    return docs.astype(np.int64), scores
+
+
+def select_topk(docs: np.ndarray, scores: np.ndarray, k: int, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    `scores > threshold` olan adaylardan skorca en büyük k tanesi, azalan skor sırasıyla.
+    Tam sıralama yerine kısmi bölümleme kullanır. Eşit skorlarda küçük indeks önce gelir;
+    eski `argsort()[::-1]` eşitlerde kararsızdı (sıra diziye göre değişiyordu). Inverted,
+    exhaustive ve batch yolları aynı seçimi kullanır, eşitlik sırası modlar arasında aynıdır.
+    """
+    keep = scores > threshold
+    docs, scores = docs[keep], scores[keep]
+    if k <= 0 or len(docs) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    if len(docs) > k:
+        # k. en büyük skora eşit olanları da aday bırak ki eşitlikte sıra birebir korunsun.
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        keep = scores >= kth
+        docs, scores = docs[keep], scores[keep]
+
+    order = np.lexsort((docs, -scores))[:k]
+    return docs[order], scores[order]
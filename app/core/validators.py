@@ -1,22 +1,16 @@
-from typing import List
+from typing import List, Optional
 
+from .sections import REQUIRED_SECTIONS, Spans, find_sections
 
-def validate_has_sections(text: str) -> List[str]:
-    required = [
-        "Tarafların iddia ve savunmaları",
-        "Uyuşmazlığın hukuki niteliği",
-        "Delillerin değerlendirilmesi",
-        "Uygulanan kanun maddeleri",
-        "Yargıtay içtihatlarına atıf",
-        "Hukuki değerlendirme",
-        "Sonuç ve hüküm",
-    ]
-    warnings = []
-    low = text.lower()
-    for h in required:
-        if h.lower() not in low:
-            warnings.append(f"Eksik başlık: {h}")
-    return warnings
+
+def validate_has_sections(text: str, spans: Optional[Spans] = None) -> List[str]:
+    """
+    Eksik zorunlu başlıklar. spans verilirse (ör. postprocess_karar(...).found: model
+    çıktısında bulunanlar) metin yeniden taranmaz.
+    """
+    if spans is None:
+        spans = find_sections(text)
+    return [f"Eksik başlık: {sec}" for sec in REQUIRED_SECTIONS if sec not in spans]
 
 
 def warn_demo_sources(used_laws, used_precedents) -> List[str]:
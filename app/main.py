@@ -1,17 +1,41 @@
 from pathlib import Path
+import hmac
 import os
 import json
-import urllib.request
-import urllib.error
-from typing import List
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 
-from app.schemas import GenerateRequest, GenerateResponse, RetrievedDoc
-from app.core.retrieval import Retriever, load_jsonl
-from app.core.prompting import build_prompt, format_gerekceli_karar
+from app.schemas import (
+    DecisionSection,
+    GenerateBatchRequest,
+    GenerateRequest,
+    GenerateResponse,
+    JobStatus,
+    PrecedentIn,
+    RenderRequest,
+    RetrievedDoc,
+)
+from app.core.analyzer import cache_stats as analyzer_cache_stats
+from app.core.dense import DenseConfig
+from app.core.meta_index import MetaFilter
+from app.core.retrieval import Retriever, load_jsonl, load_jsonl_from
+from app.core.ingest import DuplicateIdError, IndexManager
+from app.core.jobs import JobError, JobRunner, JobStore, parse_limits
+from app.core.llm_client import LLMBusyError, OllamaClient
+from app.core.llm_router import LLMRouter
+from app.core.response_cache import ResponseCache, cache_key
+from app.core.retrieval_cache import RetrievalCache
+from app.core.singleflight import SingleFlight, payload_key
+from app.core.token_budget import TokenBudget
+from app.core.prompting import build_budgeted_prompt, prompt_prefix
+from app.core.render import DEFAULT_TITLE, RENDER_FORMATS, RenderCache, etag_matches, iter_chunks
+from app.core.sections import FormattedKarar, postprocess_karar
 from app.core.scoring import score_criminal
 from app.core.validators import validate_has_sections, warn_demo_sources
 
@@ -23,11 +47,44 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 LAW_PATH = DATA_DIR / "laws" / "laws.jsonl"
 PREC_PATH = DATA_DIR / "precedents" / "precedents.jsonl"
+INDEX_DIR = Path(os.getenv("RATIOAI_INDEX_DIR", str(DATA_DIR / "index")))
+# "inverted" (varsayılan) veya "exhaustive" (eski dense cosine yolu)
+SEARCH_MODE = os.getenv("RETRIEVAL_SEARCH_MODE", "inverted")
+# Açık skorlayıcılar (ilki varsayılan). İstek bazında GenerateRequest.scorer ile seçilir.
+RETRIEVAL_SCORERS = tuple(
+    s.strip() for s in os.getenv("RETRIEVAL_SCORERS", "tfidf,bm25").split(",") if s.strip()
+)
+# Bellekte fit / compaction için süreç sayısı (1 = tek süreç, eski davranış).
+INDEX_BUILD_WORKERS = int(os.getenv("INDEX_BUILD_WORKERS", "1"))
+# "turkish_stem" (varsayılan), "turkish" veya "default" (sklearn). Kayıtlı indeks kendi analizörünü kullanır.
+RETRIEVAL_ANALYZER = os.getenv("RETRIEVAL_ANALYZER", "turkish_stem")
+# Kanun <-> içtihat atıf grafıyla genişletme (istek bazında GenerateRequest.expand_citations ile ezilir).
+CITATION_EXPANSION = os.getenv("CITATION_EXPANSION", "1") == "1"
+# Yoğun (embedding) içtihat araması: "" (kapalı), "lsa" (TF-IDF üzerinde SVD, ek model yok)
+# veya "st" (DENSE_MODEL'deki yerel sentence-transformers modeli). GPU / ağ gerekmez.
+DENSE_BACKEND = os.getenv("DENSE_BACKEND", "")
+DENSE_CONFIG = (
+    DenseConfig(
+        backend=DENSE_BACKEND,
+        model=os.getenv("DENSE_MODEL") or None,
+        vectors=os.getenv("DENSE_VECTORS") or None,
+        dim=int(os.getenv("DENSE_DIM", "256")),
+        quantize=os.getenv("DENSE_QUANT", "int8"),
+        nlist=int(os.getenv("DENSE_NLIST", "0")),
+        nprobe=int(os.getenv("DENSE_NPROBE", "8")),
+        alpha=float(os.getenv("HYBRID_ALPHA", "0.5")),
+    )
+    if DENSE_BACKEND
+    else None
+)
+# İstek dense_mode vermezse kullanılır: "off", "hybrid" (sözcüksel + yoğun) veya "dense".
+DENSE_MODE = os.getenv("DENSE_MODE", "hybrid" if DENSE_BACKEND else "off")
 
 # Render / prod ortamında dosyalar yoksa uygulama açılır ama generate çalışmaz.
 # Bu yüzden güvenli şekilde yükleyelim.
 law_docs = []
 prec_docs = []
+prec_offset = 0
 
 try:
     if LAW_PATH.exists():
@@ -36,65 +93,187 @@ try:
         print(f"[WARN] LAW_PATH not found: {LAW_PATH}")
 
     if PREC_PATH.exists():
-        prec_docs = load_jsonl(PREC_PATH, kind="precedent")
+        prec_docs, prec_offset = load_jsonl_from(PREC_PATH, kind="precedent")
     else:
         print(f"[WARN] PREC_PATH not found: {PREC_PATH}")
 except Exception as e:
     print(f"[WARN] Failed loading data files: {e}")
 
-retriever = Retriever(law_docs, prec_docs)
+
+def build_retriever() -> Retriever:
+    # tools/build_index.py ile üretilmiş indeks varsa mmap ile aç (refit yok).
+    # Yoksa veya korpusla uyuşmuyorsa eski davranış: bellekte fit et.
+    if (INDEX_DIR / "manifest.json").exists():
+        try:
+            r = Retriever.from_index(
+                INDEX_DIR,
+                law_docs,
+                prec_docs,
+                search_mode=SEARCH_MODE,
+                scorers=RETRIEVAL_SCORERS,
+                build_workers=INDEX_BUILD_WORKERS,
+                analyzer=RETRIEVAL_ANALYZER,
+                dense=DENSE_CONFIG,
+            )
+            if r.analyzer != RETRIEVAL_ANALYZER:
+                print(
+                    f"[WARN] Index at {INDEX_DIR} uses analyzer {r.analyzer!r} "
+                    f"(RETRIEVAL_ANALYZER={RETRIEVAL_ANALYZER!r}); rebuild with tools/build_index.py to switch."
+                )
+            return r
+        except Exception as e:
+            print(f"[WARN] Failed opening index at {INDEX_DIR}, refitting in memory: {e}")
+    return Retriever(
+        law_docs,
+        prec_docs,
+        search_mode=SEARCH_MODE,
+        scorers=RETRIEVAL_SCORERS,
+        build_workers=INDEX_BUILD_WORKERS,
+        analyzer=RETRIEVAL_ANALYZER,
+        dense=DENSE_CONFIG,
+    )
+
+
+# Yeni içtihatlar precedents.jsonl'e eklenir; her worker dosyayı takip edip
+# delta segmentine alır, compaction periyodik olarak tam refit yapar.
+INGEST_POLL_S = float(os.getenv("INGEST_POLL_S", "30"))
+COMPACT_INTERVAL_S = float(os.getenv("COMPACT_INTERVAL_S", "21600"))
+COMPACT_MIN_DELTA = int(os.getenv("COMPACT_MIN_DELTA", "1"))
+# /precedents ve /admin/compact için X-Admin-Token başlığında beklenen anahtar; boşsa bu uçlar kapalıdır.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+index_manager = IndexManager(
+    build_retriever(),
+    law_docs,
+    PREC_PATH,
+    prec_offset,
+    index_dir=INDEX_DIR if (INDEX_DIR / "manifest.json").exists() else None,
+)
+
+
+@app.on_event("startup")
+def start_index_maintenance():
+    index_manager.start(INGEST_POLL_S, COMPACT_INTERVAL_S, COMPACT_MIN_DELTA)
+
+
+@app.on_event("shutdown")
+async def stop_background():
+    index_manager.stop()
+    await job_runner.stop()
+    await llm_client.aclose()
 
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://127.0.0.1:11434")
+# Birden çok LLM sunucusu: virgülle ayrılmış liste (yoksa OLLAMA_URL)
+OLLAMA_URLS = [u.strip() for u in os.getenv("OLLAMA_URLS", OLLAMA_URL).split(",") if u.strip()]
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen2.5:7b-instruct")
 
 # ✅ Mock modu (Render'da LLM yoksa bile /generate çalışsın)
 USE_MOCK_LLM = os.getenv("USE_MOCK_LLM", "0") == "1"
 
 
-def llm_generate(prompt: str) -> str:
+LLM_NUM_CTX = int(os.getenv("LLM_NUM_CTX", "8192"))
+LLM_OPTIONS = {
+    "temperature": 0.2,
+    "top_p": 0.9,
+    "num_ctx": LLM_NUM_CTX,
+}
+
+# Prompt, num_ctx - PROMPT_RESERVE_TOKENS'a sığdırılır (kalan kısım üretilecek karar için).
+# Token sayısı karakterden tahmin edilir; Türkçe metinde ~3 karakter/token.
+PROMPT_BUDGET = TokenBudget(
+    num_ctx=LLM_NUM_CTX,
+    reserve_tokens=int(os.getenv("PROMPT_RESERVE_TOKENS", "2048")),
+    chars_per_token=float(os.getenv("PROMPT_CHARS_PER_TOKEN", "3.0")),
+)
+
+# Sabit prompt öneki (rol/kurallar/şablon) için KV-cache yeniden kullanımı: off | keep_alive | context
+# (bkz. llm_client). keep_alive: modelin bellekte kalma süresi (Ollama biçimi, ör. "30m").
+LLM_PREFIX_CACHE = os.getenv("LLM_PREFIX_CACHE", "keep_alive")
+LLM_KEEP_ALIVE = os.getenv("LLM_KEEP_ALIVE", "30m")
+
+# Sunucu başına havuzlu async istemci (bekleyen üretimler thread tutmaz); LLM_MAX_CONCURRENCY ve
+# LLM_MAX_QUEUE sunucu başınadır. Yönlendirici en az yüklü sağlıklı sunucuyu seçer, hatada diğerine
+# aktarır, LLM_HEDGE_AFTER_S (0 = kapalı) içinde yanıt gelmezse isteği ikinci sunucuya da gönderir.
+llm_client = LLMRouter(
+    [
+        OllamaClient(
+            url,
+            OLLAMA_MODEL,
+            options=LLM_OPTIONS,
+            timeout_s=float(os.getenv("LLM_TIMEOUT_S", "180")),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("LLM_MAX_QUEUE", "256")),
+            prefix_cache=LLM_PREFIX_CACHE,
+            keep_alive=LLM_KEEP_ALIVE or None,
+        )
+        for url in OLLAMA_URLS
+    ],
+    hedge_after_s=float(os.getenv("LLM_HEDGE_AFTER_S", "0")),
+    failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "3")),
+    cooldown_s=float(os.getenv("LLM_BREAKER_COOLDOWN_S", "10")),
+    max_cooldown_s=float(os.getenv("LLM_BREAKER_MAX_COOLDOWN_S", "120")),
+    health_interval_s=float(os.getenv("LLM_HEALTH_INTERVAL_S", "15")) if not USE_MOCK_LLM else 0,
+)
+
+
+@app.on_event("startup")
+async def start_llm_health_checks():
+    llm_client.start()
+
+
+# İçerik adresli yanıt önbelleği: anahtar = hash(prompt, model, options).
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB", "")
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "512")),
+    ttl_s=float(os.getenv("RESPONSE_CACHE_TTL_S", "86400")),
+    db_path=Path(RESPONSE_CACHE_DB) if RESPONSE_CACHE_DB else None,
+    db_max_bytes=int(float(os.getenv("RESPONSE_CACHE_DB_MAX_MB", "256")) * 1024 * 1024),
+)
+
+
+# Retrieval sonuç önbelleği: Retriever.version değişince (ekleme/compaction) boşaltılır.
+retrieval_cache = RetrievalCache(max_entries=int(os.getenv("RETRIEVAL_CACHE_SIZE", "2048")))
+
+
+# Eşzamanlı özdeş istekler tek üretimi paylaşır (istek düzeyi: /generate, prompt düzeyi: LLM çağrısı).
+generate_flights = SingleFlight()
+llm_flights = SingleFlight()
+
+
+# /render/{format}: üretilen PDF/DOCX içerik özetiyle önbellekte; font süreç başına bir kez kaydedilir.
+render_cache = RenderCache(
+    max_entries=int(os.getenv("RENDER_CACHE_SIZE", "64")),
+    max_bytes=int(float(os.getenv("RENDER_CACHE_MAX_MB", "64")) * 1024 * 1024),
+    font_path=os.getenv("RENDER_FONT_PATH", "") or None,
+)
+render_flights = SingleFlight()
+
+
+def llm_cache_key(prompt: str) -> str:
+    # context modunda istek raw gider (şablonsuz); yanıtlar diğer modlarla paylaşılmaz.
+    options = {**LLM_OPTIONS, "raw_prefix": True} if LLM_PREFIX_CACHE == "context" else LLM_OPTIONS
+    return cache_key(prompt, OLLAMA_MODEL, options)
+
+
+async def llm_generate(prompt: str, reject_when_full: bool = True, prefix: Optional[str] = None) -> str:
     """
-    Ollama /api/generate çağrısı.
-    Render'da localhost ollama yoksa bu çağrı başarısız olur.
+    Ollama /api/generate çağrısı (önbellekli).
+    Render'da localhost ollama yoksa bu çağrı başarısız olur (RuntimeError).
+    Kuyruk doluysa LLMBusyError.
     """
-    url = f"{OLLAMA_URL.rstrip('/')}/api/generate"
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": prompt,
-        "stream": False,
-        "options": {
-            "temperature": 0.2,
-            "top_p": 0.9,
-            "num_ctx": 8192,
-        },
-    }
+    key = llm_cache_key(prompt)
+    if response_cache.enabled:
+        cached = await run_in_threadpool(response_cache.get, key)
+        if cached is not None:
+            return cached
 
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
+    async def call() -> str:
+        out = await llm_client.generate(prompt, reject_when_full=reject_when_full, prefix=prefix)
+        if response_cache.enabled:
+            await run_in_threadpool(response_cache.set, key, out)
+        return out
 
-    try:
-        with urllib.request.urlopen(req, timeout=180) as resp:
-            body = resp.read().decode("utf-8", errors="ignore")
-            obj = json.loads(body)
-            return (obj.get("response") or "").strip()
-
-    except urllib.error.HTTPError as e:
-        detail = e.read().decode("utf-8", errors="ignore")
-        raise RuntimeError(f"Ollama HTTPError: {e.code} {e.reason} | {detail}")
-
-    except urllib.error.URLError as e:
-        # Ollama'ya erişememe (en sık Render'da olur)
-        raise RuntimeError(
-            f"Ollama URL error: {e}. OLLAMA_URL={OLLAMA_URL}. "
-            "Render'da local ollama çalışmaz; dış erişilebilir bir Ollama endpoint'i vermelisin."
-        )
-
-    except Exception as e:
-        raise RuntimeError(f"Ollama request failed: {e}")
+    return await llm_flights.do(key, call)
 
 
 def to_schema_docs(docs) -> List[RetrievedDoc]:
@@ -106,7 +285,7 @@ def mock_generate_decision(
     laws,
     precedents,
     criminal_scoring,
-) -> str:
+) -> FormattedKarar:
     """
     LLM yokken demo için stabil "gerekçeli karar" üretir.
     Retrieval sonuçlarını (ilk 5) ve ceza skorunu (varsa) raporlar.
@@ -124,28 +303,33 @@ def mock_generate_decision(
 MAHKEMESİ: RatioAI Sanal Mahkeme (DEMO)
 DOSYA TÜRÜ: {req.dava_turu}
 
+I. TARAF BEYANLARI
 OLAY / TALEP:
 {req.kisa_karar}
 
-DELİLLER:
-{evid_text}
-
-HUKUKİ DEĞERLENDİRME:
+II. UYUŞMAZLIĞIN HUKUKİ NİTELİĞİ
 Bu karar demo (mock) modunda oluşturulmuştur. Sistem, olay anlatımı ve delillere göre
 ilgili mevzuat ve emsal dokümanları eşleştirir ve gerekçeli karar taslağı üretir.
 
+III. DELİLLERİN DEĞERLENDİRİLMESİ
+{evid_text}
+
+IV. UYGULANAN HUKUK KURALLARI
 KULLANILAN MEVZUAT (İlk 5):
 {law_titles}
 
+V. YARGITAY İÇTİHATLARI
 KULLANILAN EMSALLER (İlk 5):
 {prec_titles}
-{score_text}
 
-HÜKÜM (DEMO):
-Tarafların beyanları ve dosya kapsamı birlikte değerlendirilmiş olup, bu metin yalnızca
+VI. HUKUKİ DEĞERLENDİRME
+Demo modunda hukuki değerlendirme yapılmamıştır.{score_text}
+
+VII. SONUÇ VE HÜKÜM (DEMO)
+1) Tarafların beyanları ve dosya kapsamı birlikte değerlendirilmiş olup, bu metin yalnızca
 sistemin işleyişini göstermek amacıyla üretilmiştir; nihai yargısal karar yerine geçmez.
 """
-    return format_gerekceli_karar(text.strip(), req.dava_turu)
+    return postprocess_karar(text, req.dava_turu)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -164,13 +348,55 @@ def home():
 
 @app.get("/healthz")
 def healthz():
-    return {"ok": True, "version": "0.2.0", "mock_mode": USE_MOCK_LLM}
+    return {
+        "ok": True,
+        "version": "0.2.0",
+        "mock_mode": USE_MOCK_LLM,
+        "precedents": len(index_manager.retriever.prec_docs),
+        "precedent_delta": index_manager.retriever.delta_size,
+        "llm": llm_client.stats(),
+        "response_cache": response_cache.stats(),
+        "retrieval_cache": retrieval_cache.stats(),
+        "citation_graph": index_manager.retriever.citation_stats(),
+        "dense": index_manager.retriever.dense_stats(),
+        "analyzer": {"name": index_manager.retriever.analyzer, "token_cache": analyzer_cache_stats()},
+        "render_cache": render_cache.stats(),
+        "jobs": job_runner.stats(),
+        "coalescing": {
+            "generate": generate_flights.stats(),
+            "llm": llm_flights.stats(),
+            "render": render_flights.stats(),
+        },
+    }
 
 
-@app.post("/generate", response_model=GenerateResponse)
-def generate(req: GenerateRequest):
+def require_admin(token: Optional[str]) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Yönetim uçları kapalı (ADMIN_TOKEN tanımlı değil).")
+    if not token or not hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Geçersiz yönetici anahtarı (X-Admin-Token).")
+
+
+@app.post("/precedents")
+def ingest_precedents(items: List[PrecedentIn], x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    try:
+        added = index_manager.append([it.model_dump(exclude_none=True) for it in items])
+    except DuplicateIdError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "ids": e.ids})
+    return {"added": added, "precedent_delta": index_manager.retriever.delta_size}
+
+
+@app.post("/admin/compact")
+def compact_index(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    compacted = index_manager.compact()
+    return {"compacted": compacted, "precedents": len(index_manager.retriever.prec_docs)}
+
+
+def ensure_data_loaded(retriever: Retriever) -> None:
     # Veri dosyaları yüklenmemişse anlamlı hata
-    if not law_docs or not prec_docs:
+    if not law_docs or not retriever.prec_docs:
         raise HTTPException(
             status_code=500,
             detail=(
@@ -179,56 +405,443 @@ def generate(req: GenerateRequest):
             ),
         )
 
+
+def check_scorer(req: GenerateRequest, retriever: Retriever) -> None:
+    if req.scorer is not None and req.scorer not in retriever.scorer_names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Scorer '{req.scorer}' etkin değil. Etkin skorlayıcılar: {list(retriever.scorer_names)}",
+        )
+
+
+def build_query(req: GenerateRequest) -> str:
     ev_text = ""
     if req.deliller:
         ev_text = "\n".join([f"{e.name}: {e.content}" for e in req.deliller])
+    return f"{req.kisa_karar}\n{ev_text}".strip()
+
+
+def precedent_filter(req: GenerateRequest) -> Optional[MetaFilter]:
+    f = req.filters
+    if f is None:
+        return None
+    return MetaFilter(
+        chambers=f.chambers,
+        date_from=f.date_from.isoformat() if f.date_from else None,
+        date_to=f.date_to.isoformat() if f.date_to else None,
+        tags=f.tags,
+    )
 
-    query = f"{req.kisa_karar}\n{ev_text}".strip()
-    laws, precedents = retriever.search(query, topk_laws=10, topk_precedents=10)
 
-    criminal_scoring = None
-    if req.dava_turu == "CEZA":
-        if req.ceza_puanlari is None:
-            raise HTTPException(
-                status_code=400,
-                detail="CEZA davalarında ceza_puanlari zorunlu (0-10 arası).",
-            )
-        criminal_scoring = score_criminal(
-            kast_taksir=req.ceza_puanlari.kast_taksir,
-            gecmis=req.ceza_puanlari.gecmis,
-            islenis_sekli=req.ceza_puanlari.islenis_sekli,
-            magdur_etki=req.ceza_puanlari.magdur_etki,
-            toplumsal_zarar=req.ceza_puanlari.toplumsal_zarar,
+def dense_mode_for(req: GenerateRequest, retriever: Retriever) -> str:
+    mode = req.dense_mode or DENSE_MODE
+    if mode != "off" and retriever.dense_stats() is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"dense_mode '{mode}' için yoğun indeks etkin değil (DENSE_BACKEND ayarlanmamış).",
         )
+    return mode
+
+
+def expand_citations(req: GenerateRequest) -> bool:
+    return CITATION_EXPANSION if req.expand_citations is None else req.expand_citations
+
 
-    prompt = build_prompt(
+def criminal_scoring_for(req: GenerateRequest):
+    if req.dava_turu != "CEZA":
+        return None
+    if req.ceza_puanlari is None:
+        raise HTTPException(
+            status_code=400,
+            detail="CEZA davalarında ceza_puanlari zorunlu (0-10 arası).",
+        )
+    return score_criminal(
+        kast_taksir=req.ceza_puanlari.kast_taksir,
+        gecmis=req.ceza_puanlari.gecmis,
+        islenis_sekli=req.ceza_puanlari.islenis_sekli,
+        magdur_etki=req.ceza_puanlari.magdur_etki,
+        toplumsal_zarar=req.ceza_puanlari.toplumsal_zarar,
+    )
+
+
+def make_prompt(req: GenerateRequest, laws, precedents, criminal_scoring):
+    """laws / precedents: skorlu isabetler. (prompt, prompt'a giren kanunlar, içtihatlar, istatistik) döner."""
+    return build_budgeted_prompt(
         kisa_karar=req.kisa_karar,
         dava_turu=req.dava_turu,
         evidences=[e.model_dump() for e in (req.deliller or [])] or None,
         laws=laws,
         precedents=precedents,
         criminal_scoring=criminal_scoring,
+        budget=PROMPT_BUDGET,
+        query=build_query(req),
     )
 
+
+def section_map(decision: FormattedKarar) -> List[DecisionSection]:
+    return [
+        DecisionSection(title=s.title, start=s.start, body_start=s.body_start, end=s.end, added=s.added)
+        for s in decision.sections
+    ]
+
+
+def decision_warnings(decision: FormattedKarar, laws, precedents, llm_error: Optional[str] = None) -> List[str]:
+    warnings: List[str] = []
+    if llm_error:
+        warnings.append(f"LLM'e ulaşılamadı; karar demo (mock) modunda üretildi. ({llm_error})")
+    warnings += validate_has_sections(decision.text, decision.found)
+    warnings += warn_demo_sources(laws, precedents)
+    return warnings
+
+
+async def generate_decision(
+    req: GenerateRequest,
+    laws,
+    precedents,
+    criminal_scoring,
+    reject_when_full: bool = True,
+) -> GenerateResponse:
+    """Retrieval sonrası (skorlu isabetler): bütçeli prompt -> LLM (veya mock) -> biçim + uyarılar."""
+    prompt, laws, precedents, prompt_stats = make_prompt(req, laws, precedents, criminal_scoring)
+
+    llm_error: Optional[str] = None
     # ✅ Mock mode açık ise direkt demo üret
     if USE_MOCK_LLM:
-        karar = mock_generate_decision(req, laws, precedents, criminal_scoring)
+        decision = mock_generate_decision(req, laws, precedents, criminal_scoring)
     else:
         # ✅ Mock mode kapalı ama LLM çökerse otomatik demo moda düş
         try:
-            karar = llm_generate(prompt)
-            karar = format_gerekceli_karar(karar, req.dava_turu)
-        except RuntimeError:
-            karar = mock_generate_decision(req, laws, precedents, criminal_scoring)
-
-    warnings: List[str] = []
-    warnings += validate_has_sections(karar)
-    warnings += warn_demo_sources(laws, precedents)
+            raw = await llm_generate(prompt, reject_when_full=reject_when_full, prefix=prompt_prefix(req.dava_turu))
+            decision = postprocess_karar(raw, req.dava_turu)
+        except LLMBusyError as e:
+            raise HTTPException(status_code=503, detail=f"LLM meşgul, lütfen tekrar deneyin. ({e})")
+        except RuntimeError as e:
+            print(f"[WARN] LLM başarısız, mock karar üretiliyor: {e}")
+            llm_error = str(e)
+            decision = mock_generate_decision(req, laws, precedents, criminal_scoring)
 
     return GenerateResponse(
-        gerekceli_karar=karar,
+        gerekceli_karar=decision.text,
         used_laws=to_schema_docs(laws),
         used_precedents=to_schema_docs(precedents),
         criminal_scoring=criminal_scoring,
-        warnings=warnings,
-    )
\ No newline at end of file
+        warnings=decision_warnings(decision, laws, precedents, llm_error),
+        prompt_stats=prompt_stats,
+        sections=section_map(decision),
+    )
+
+
+@app.post("/generate", response_model=GenerateResponse)
+async def generate(req: GenerateRequest):
+    return await generate_response(req)
+
+
+async def generate_response(req: GenerateRequest, reject_when_full: bool = True) -> GenerateResponse:
+    retriever = index_manager.retriever
+    ensure_data_loaded(retriever)
+    check_scorer(req, retriever)
+    dense_mode = dense_mode_for(req, retriever)
+    criminal_scoring = criminal_scoring_for(req)
+
+    async def run() -> GenerateResponse:
+        query = build_query(req)
+        # Retrieval CPU-bound: event loop'u bloklamasın.
+        laws, precedents = await run_in_threadpool(
+            retrieval_cache.search_scored,
+            retriever,
+            query,
+            topk_laws=10,
+            topk_precedents=10,
+            scorer=req.scorer,
+            filters=precedent_filter(req),
+            expand=expand_citations(req),
+            dense_mode=dense_mode,
+        )
+        return await generate_decision(req, laws, precedents, criminal_scoring, reject_when_full=reject_when_full)
+
+    # Aynı kanonik istek + aynı korpus sürümü -> tek retrieval + tek LLM çağrısı.
+    key = payload_key({"req": req.model_dump(mode="json"), "version": retriever.version})
+    return await generate_flights.do(key, run)
+
+
+def sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/generate/stream")
+async def generate_stream(req: GenerateRequest):
+    """
+    SSE akışı:
+      event: sources -> kullanılan kanun/içtihatlar (retrieval biter bitmez)
+      event: token   -> Ollama'dan gelen her parça
+      event: final   -> biçimlendirilmiş gerekçeli karar + uyarılar + bölüm haritası
+      event: error   -> akış sırasında hata
+    """
+    retriever = index_manager.retriever
+    ensure_data_loaded(retriever)
+    check_scorer(req, retriever)
+    dense_mode = dense_mode_for(req, retriever)
+    criminal_scoring = criminal_scoring_for(req)
+
+    query = build_query(req)
+    laws, precedents = await run_in_threadpool(
+        retrieval_cache.search_scored,
+        retriever,
+        query,
+        topk_laws=10,
+        topk_precedents=10,
+        scorer=req.scorer,
+        filters=precedent_filter(req),
+        expand=expand_citations(req),
+        dense_mode=dense_mode,
+    )
+    prompt, laws, precedents, prompt_stats = make_prompt(req, laws, precedents, criminal_scoring)
+
+    async def events():
+        llm_error: Optional[str] = None
+        yield sse(
+            "sources",
+            {
+                "used_laws": [d.model_dump() for d in to_schema_docs(laws)],
+                "used_precedents": [d.model_dump() for d in to_schema_docs(precedents)],
+                "criminal_scoring": criminal_scoring,
+                "prompt_stats": prompt_stats,
+            },
+        )
+
+        if USE_MOCK_LLM:
+            decision = mock_generate_decision(req, laws, precedents, criminal_scoring)
+            yield sse("token", {"text": decision.text})
+        else:
+            parts: List[str] = []
+            key = llm_cache_key(prompt)
+            cached = await run_in_threadpool(response_cache.get, key) if response_cache.enabled else None
+            try:
+                if cached is not None:
+                    parts.append(cached)
+                    yield sse("token", {"text": cached})
+                else:
+                    async for tok in llm_client.generate_stream(prompt, prefix=prompt_prefix(req.dava_turu)):
+                        parts.append(tok)
+                        yield sse("token", {"text": tok})
+                    if response_cache.enabled:
+                        await run_in_threadpool(response_cache.set, key, "".join(parts).strip())
+                decision = postprocess_karar("".join(parts), req.dava_turu)
+            except LLMBusyError as e:
+                yield sse("error", {"status_code": 503, "detail": f"LLM meşgul, lütfen tekrar deneyin. ({e})"})
+                return
+            except RuntimeError as e:
+                if parts:
+                    # Token gönderilmeye başlandıysa mock'a düşmek metni karıştırır; hatayı bildir.
+                    yield sse("error", {"status_code": 502, "detail": str(e)})
+                    return
+                print(f"[WARN] LLM başarısız, mock karar üretiliyor: {e}")
+                llm_error = str(e)
+                decision = mock_generate_decision(req, laws, precedents, criminal_scoring)
+                yield sse("token", {"text": decision.text})
+
+        yield sse(
+            "final",
+            {
+                "gerekceli_karar": decision.text,
+                "warnings": decision_warnings(decision, laws, precedents, llm_error),
+                "sections": [s.model_dump() for s in section_map(decision)],
+            },
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Toplu üretim: tüm sorgular tek transform + tek matris çarpımıyla aranır,
+# LLM çağrıları sınırlı eşzamanlılıkla yürütülür, sonuçlar giriş sırasıyla NDJSON akar.
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+
+
+def _batch_error(index: int, e: HTTPException) -> str:
+    return json.dumps(
+        {"index": index, "ok": False, "error": {"status_code": e.status_code, "detail": e.detail}},
+        ensure_ascii=False,
+    ) + "\n"
+
+
+@app.post("/generate_batch")
+async def generate_batch(batch: GenerateBatchRequest):
+    retriever = index_manager.retriever
+    ensure_data_loaded(retriever)
+    items = batch.items
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"En fazla {BATCH_MAX_ITEMS} istek gönderilebilir.")
+
+    # Doğrulama hataları tüm batch'i düşürmez; ilgili satır hata olarak döner.
+    errors: Dict[int, HTTPException] = {}
+    scorings: Dict[int, Any] = {}
+    # Aynı skorlayıcı + meta filtre + genişletme + yoğun mod ayarını kullanan istekler birlikte aranır.
+    groups: Dict[Tuple[str, str, bool, str], List[int]] = {}
+    filters: Dict[Tuple[str, str, bool, str], Optional[MetaFilter]] = {}
+    for i, req in enumerate(items):
+        try:
+            check_scorer(req, retriever)
+            dense_mode = dense_mode_for(req, retriever)
+            scorings[i] = criminal_scoring_for(req)
+        except HTTPException as e:
+            errors[i] = e
+            continue
+        f = precedent_filter(req)
+        key = (
+            req.scorer or retriever.default_scorer,
+            f.key() if f is not None else "",
+            expand_citations(req),
+            dense_mode,
+        )
+        groups.setdefault(key, []).append(i)
+        filters[key] = f
+
+    hits: Dict[int, Any] = {}
+    for key, idxs in groups.items():
+        results = await run_in_threadpool(
+            retrieval_cache.search_batch_scored,
+            retriever,
+            [build_query(items[i]) for i in idxs],
+            topk_laws=10,
+            topk_precedents=10,
+            scorer=key[0],
+            filters=filters[key],
+            expand=key[2],
+            dense_mode=key[3],
+        )
+        hits.update(zip(idxs, results))
+
+    async def run(i: int) -> str:
+        laws, precedents = hits[i]
+        # Batch kendi penceresiyle sınırlı; global kuyruk doluysa reddetmek yerine bekler.
+        resp = await generate_decision(items[i], laws, precedents, scorings[i], reject_when_full=False)
+        return json.dumps({"index": i, "ok": True, "result": resp.model_dump()}, ensure_ascii=False) + "\n"
+
+    def submit(i: int):
+        return None if i in errors else asyncio.ensure_future(run(i))
+
+    async def stream():
+        # Kayan pencere: en fazla BATCH_LLM_CONCURRENCY iş aynı anda yürür; sonuçlar giriş sırasıyla akar.
+        window = max(1, BATCH_LLM_CONCURRENCY)
+        pending: Deque[Tuple[int, Any]] = deque()
+        next_i = 0
+        try:
+            while next_i < len(items) or pending:
+                while next_i < len(items) and len(pending) < window:
+                    pending.append((next_i, submit(next_i)))
+                    next_i += 1
+                i, task = pending.popleft()
+                if task is None:
+                    yield _batch_error(i, errors[i])
+                    continue
+                try:
+                    yield await task
+                except HTTPException as e:
+                    yield _batch_error(i, e)
+                except Exception as e:
+                    yield _batch_error(i, HTTPException(status_code=500, detail=str(e)))
+        finally:
+            # İstemci bağlantıyı koparırsa kalan işleri iptal et.
+            for _, task in pending:
+                if task is not None:
+                    task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/render/{fmt}")
+async def render_decision(fmt: str, req: RenderRequest, if_none_match: Optional[str] = Header(None)):
+    """
+    Gerekçeli kararı PDF ya da DOCX olarak döndürür (dosya bellekte üretilir, parçalar halinde gönderilir).
+    ETag = içerik özeti; If-None-Match listesinde bu ETag (ya da "*") varsa 304 döner.
+    """
+    if fmt not in RENDER_FORMATS:
+        raise HTTPException(status_code=404, detail=f"Desteklenen biçimler: {list(RENDER_FORMATS)}")
+    title = req.title or DEFAULT_TITLE
+    key = render_cache.key(fmt, title, req.gerekceli_karar)
+    headers = {"ETag": f'"{key}"'}
+    if etag_matches(if_none_match, key):
+        return Response(status_code=304, headers=headers)
+
+    # Render CPU-bound: thread havuzunda; eşzamanlı özdeş istekler tek üretimi paylaşır.
+    async def run() -> bytes:
+        _, data = await run_in_threadpool(render_cache.render, fmt, title, req.gerekceli_karar)
+        return data
+
+    data = await render_flights.do(key, run)
+    headers["Content-Length"] = str(len(data))
+    headers["Content-Disposition"] = f'attachment; filename="gerekceli_karar_ratioai.{fmt}"'
+    return StreamingResponse(iter_chunks(data), media_type=RENDER_FORMATS[fmt], headers=headers)
+
+
+# İş kuyruğu: POST /jobs hemen iş id'si döner; üretim arka planda, dava türü başına sınırlı
+# eşzamanlılıkla yürür. Durum SQLite'ta; yeniden başlatmada yarım işler kuyruğa döner.
+JOBS_DB = Path(os.getenv("JOBS_DB", str(DATA_DIR / "jobs" / "jobs.sqlite3")))
+JOBS_MAX_WAIT_S = float(os.getenv("JOBS_MAX_WAIT_S", "60"))
+job_store = JobStore(JOBS_DB, max_attempts=int(os.getenv("JOBS_MAX_ATTEMPTS", "3")))
+
+
+async def run_job(request: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        # İş zaten kuyrukta bekledi: LLM kuyruğu doluysa reddetmek yerine bekler.
+        resp = await generate_response(GenerateRequest.model_validate(request), reject_when_full=False)
+    except HTTPException as e:
+        raise JobError(e.status_code, e.detail)
+    return resp.model_dump(mode="json")
+
+
+job_runner = JobRunner(
+    job_store,
+    run_job,
+    # ör. "CEZA=2,OZEL_HUKUK=4"; listede olmayan türler JOBS_DEFAULT_CONCURRENCY
+    limits=parse_limits(os.getenv("JOBS_CONCURRENCY", ""), int(os.getenv("JOBS_DEFAULT_CONCURRENCY", "2"))),
+    poll_s=float(os.getenv("JOBS_POLL_S", "2")),
+    stale_s=float(os.getenv("JOBS_STALE_S", "30")),
+    retention_s=float(os.getenv("JOBS_RETENTION_S", str(7 * 86400))),
+)
+
+
+@app.on_event("startup")
+async def start_jobs():
+    job_runner.start()
+
+
+def job_status(job: Dict[str, Any]) -> JobStatus:
+    return JobStatus.model_validate({k: v for k, v in job.items() if k != "request"})
+
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def create_job(req: GenerateRequest, priority: int = Query(0, ge=-100, le=100)):
+    # İstek hataları (veri yok, skorlayıcı, ceza puanları) iş açılmadan bildirilir.
+    retriever = index_manager.retriever
+    ensure_data_loaded(retriever)
+    check_scorer(req, retriever)
+    dense_mode_for(req, retriever)
+    criminal_scoring_for(req)
+    job = await run_in_threadpool(job_store.create, req.model_dump(mode="json"), req.dava_turu, priority)
+    job_runner.notify()
+    return job_status(job)
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, wait: float = Query(0, ge=0, description="Bitmesini en fazla bu kadar saniye bekle")):
+    wait = min(wait, JOBS_MAX_WAIT_S)
+    job = await job_runner.wait(job_id, wait) if wait > 0 else await run_in_threadpool(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"İş bulunamadı: {job_id}")
+    return job_status(job)
+
+
+@app.delete("/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    if await run_in_threadpool(job_store.cancel, job_id):
+        job_runner.cancel_local(job_id)
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"İş bulunamadı: {job_id}")
+    return job_status(job)
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field
+from datetime import date
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Literal, Optional, Dict, Any
 
 CaseType = Literal["OZEL_HUKUK", "CEZA"]
+ScorerName = Literal["tfidf", "bm25"]
+DenseMode = Literal["off", "hybrid", "dense"]
 
 
 class EvidenceItem(BaseModel):
@@ -17,11 +20,38 @@ class CriminalScores(BaseModel):
     toplumsal_zarar: int = Field(ge=0, le=10)
 
 
+class PrecedentFilter(BaseModel):
+    # Daire adında geçen ifadelerden biri, ör. ["Ceza"] -> tüm Ceza Daireleri
+    chambers: Optional[List[str]] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    # Etiketlerden en az biri, ör. ["TBK-49"]
+    tags: Optional[List[str]] = None
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise ValueError("date_from, date_to'dan sonra olamaz.")
+        return self
+
+
 class GenerateRequest(BaseModel):
     kisa_karar: str = Field(..., min_length=20)
     dava_turu: CaseType
     deliller: Optional[List[EvidenceItem]] = None
     ceza_puanlari: Optional[CriminalScores] = None
+    # None ise sunucunun varsayılan skorlayıcısı (RETRIEVAL_SCORERS'ın ilki)
+    scorer: Optional[ScorerName] = None
+    # İçtihat araması skorlamadan önce bu meta filtreyle daraltılır.
+    filters: Optional[PrecedentFilter] = None
+    # None ise sunucu ayarı (CITATION_EXPANSION); atıf grafıyla kanun/içtihat genişletmesi
+    expand_citations: Optional[bool] = None
+    # None ise sunucu ayarı (DENSE_MODE); "hybrid"/"dense" yoğun vektör indeksi gerektirir
+    dense_mode: Optional[DenseMode] = None
+
+
+class GenerateBatchRequest(BaseModel):
+    items: List[GenerateRequest] = Field(..., min_length=1)
 
 
 class RetrievedDoc(BaseModel):
@@ -31,9 +61,60 @@ class RetrievedDoc(BaseModel):
     meta: Dict[str, Any]
 
 
+class PrecedentIn(BaseModel):
+    id: str
+    text: str = Field(..., min_length=1)
+    title: Optional[str] = None
+    chamber: Optional[str] = None
+    date: Optional[str] = None
+    ek: Optional[str] = None
+    kk: Optional[str] = None
+    tags: List[str] = []
+    demo: bool = False
+
+
+class DecisionSection(BaseModel):
+    title: str
+    # gerekceli_karar içindeki karakter aralıkları: başlık [start, body_start), gövde [body_start, end)
+    start: int
+    body_start: int
+    end: int
+    # Model çıktısında yoktu; biçim düzeltmesi boş olarak ekledi
+    added: bool = False
+
+
 class GenerateResponse(BaseModel):
     gerekceli_karar: str
     used_laws: List[RetrievedDoc]
     used_precedents: List[RetrievedDoc]
     criminal_scoring: Optional[dict] = None
-    warnings: List[str] = []
\ No newline at end of file
+    warnings: List[str] = []
+    # Zorunlu bölümler, metindeki sırayla (istemcinin yeniden ayrıştırmasına gerek kalmaz)
+    sections: Optional[List[DecisionSection]] = None
+    # Prompt token tahmini, bütçe (num_ctx - çıktı payı) ve bölüm başına tutulan/kısaltılan pasajlar
+    prompt_stats: Optional[Dict[str, Any]] = None
+
+class RenderRequest(BaseModel):
+    # /generate yanıtındaki gerekceli_karar
+    gerekceli_karar: str = Field(..., min_length=1)
+    title: Optional[str] = None
+
+
+JobState = Literal["queued", "running", "done", "failed", "cancelled"]
+
+
+class JobStatus(BaseModel):
+    id: str
+    status: JobState
+    dava_turu: CaseType
+    # Büyük öncelik önce alınır (aynı dava türü içinde)
+    priority: int = 0
+    attempts: int = 0
+    # Unix zaman damgaları
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # status == "done"
+    result: Optional[GenerateResponse] = None
+    # status == "failed": {"status_code": ..., "detail": ...}
+    error: Optional[Dict[str, Any]] = None
@@ -1,13 +1,11 @@
+import hashlib
 import io
+import json
 import os
-import textwrap
+import time
 import requests
 import streamlit as st
-
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
+from requests.adapters import HTTPAdapter
 
 from pypdf import PdfReader
 
@@ -19,15 +17,29 @@ from pypdf import PdfReader
 # Render'da UI servisine Environment Variable olarak şunu vereceğiz:
 # API_BASE_URL = https://ratioai.onrender.com
 API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000").rstrip("/")
+GENERATE_TIMEOUT_S = float(os.getenv("GENERATE_TIMEOUT_S", "180"))
+# Akış sırasında ekranın en sık güncellenme aralığı (her token'da değil)
+STREAM_REFRESH_S = 0.1
 
 
 # ---------------------------
 # Helpers
 # ---------------------------
 
-def extract_text_from_pdf(uploaded_file) -> str:
-    """PDF -> text (best effort)."""
-    reader = PdfReader(uploaded_file)
+@st.cache_resource
+def http_session() -> requests.Session:
+    """Süreç başına tek oturum: bağlantılar (TCP/TLS) rerun'lar ve kullanıcılar arasında yeniden kullanılır."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def extract_text_from_pdf(file_hash: str, _data: bytes) -> str:
+    """PDF -> text (best effort). Önbellek anahtarı dosya özeti; aynı dosya her rerun'da yeniden ayrıştırılmaz."""
+    reader = PdfReader(io.BytesIO(_data))
     parts = []
     for page in reader.pages:
         t = page.extract_text() or ""
@@ -37,64 +49,72 @@ def extract_text_from_pdf(uploaded_file) -> str:
     return "\n\n".join(parts).strip()
 
 
-def make_pdf_bytes(title: str, content: str) -> bytes:
-    """Text -> PDF bytes (A4). Uses a font supporting Turkish chars if available."""
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
+RENDER_MIME = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
 
-    font_name = "Helvetica"
+class ApiError(Exception):
+    def __init__(self, status_code: int, detail):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def error_detail(r: requests.Response):
     try:
-        # Optional: try register a font that supports Turkish characters
-        candidates = [
-            r"C:\Windows\Fonts\DejaVuSans.ttf",
-            r"C:\Windows\Fonts\arial.ttf",
-            r"C:\Windows\Fonts\calibri.ttf",
-        ]
-        for p in candidates:
-            if os.path.exists(p):
-                pdfmetrics.registerFont(TTFont("CustomTR", p))
-                font_name = "CustomTR"
-                break
-    except Exception:
-        pass
-
-    margin = 40
-    y = height - margin
-
-    c.setFont(font_name, 14)
-    c.drawString(margin, y, title)
-    y -= 22
-
-    c.setFont(font_name, 10)
-
-    max_chars = 110
-    lines = []
-    for para in (content or "").splitlines():
-        if not para.strip():
-            lines.append("")
-            continue
-        lines.extend(
-            textwrap.wrap(
-                para,
-                width=max_chars,
-                break_long_words=False,
-                replace_whitespace=False,
-            )
-        )
-
-    line_height = 14
-    for line in lines:
-        if y <= margin:
-            c.showPage()
-            c.setFont(font_name, 10)
-            y = height - margin
-        c.drawString(margin, y, line)
-        y -= line_height
-
-    c.save()
-    buffer.seek(0)
-    return buffer.getvalue()
+        return r.json()
+    except ValueError:
+        return r.text
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def fetch_rendered(api_base_url: str, fmt: str, karar: str) -> bytes:
+    """API'nin /render/{fmt} ucundan PDF/DOCX; yalnızca başarılı sonuçlar önbelleğe girer."""
+    r = http_session().post(f"{api_base_url}/render/{fmt}", json={"gerekceli_karar": karar}, timeout=60)
+    if r.status_code != 200:
+        raise ApiError(r.status_code, error_detail(r))
+    return r.content
+
+
+def stream_events(url: str, payload: dict):
+    """/generate/stream SSE akışı -> (event, data) çiftleri, geldikçe."""
+    with http_session().post(url, json=payload, stream=True, timeout=(10, GENERATE_TIMEOUT_S)) as r:
+        if r.status_code != 200:
+            raise ApiError(r.status_code, error_detail(r))
+        r.encoding = "utf-8"
+        event, data = None, []
+        for line in r.iter_lines(chunk_size=1024, decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].strip())
+            elif not line and event:
+                yield event, json.loads("\n".join(data))
+                event, data = None, []
+
+
+def generate_streaming(url: str, payload: dict, placeholder) -> dict:
+    """Token'ları geldikçe gösterir; final olayındaki biçimlendirilmiş karar + kaynaklarla döner."""
+    meta: dict = {}
+    parts = []
+    last = 0.0
+    for event, data in stream_events(url, payload):
+        if event == "token":
+            parts.append(data.get("text", ""))
+            now = time.monotonic()
+            if now - last >= STREAM_REFRESH_S:
+                placeholder.text("".join(parts))
+                last = now
+        elif event in ("sources", "final"):
+            meta.update(data)
+        elif event == "error":
+            raise ApiError(data.get("status_code", 500), data.get("detail"))
+    placeholder.empty()
+    if "gerekceli_karar" not in meta:
+        raise ApiError(502, "Akış final olayı olmadan kapandı.")
+    return meta
 
 
 def build_payload(dava_turu: str, kisa_karar: str, deliller: list, ceza_puanlari: dict | None):
@@ -111,11 +131,11 @@ def build_payload(dava_turu: str, kisa_karar: str, deliller: list, ceza_puanlari
 def map_case_type(ui_value: str) -> str:
     """
     UI seçeneklerini API'nin beklediği değerlere çevir.
-    API tarafında CEZA özel; hukuk için HUKUK kullanıyoruz.
+    API tarafında CEZA özel; hukuk davaları OZEL_HUKUK.
     """
     if ui_value == "CEZA":
         return "CEZA"
-    return "HUKUK"
+    return "OZEL_HUKUK"
 
 
 # ---------------------------
@@ -136,7 +156,8 @@ with st.sidebar:
     # Base URL gösterelim (endpoint değil)
     api_base_url_input = st.text_input("API Base URL", value=API_BASE_URL, help="Örn: http://127.0.0.1:8000 veya https://ratioai.onrender.com")
     api_base_url = (api_base_url_input or "").strip().rstrip("/")
-    endpoint = f"{api_base_url}/generate"
+    use_stream = st.toggle("Akışlı üretim", value=True, help="Karar üretilirken metni parça parça göster (/generate/stream).")
+    endpoint = f"{api_base_url}/generate/stream" if use_stream else f"{api_base_url}/generate"
 
     st.divider()
 
@@ -145,7 +166,8 @@ with st.sidebar:
     pdf_text = ""
     if pdf_file is not None:
         try:
-            pdf_text = extract_text_from_pdf(pdf_file)
+            pdf_bytes = pdf_file.getvalue()
+            pdf_text = extract_text_from_pdf(hashlib.sha256(pdf_bytes).hexdigest(), pdf_bytes)
             if not pdf_text:
                 st.warning("PDF’den metin çıkarılamadı. (PDF tarama olabilir) Metni elle yapıştırman gerekebilir.")
             else:
@@ -222,18 +244,20 @@ with col2:
             payload = build_payload(dava_turu, kisa_karar.strip(), deliller, ceza_puanlari)
 
             try:
-                r = requests.post(endpoint, json=payload, timeout=180)
-                if r.status_code != 200:
-                    st.error(f"Hata: {r.status_code}")
-                    try:
-                        st.code(r.json(), language="json")
-                    except Exception:
-                        st.code(r.text)
+                if use_stream:
+                    data = generate_streaming(endpoint, payload, st.empty())
                 else:
+                    r = http_session().post(endpoint, json=payload, timeout=GENERATE_TIMEOUT_S)
+                    if r.status_code != 200:
+                        raise ApiError(r.status_code, error_detail(r))
                     data = r.json()
-                    st.session_state.generated = data.get("gerekceli_karar", "")
-                    st.session_state.generated_meta = data
-                    st.success("Karar üretildi ✅")
+                st.session_state.generated = data.get("gerekceli_karar", "")
+                st.session_state.generated_meta = data
+                st.session_state.render_requested = set()
+                st.success("Karar üretildi ✅")
+            except ApiError as e:
+                st.error(f"Hata: {e.status_code}")
+                st.code(e.detail, language="json")
             except requests.exceptions.RequestException as e:
                 st.error(f"API bağlantı hatası: {e}")
 
@@ -241,13 +265,26 @@ with col2:
     if karar:
         st.text_area("Çıktı", value=karar, height=520)
 
-        pdf_bytes = make_pdf_bytes("Gerekçeli Karar (RatioAI Demo)", karar)
-        st.download_button(
-            "📄 Gerekçeli Kararı PDF İndir",
-            data=pdf_bytes,
-            file_name="gerekceli_karar_ratioai.pdf",
-            mime="application/pdf",
-        )
+        # Dosya yalnızca istenince API'de üretilir (/render/{fmt}); sonuç karar metniyle önbellekte.
+        requested = st.session_state.setdefault("render_requested", set())
+        dl1, dl2 = st.columns(2)
+        for col, fmt, label in ((dl1, "pdf", "📄 PDF"), (dl2, "docx", "📝 DOCX")):
+            with col:
+                if fmt not in requested:
+                    if st.button(f"{label} hazırla", key=f"prepare_{fmt}"):
+                        requested.add(fmt)
+                        st.rerun()
+                    continue
+                try:
+                    st.download_button(
+                        f"{label} İndir",
+                        data=fetch_rendered(api_base_url, fmt, karar),
+                        file_name=f"gerekceli_karar_ratioai.{fmt}",
+                        mime=RENDER_MIME[fmt],
+                    )
+                except (ApiError, requests.exceptions.RequestException) as e:
+                    requested.discard(fmt)
+                    st.caption(f"{fmt.upper()} çıktısı alınamadı: {e}")
 
         with st.expander("Kullanılan kaynaklar / uyarılar (debug)"):
             meta = st.session_state.get("generated_meta", {})
@@ -0,0 +1,65 @@
+"""
+Paralel indeks kurulumunu süreç sayısına göre ölçer.
+
+Kullanım:
+    python tools/bench_build.py                      # 200k sentetik içtihat, 1..cpu süreç
+    python tools/bench_build.py --docs 50000 --workers 1,2,4
+
+Her süreç sayısı için vectorizer + skorlayıcı fit süresi raporlanır ve sonuç
+tek süreçli fit ile karşılaştırılır (sözlük, IDF, BM25 ağırlıkları, TF-IDF farkı).
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.core.retrieval import Retriever  # noqa: E402
+from bench_scorers import synth_corpus  # noqa: E402
+
+
+def default_workers() -> str:
+    cpus = os.cpu_count() or 1
+    steps = [1]
+    while steps[-1] * 2 <= cpus:
+        steps.append(steps[-1] * 2)
+    if steps[-1] != cpus:
+        steps.append(cpus)
+    return ",".join(map(str, steps))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark parallel index builds.")
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--doc-len", type=int, default=80)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", default=default_workers(), help="Virgülle ayrılmış süreç sayıları.")
+    parser.add_argument("--scorers", default="tfidf,bm25")
+    args = parser.parse_args()
+
+    docs, _ = synth_corpus(args.docs, args.vocab, args.doc_len, args.seed)
+    scorers = tuple(s.strip() for s in args.scorers.split(",") if s.strip())
+    print(f"corpus: {len(docs)} docs, cpu_count={os.cpu_count()}")
+
+    base = None
+    print(f"{'workers':>7} {'fit s':>8} {'speedup':>8} {'same vocab':>10} {'same idf':>9} {'max |Δ|':>9}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        t0 = time.perf_counter()
+        r = Retriever([], docs, scorers=scorers, build_workers=workers)
+        dt = time.perf_counter() - t0
+        if base is None:
+            base, base_dt = r, dt
+        same_vocab = r.prec_vec.vocabulary_ == base.prec_vec.vocabulary_
+        same_idf = np.array_equal(r.prec_vec.idf_, base.prec_vec.idf_)
+        delta = abs(r._prec_matrix - base._prec_matrix).max()
+        print(f"{workers:>7} {dt:>8.2f} {base_dt / dt:>8.2f} {str(same_vocab):>10} {str(same_idf):>9} {delta:>9.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Atıf grafı genişletmesini topk_precedents'i büyütmekle karşılaştırır.
+
+Sentetik korpus: her kanunun kendine özgü kelimeleri vardır; her içtihat 1-2 kanuna
+etiketle atıf yapar ve atıf yaptığı kanunların kelimelerini yalnızca kısmen içerir.
+Sorgu bir hedef kanunun birkaç kelimesidir; ilgili içtihatlar = hedef kanuna atıf yapanlar.
+
+Kullanım:
+    python tools/bench_citations.py                  # 200k içtihat
+    python tools/bench_citations.py --precedents 20000
+
+Raporlanan: sorgu gecikmesi, döndürülen içtihat sayısı, recall (bulunan ilgili / ilgili),
+milisaniye başına recall. Döndürülen her içtihat prompt'a girer; asıl karşılaştırma aynı
+sonuç bütçesinde (k=10) recall ve büyük k'nın prompt maliyetidir.
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.core.retrieval import Doc, Retriever  # noqa: E402
+
+LAW_WORDS = 10
+
+
+def synth_corpus(n_laws: int, n_precs: int, vocab: int, doc_len: int, overlap: float, seed: int):
+    rng = np.random.default_rng(seed)
+    general = np.array([f"k{i}" for i in range(vocab)])
+
+    def filler(n: int) -> list:
+        return list(general[np.minimum(rng.zipf(1.2, size=n) - 1, vocab - 1)])
+
+    law_words = [[f"m{i}w{j}" for j in range(LAW_WORDS)] for i in range(n_laws)]
+    laws = [
+        Doc(id=f"TBK-{i}", title=f"TBK m.{i}", text=" ".join(law_words[i] + filler(LAW_WORDS)), meta={"source": "TBK"})
+        for i in range(n_laws)
+    ]
+
+    precs, citing = [], [[] for _ in range(n_laws)]
+    for p in range(n_precs):
+        cited = rng.choice(n_laws, size=rng.integers(1, 3), replace=False)
+        words = filler(int(rng.integers(doc_len // 2, doc_len * 2)))
+        for law in cited:
+            citing[law].append(p)
+            words += [w for w in law_words[law] if rng.random() < overlap]
+        rng.shuffle(words)
+        precs.append(
+            Doc(id=f"SYN-{p}", title=f"SYN-{p}", text=" ".join(words), meta={"tags": [f"TBK-{c}" for c in cited]})
+        )
+
+    targets = rng.choice(n_laws, size=200, replace=False)
+    queries = [
+        (" ".join(list(rng.choice(law_words[t], size=3, replace=False)) + filler(6)), set(citing[t]))
+        for t in targets
+    ]
+    return laws, precs, queries
+
+
+def run(fn, queries):
+    ts, recalls, sizes = [], [], []
+    for q, relevant in queries:
+        t0 = time.perf_counter()
+        _, precs = fn(q)
+        ts.append((time.perf_counter() - t0) * 1000)
+        found = {int(d.id[4:]) for d in precs}
+        recalls.append(len(found & relevant) / max(1, len(relevant)))
+        sizes.append(len(precs))
+    return statistics.mean(ts), statistics.mean(sizes), statistics.mean(recalls)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark citation-graph expansion vs larger topk_precedents.")
+    parser.add_argument("--laws", type=int, default=2000)
+    parser.add_argument("--precedents", type=int, default=200_000)
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--doc-len", type=int, default=80)
+    parser.add_argument("--overlap", type=float, default=0.15, help="içtihadın atıf yaptığı kanun kelimesini içerme olasılığı")
+    parser.add_argument("--scorer", default="bm25", choices=("tfidf", "bm25"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    laws, precs, queries = synth_corpus(args.laws, args.precedents, args.vocab, args.doc_len, args.overlap, args.seed)
+    r = Retriever(laws, precs, scorers=(args.scorer,))
+    print(f"corpus + fit: {len(laws)} laws, {len(precs)} precedents ({time.perf_counter() - t0:.1f}s)")
+    print(f"citation graph: {r.citation_stats()}")
+
+    print(f"{'mode':<16} {'mean ms':>8} {'results':>8} {'recall':>8} {'recall/ms':>10}")
+    for k in (10, 20, 40, 80, 160):
+        mean, size, recall = run(lambda q: r.search(q, 10, k), queries)
+        print(f"{f'direct k={k}':<16} {mean:>8.2f} {size:>8.1f} {recall:>8.3f} {recall / mean:>10.4f}")
+    mean, size, recall = run(lambda q: r.search(q, 10, 10, expand=True), queries)
+    print(f"{'expand k=10':<16} {mean:>8.2f} {size:>8.1f} {recall:>8.3f} {recall / mean:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Yoğun vektör ANN (IVF) için recall@k / gecikme ölçümü.
+
+Sentetik, kümelenmiş birim vektörler (gerçek embedding'ler gibi konu kümeleri) üzerinde
+IVF indeksi kurulur; her nprobe ve niceleme (float32 / int8) için sonuçlar tam
+(float32 brute-force) tarama ile karşılaştırılır.
+
+Kullanım:
+    python tools/bench_dense.py                      # 200k x 256
+    python tools/bench_dense.py --docs 50000 --dim 128
+
+Raporlanan: kurulum süresi, bellek, nprobe başına recall@k ve sorgu gecikmesi (ortalama / p95).
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.core.dense import DenseConfig, DenseIndex, _normalize  # noqa: E402
+
+
+def synth_vectors(n_docs: int, dim: int, n_topics: int, n_queries: int, noise: float, seed: int):
+    """Konu merkezleri + gürültü (noise: gürültü vektörünün konu vektörüne göre normu)."""
+    rng = np.random.default_rng(seed)
+    topics = _normalize(rng.standard_normal((n_topics, dim)))
+
+    def sample(n: int) -> np.ndarray:
+        jitter = rng.standard_normal((n, dim)).astype(np.float32) * (noise / np.sqrt(dim))
+        return _normalize(topics[rng.integers(0, n_topics, size=n)] + jitter)
+
+    return sample(n_docs), sample(n_queries)
+
+
+def exact_topk(docs: np.ndarray, q: np.ndarray, k: int) -> np.ndarray:
+    scores = docs @ q
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dense IVF recall@k vs latency.")
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.8)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0, help="0 = otomatik (~sqrt(n))")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    docs, queries = synth_vectors(args.docs, args.dim, args.topics, args.queries, args.noise, args.seed)
+    print(f"vectors: {args.docs} x {args.dim} ({docs.nbytes / 1e6:.0f} MB float32), {args.queries} queries")
+
+    ts = []
+    for q in queries:
+        t0 = time.perf_counter()
+        exact_topk(docs, q, args.k)
+        ts.append((time.perf_counter() - t0) * 1000)
+    truth = [set(exact_topk(docs, q, args.k).tolist()) for q in queries]
+    ts.sort()
+    print(f"brute force float32: mean {statistics.mean(ts):.2f} ms  p95 {ts[int(len(ts) * 0.95)]:.2f} ms")
+
+    print(f"{'quant':<8} {'nprobe':>6} {'recall@k':>9} {'mean ms':>8} {'p95 ms':>8}")
+    for quant in ("float32", "int8"):
+        t0 = time.perf_counter()
+        index = DenseIndex.build(DenseConfig(quantize=quant, nlist=args.nlist), None, docs, seed=args.seed)
+        print(f"-- {quant}: build {time.perf_counter() - t0:.1f}s, {index.n_lists} lists, "
+              f"{index.store.nbytes / 1e6:.0f} MB")
+        for nprobe in (1, 2, 4, 8, 16, 32, index.n_lists):
+            ts, recalls = [], []
+            for q, exp in zip(queries, truth):
+                t0 = time.perf_counter()
+                rows, _ = index.search(q, args.k, len(docs), nprobe=nprobe)
+                ts.append((time.perf_counter() - t0) * 1000)
+                recalls.append(len(exp & set(rows.tolist())) / args.k)
+            ts.sort()
+            label = "all" if nprobe == index.n_lists else str(nprobe)
+            print(f"{quant:<8} {label:>6} {statistics.mean(recalls):>9.3f} {statistics.mean(ts):>8.2f} "
+                  f"{ts[int(len(ts) * 0.95)]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+LLM yönlendiricisi (LLMRouter) için yerel taklit sunucularla yük/arıza denemesi.
+
+Her --backend bir taklit Ollama sunucusu başlatır: "gecikme_ms[:hata_oranı[:kuyruk_olasılığı]]".
+- gecikme_ms: /api/generate yanıt süresi (±%20),
+- hata_oranı: 500 dönen isteklerin oranı,
+- kuyruk_olasılığı: yanıtın 10 kat yavaş geldiği isteklerin oranı (uzun kuyruk; hedge için).
+Sunucu /api/tags (sağlık) ve stream=True NDJSON akışını da taklit eder.
+
+Senaryolar (her biri aynı istek kümesiyle):
+- single: yalnızca ilk sunucu (eski tek OLLAMA_URL davranışı),
+- router: tüm sunucular, en az bekleyen iş + devre kesici + failover,
+- router+hedge: ek olarak --hedge-ms sonra ikinci sunucuya hedge,
+- router+outage: router, koşunun ortasında ilk sunucu kapatılır (devre açılmalı).
+
+Kullanım:
+    python tools/bench_llm_router.py
+    python tools/bench_llm_router.py --backend 40 --backend 40:0:0.1 --backend 40:0.3 --requests 300 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.core.llm_client import OllamaClient  # noqa: E402
+from app.core.llm_router import LLMRouter  # noqa: E402
+
+
+class StandIn:
+    def __init__(self, spec: str, seed: int):
+        parts = [float(x) for x in spec.split(":")] + [0.0, 0.0]
+        self.latency_s, self.error_rate, self.tail_p = parts[0] / 1000.0, parts[1], parts[2]
+        self.rng = random.Random(seed)
+        self.down = False
+        self.served = 0
+        self.lock = threading.Lock()
+        self.server = self._serve()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _delay(self) -> float:
+        with self.lock:
+            d = self.latency_s * self.rng.uniform(0.8, 1.2)
+            if self.rng.random() < self.tail_p:
+                d *= 10
+            return d
+
+    def _fails(self) -> bool:
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+    def _serve(self) -> ThreadingHTTPServer:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, code: int, obj: dict) -> None:
+                raw = json.dumps(obj).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                if stand_in.down:
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                self._send(200, {"models": [{"name": "stand-in"}]})
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if stand_in.down:
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                time.sleep(stand_in._delay())
+                if stand_in._fails():
+                    self._send(500, {"error": "stand-in failure"})
+                    return
+                with stand_in.lock:
+                    stand_in.served += 1
+                text = f"Karar ({stand_in.url})."
+                if not body.get("stream"):
+                    self._send(200, {"response": text, "done": True})
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for obj in ({"response": text[:6], "done": False}, {"response": text[6:], "done": True}):
+                    line = (json.dumps(obj) + "\n").encode("utf-8")
+                    self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                # Hedge kaybeden / iptal edilen istemciler bağlantıyı kapatır: beklenen durum.
+                if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+                    super().handle_error(request, client_address)
+
+        server = Server(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def make_router(urls: List[str], hedge_s: float) -> LLMRouter:
+    clients = [OllamaClient(u, "stand-in", timeout_s=30, max_concurrency=4, max_queue=1000) for u in urls]
+    return LLMRouter(clients, hedge_after_s=hedge_s, cooldown_s=1.0, health_interval_s=0.5, health_timeout_s=1.0)
+
+
+async def run(router: LLMRouter, n: int, concurrency: int, outage: StandIn = None) -> Dict[str, float]:
+    router.start()
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with sem:
+            if outage is not None and i == n // 3:
+                outage.down = True
+            t0 = time.perf_counter()
+            try:
+                if i % 4 == 0:
+                    async for _ in router.generate_stream(f"istek {i}"):
+                        pass
+                else:
+                    await router.generate(f"istek {i}")
+                latencies.append(time.perf_counter() - t0)
+            except Exception:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    wall = time.perf_counter() - t0
+    stats = router.stats()
+    await router.aclose()
+    lat = sorted(latencies) or [0.0]
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "p50": statistics.median(lat) * 1000,
+        "p95": lat[min(len(lat) - 1, int(0.95 * len(lat)))] * 1000,
+        "rps": n / wall,
+        "stats": stats,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exercise the multi-backend LLM router against stand-in servers.")
+    parser.add_argument("--backend", action="append", default=None, help="gecikme_ms[:hata_oranı[:kuyruk_olasılığı]]")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--hedge-ms", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    specs = args.backend or ["40", "40:0:0.1", "40:0.2"]
+
+    scenarios = [
+        ("single", lambda s: [s[0].url], 0.0, False),
+        ("router", lambda s: [x.url for x in s], 0.0, False),
+        ("router+hedge", lambda s: [x.url for x in s], args.hedge_ms / 1000.0, False),
+        ("router+outage", lambda s: [x.url for x in s], 0.0, True),
+    ]
+    print(f"backends: {specs}, {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'scenario':<14} {'ok':>5} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>7}  per-backend requests/errors/breaker")
+    for name, urls_of, hedge_s, outage in scenarios:
+        stand_ins = [StandIn(spec, args.seed + i) for i, spec in enumerate(specs)]
+        router = make_router(urls_of(stand_ins), hedge_s)
+        res = asyncio.run(run(router, args.requests, args.concurrency, stand_ins[0] if outage else None))
+        per = "  ".join(
+            f"[{b['requests']}/{b['errors']}/{b['breaker']}]" for b in res["stats"]["backends"]
+        )
+        extra = f"  hedges {res['stats']['hedges']} failovers {res['stats']['failovers']}"
+        print(f"{name:<14} {res['ok']:>5} {res['errors']:>5} {res['p50']:>8.1f} {res['p95']:>8.1f} {res['rps']:>7.1f}  {per}{extra}")
+        for s in stand_ins:
+            s.server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Gerekçeli karar post-process'i (postprocess_karar) için mikro benchmark.
+
+Önceki uygulama (her eksik başlık eklemesinden sonra tüm metni yeniden büyük harfe
+çevirip boşlukları normalize eden, desenleri her çağrıda derleyen sürüm) referans
+olarak burada tutulur. ~50 KB model çıktıları üzerinde:
+- "full": tüm başlıklar var,
+- "missing": hiçbir başlık yok (hepsi eklenir; eski sürümde en kötü durum),
+- "half": başlıkların yarısı var.
+
+Kullanım:
+    python tools/bench_postprocess.py
+    python tools/bench_postprocess.py --kb 200 --repeat 20
+"""
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.core.sections import REQUIRED_SECTIONS, postprocess_karar  # noqa: E402
+from app.core.validators import validate_has_sections  # noqa: E402
+
+
+def legacy_format(raw: str, dava_turu: str) -> str:
+    text = (raw or "").strip()
+
+    header = (
+        "T.C.\n"
+        "RATIOAI HUKUKİ KARAR DESTEK SİSTEMİ\n"
+        "(Akademik Prototip)\n\n"
+        f"DOSYA TÜRÜ: {dava_turu}\n"
+        "--------------------------------------------------\n\n"
+    )
+    if "RATIOAI HUKUKİ KARAR DESTEK SİSTEMİ" not in text:
+        text = header + text
+
+    def norm(s: str) -> str:
+        return re.sub(r"\s+", " ", (s or "").upper()).strip()
+
+    up = norm(text)
+    for sec in REQUIRED_SECTIONS:
+        if sec not in up:
+            text += f"\n\n{sec}\n(İşbu başlık altında dosya kapsamına göre ayrıca değerlendirme yapılır.)\n"
+            up = norm(text)
+
+    text = re.sub(r"\n-{10,}\n", "\n--------------------------------------------------\n", text)
+
+    if "VII. SONUÇ VE HÜKÜM" in text:
+        after = text.split("VII. SONUÇ VE HÜKÜM", 1)[1]
+        if not re.search(r"\n\s*1\)", after):
+            text = text.replace("VII. SONUÇ VE HÜKÜM", "VII. SONUÇ VE HÜKÜM\n1) ", 1)
+
+    return text.strip()
+
+
+def synth_output(kb: int, sections: list, rng: random.Random) -> str:
+    words = "davalı davacı kusur zarar tazminat sözleşme ihtar tanık bilirkişi rapor ödeme temerrüt".split()
+    per_section = kb * 1024 // max(1, len(sections) or 1)
+    out = []
+    for sec in sections or [None]:
+        if sec:
+            out.append(sec)
+        body, size = [], 0
+        while size < per_section:
+            line = " ".join(rng.choice(words) for _ in range(12)) + "."
+            body.append(line)
+            size += len(line) + 1
+        out.append("\n".join(body))
+        out.append("-" * 30)
+    return "\n".join(out)
+
+
+def bench(fn, text: str, repeat: int) -> float:
+    ts = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(text)
+        ts.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(ts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark single-pass decision post-processing.")
+    parser.add_argument("--kb", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = {
+        "full": REQUIRED_SECTIONS,
+        "half": REQUIRED_SECTIONS[::2],
+        "missing": [],
+    }
+    print(f"{'case':<8} {'KB':>5} {'legacy ms':>10} {'post ms':>8} {'+validate ms':>13} {'speedup':>8}")
+    for name, secs in cases.items():
+        text = synth_output(args.kb, secs, rng)
+        legacy = bench(lambda t: legacy_format(t, "OZEL_HUKUK"), text, args.repeat)
+        new = bench(lambda t: postprocess_karar(t, "OZEL_HUKUK"), text, args.repeat)
+
+        def with_validate(t: str) -> None:
+            r = postprocess_karar(t, "OZEL_HUKUK")
+            validate_has_sections(r.text, r.found)
+
+        full = bench(with_validate, text, args.repeat)
+        print(f"{name:<8} {len(text) / 1024:>5.0f} {legacy:>10.2f} {new:>8.2f} {full:>13.2f} {legacy / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
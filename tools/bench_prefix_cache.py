@@ -0,0 +1,195 @@
+"""
+Sabit prompt öneki yeniden kullanımının prefill süresine etkisi (yerel taklit sunucu ile).
+
+Taklit sunucu Ollama'nın /api/generate uç noktasını taklit eder:
+- prompt en fazla 4 karakterlik parçalara (~BPE token'ı) bölünür; her yeni (önbellekte
+  olmayan) token --prefill-ms kadar bekletir,
+- --slots adet KV-cache yuvası tutar (llama.cpp gibi): ortak öneki yeni prompt'un en az
+  SLOT_SIMILARITY'si olan en benzer yuva, yoksa en eski yuva kullanılır; yalnızca seçilen
+  yuvayla ortak önekten sonraki token'lar işlenir,
+- istek keep_alive göndermezse model istekten sonra boşaltılır (yuvalar silinir;
+  OLLAMA_KEEP_ALIVE=0 ya da modeller arası sık geçiş gibi),
+- `context` gönderilirse prompt token'larının önüne eklenir; yanıtta context döner.
+
+İstekler gerçek build_prompt çıktılarıdır (dava türleri karışık, gövde her istekte farklı).
+Karşılaştırılan: OllamaClient prefix_cache = off | keep_alive | context.
+
+Kullanım:
+    python tools/bench_prefix_cache.py
+    python tools/bench_prefix_cache.py --requests 60 --prefill-ms 0.5 --slots 4
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.core.llm_client import PREFIX_CACHE_MODES, OllamaClient  # noqa: E402
+from app.core.prompting import build_prompt, prompt_prefix  # noqa: E402
+from app.core.retrieval import Doc  # noqa: E402
+
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]|\s+")
+SLOT_SIMILARITY = 0.5
+CASE_TYPES = ("OZEL_HUKUK", "CEZA")
+
+
+def _common_prefix(a: List[int], b: List[int]) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class StandInLLM:
+    def __init__(self, prefill_ms: float, slots: int):
+        self.prefill_s = prefill_ms / 1000.0
+        self.n_slots = slots
+        self.vocab: Dict[str, int] = {}
+        self.slots: List[List[int]] = []
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.evaluated: List[int] = []
+        self.prompt_tokens: List[int] = []
+        self.prefill_ms: List[float] = []
+        self.slots = []
+
+    def tokenize(self, text: str) -> List[int]:
+        return [self.vocab.setdefault(t, len(self.vocab)) for t in _TOKEN_RE.findall(text)]
+
+    def generate(self, body: dict) -> dict:
+        with self.lock:  # tek GPU: istekler sırayla işlenir
+            tokens = list(body.get("context") or []) + self.tokenize(body["prompt"])
+            common = [_common_prefix(cached, tokens) for cached in self.slots]
+            best = max(range(len(common)), key=common.__getitem__, default=None)
+            if best is not None and common[best] < SLOT_SIMILARITY * len(tokens) and len(self.slots) == self.n_slots:
+                best = 0  # en eski yuva
+            elif best is not None and common[best] < SLOT_SIMILARITY * len(tokens):
+                best = None  # boş yuva
+            shared = common[best] if best is not None else 0
+            todo = len(tokens) - shared
+            t0 = time.perf_counter()
+            time.sleep(todo * self.prefill_s)
+            self.prefill_ms.append((time.perf_counter() - t0) * 1000)
+            self.evaluated.append(todo)
+            self.prompt_tokens.append(len(tokens))
+
+            out = self.tokenize("Karar.")[: int(body.get("options", {}).get("num_predict") or 2)]
+            if body.get("keep_alive") in (None, 0, "0", "0s"):
+                self.slots = []
+            else:
+                # Kullanılan yuva en sona (en yeni); yer yoksa en eski yuva boşaltılır.
+                if best is not None:
+                    del self.slots[best]
+                self.slots = (self.slots + [tokens])[-self.n_slots:]
+            return {
+                "response": "Karar.",
+                "done": True,
+                "context": tokens + out,
+                "prompt_eval_count": todo,
+                "eval_count": len(out),
+            }
+
+
+def serve(llm: StandInLLM) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            raw = json.dumps(llm.generate(body)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def synth_prompts(n: int, seed: int) -> List[tuple]:
+    rng = random.Random(seed)
+    words = "davalı davacı kusur zarar tazminat sözleşme ihtar tanık bilirkişi rapor ödeme temerrüt".split()
+
+    def text(k: int) -> str:
+        return " ".join(rng.choice(words) for _ in range(k)) + "."
+
+    scoring = {
+        "scores": {"kast_taksir": 6, "gecmis": 3, "islenis_sekli": 5, "magdur_etki": 4, "toplumsal_zarar": 2},
+        "total": 20,
+        "band": "ORTA",
+        "takdir_aciklama": "Temel cezanın alt sınırdan uzaklaşılarak belirlenmesi.",
+    }
+    prompts = []
+    for i in range(n):
+        dava_turu = rng.choice(CASE_TYPES)
+        laws = [Doc(id=f"TBK-{j}", title=f"Madde {j}", text=text(40), meta={}) for j in rng.sample(range(600), 3)]
+        precs = [
+            Doc(id=f"Y-{j}", title=f"Y-{j}", text=text(60), meta={"chamber": "4. HD", "date": "2020-01-01"})
+            for j in rng.sample(range(5000), 3)
+        ]
+        prompt = build_prompt(
+            kisa_karar=text(30),
+            dava_turu=dava_turu,
+            evidences=[{"name": "Tanık", "content": text(25)}],
+            laws=laws,
+            precedents=precs,
+            criminal_scoring=scoring if dava_turu == "CEZA" else None,
+        )
+        prompts.append((prompt, prompt_prefix(dava_turu)))
+    return prompts
+
+
+async def run_mode(url: str, mode: str, prompts: List[tuple]) -> float:
+    client = OllamaClient(url, "stand-in", prefix_cache=mode, keep_alive="30m", max_concurrency=1)
+    t0 = time.perf_counter()
+    for prompt, prefix in prompts:
+        await client.generate(prompt, prefix=prefix)
+    await client.aclose()
+    return (time.perf_counter() - t0) * 1000 / len(prompts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark static prompt prefix reuse against a stand-in LLM server.")
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--prefill-ms", type=float, default=0.1, help="token başına prefill süresi")
+    parser.add_argument("--slots", type=int, default=1, help="sunucudaki KV-cache yuvası (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    llm = StandInLLM(args.prefill_ms, args.slots)
+    server = serve(llm)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    prompts = synth_prompts(args.requests, args.seed)
+    prefix_tokens = statistics.mean(len(llm.tokenize(p)) for _, p in prompts)
+    print(f"{args.requests} prompts, mean prefix {prefix_tokens:.0f} tokens, "
+          f"mean prompt {statistics.mean(len(llm.tokenize(p)) for p, _ in prompts):.0f} tokens")
+
+    print(f"{'mode':<12} {'prefill ms':>10} {'eval tok':>9} {'request ms':>11}")
+    for mode in PREFIX_CACHE_MODES:
+        llm.reset_stats()
+        per_request = asyncio.run(run_mode(url, mode, prompts))
+        # İlk (soğuk) istekler dahil ortalama; context modunda önek isteği de sayılır.
+        print(f"{mode:<12} {statistics.mean(llm.prefill_ms):>10.1f} {statistics.mean(llm.evaluated):>9.0f} "
+              f"{per_request:>11.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
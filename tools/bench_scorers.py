@@ -0,0 +1,94 @@
+"""
+TF-IDF ve BM25 skorlayıcılarını sentetik bir içtihat korpusunda karşılaştırır.
+
+Kullanım:
+    python tools/bench_scorers.py                 # 500k doküman (uzun sürer, birkaç GB RAM)
+    python tools/bench_scorers.py --docs 50000    # hızlı deneme
+
+Raporlanan:
+- fit süresi (vectorizer + skorlayıcı ağırlıkları)
+- skorlayıcı başına posting dizilerinin bellek boyutu
+- sorgu gecikmesi (ortalama / p50 / p95), inverted ve exhaustive modda
+- --rank-bm25-docs > 0 ise rank_bm25.BM25Okapi (doküman başına Python döngüsü) referansı
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.core.retrieval import Doc, Retriever  # noqa: E402
+
+
+def synth_corpus(n_docs: int, vocab: int, doc_len: int, seed: int):
+    """Zipf dağılımlı kelimelerden sentetik içtihat metinleri."""
+    rng = np.random.default_rng(seed)
+    words = np.array([f"k{i}" for i in range(vocab)])
+    lengths = rng.integers(doc_len // 2, doc_len * 2, size=n_docs)
+    ranks = np.minimum(rng.zipf(1.2, size=int(lengths.sum())) - 1, vocab - 1)
+    tokens = words[ranks]
+    docs, pos = [], 0
+    for i, n in enumerate(lengths):
+        docs.append(Doc(id=f"SYN-{i}", title=f"SYN-{i}", text=" ".join(tokens[pos:pos + n]), meta={}))
+        pos += n
+    queries = [" ".join(words[np.minimum(rng.zipf(1.2, size=12) - 1, vocab - 1)]) for _ in range(200)]
+    return docs, queries
+
+
+def latency(fn, queries):
+    ts = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        ts.append((time.perf_counter() - t0) * 1000)
+    ts.sort()
+    return statistics.mean(ts), ts[len(ts) // 2], ts[int(len(ts) * 0.95)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark TF-IDF vs BM25 retrieval.")
+    parser.add_argument("--docs", type=int, default=500_000)
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--doc-len", type=int, default=80)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rank-bm25-docs", type=int, default=20_000,
+                        help="rank_bm25 referansı için alt küme boyutu (0 = atla)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    docs, queries = synth_corpus(args.docs, args.vocab, args.doc_len, args.seed)
+    print(f"corpus: {len(docs)} docs, {len(queries)} queries ({time.perf_counter() - t0:.1f}s)")
+
+    t0 = time.perf_counter()
+    r = Retriever([], docs, scorers=("tfidf", "bm25"))
+    print(f"fit (tfidf + bm25): {time.perf_counter() - t0:.1f}s")
+
+    print(f"{'scorer':<8} {'mode':<11} {'index MB':>9} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name in ("tfidf", "bm25"):
+        inv = r._inv["precedent"][name]
+        mb = (inv.data.nbytes + inv.indices.nbytes + inv.indptr.nbytes) / 1e6
+        for mode in ("inverted", "exhaustive"):
+            r.search_mode = mode
+            mean, p50, p95 = latency(lambda q: r.search(q, 0, 10, scorer=name), queries)
+            print(f"{name:<8} {mode:<11} {mb:>9.1f} {mean:>8.2f} {p50:>8.2f} {p95:>8.2f}")
+    r.search_mode = "inverted"
+
+    if args.rank_bm25_docs > 0:
+        from rank_bm25 import BM25Okapi
+
+        sub = docs[: args.rank_bm25_docs]
+        analyzer = r.prec_vec.build_analyzer()
+        t0 = time.perf_counter()
+        ref = BM25Okapi([analyzer(d.text) for d in sub])
+        print(f"\nrank_bm25 on {len(sub)} docs: fit {time.perf_counter() - t0:.1f}s")
+        mean, p50, p95 = latency(lambda q: np.argsort(ref.get_scores(analyzer(q)))[::-1][:10], queries[:20])
+        print(f"rank_bm25 BM25Okapi   mean {mean:.2f} ms  p50 {p50:.2f} ms  p95 {p95:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+TF-IDF indeksini bir kez fit edip diske yazar.
+
+Kullanım:
+    python tools/build_index.py [--out data/index] [--workers 8] [--dense lsa]
+
+API (app/main.py) açılışta bu indeksi mmap ile açar; indeks yoksa veya
+korpusla uyuşmuyorsa eskisi gibi bellekte fit eder.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.core.analyzer import ANALYZERS  # noqa: E402
+from app.core.dense import DENSE_BACKENDS, QUANTIZATIONS, DenseConfig  # noqa: E402
+from app.core.index_store import index_lock  # noqa: E402
+from app.core.retrieval import Retriever, load_jsonl  # noqa: E402
+
+DATA_DIR = BASE_DIR / "data"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the on-disk TF-IDF index.")
+    parser.add_argument("--laws", type=Path, default=DATA_DIR / "laws" / "laws.jsonl")
+    parser.add_argument("--precedents", type=Path, default=DATA_DIR / "precedents" / "precedents.jsonl")
+    parser.add_argument("--out", type=Path, default=DATA_DIR / "index")
+    parser.add_argument("--scorers", default="tfidf,bm25", help="Comma-separated scorers to precompute.")
+    parser.add_argument("--analyzer", default="turkish_stem", choices=ANALYZERS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Vectorizer fit için süreç sayısı (1 = tek süreç).")
+    parser.add_argument("--dense", choices=DENSE_BACKENDS, default=None,
+                        help="İçtihatlar için yoğun vektör indeksi de kur (lsa: ek model yok, st: yerel model).")
+    parser.add_argument("--dense-model", default=None, help="st: yerel sentence-transformers model klasörü")
+    parser.add_argument("--dense-vectors", default=None, help="Önceden hesaplanmış vektörler (.npy + .ids.json)")
+    parser.add_argument("--dense-dim", type=int, default=256)
+    parser.add_argument("--dense-quant", choices=QUANTIZATIONS, default="int8")
+    parser.add_argument("--dense-nlist", type=int, default=0, help="IVF liste sayısı (0 = otomatik)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    law_docs = load_jsonl(args.laws, kind="law")
+    prec_docs = load_jsonl(args.precedents, kind="precedent")
+    t1 = time.perf_counter()
+
+    scorers = tuple(s.strip() for s in args.scorers.split(",") if s.strip())
+    dense = None
+    if args.dense:
+        dense = DenseConfig(
+            backend=args.dense,
+            model=args.dense_model,
+            vectors=args.dense_vectors,
+            dim=args.dense_dim,
+            quantize=args.dense_quant,
+            nlist=args.dense_nlist,
+        )
+    retriever = Retriever(
+        law_docs, prec_docs, scorers=scorers, build_workers=args.workers, analyzer=args.analyzer, dense=dense
+    )
+    t2 = time.perf_counter()
+
+    # Çalışan API worker'larının compaction'ı ile aynı anda yayımlamamak için.
+    with index_lock(args.out):
+        out = retriever.save(args.out)
+    t3 = time.perf_counter()
+
+    print("OK:")
+    print(f"- {len(law_docs)} kanun, {len(prec_docs)} içtihat yüklendi ({t1 - t0:.2f}s)")
+    print(f"- fit: {t2 - t1:.2f}s ({args.workers} süreç, analizör: {args.analyzer})")
+    if dense is not None:
+        print(f"- yoğun indeks: {retriever.dense_stats()}")
+    print(f"- {out} yazıldı ({t3 - t2:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
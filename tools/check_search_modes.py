@@ -0,0 +1,88 @@
+"""
+Inverted, exhaustive ve batch aramanın demo korpusta aynı sonucu verdiğini doğrular.
+
+Kullanım:
+    python tools/check_search_modes.py
+    python tools/check_search_modes.py --query "demo karar" --query "kira alacağı"
+
+Her analizör ve skorlayıcı için (atıf genişletmesi açık/kapalı) sorgular üç yoldan
+çalıştırılır: tek sorgu inverted, tek sorgu exhaustive, toplu (search_batch_scored)
+inverted. Kanun ve içtihat id listeleri sırasıyla birlikte, skorlar 1e-9 toleransla
+karşılaştırılır. Demo içtihatların metni aynı olduğundan "demo karar" tam eşitlik
+durumunu sınar (eşitlikte küçük indeks önce, bkz. topk.select_topk).
+Fark varsa ayrıntı basılır ve çıkış kodu 1 olur.
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.core.analyzer import ANALYZERS  # noqa: E402
+from app.core.retrieval import Retriever, load_jsonl  # noqa: E402
+
+DATA_DIR = BASE_DIR / "data"
+DEFAULT_QUERIES = [
+    "demo karar",
+    "manevi tazminat",
+    "kira alacağı tahliye",
+    "ispat yükü delillerin tartışılması",
+    "haksız fiil kusur",
+    "zzzz qqqq",
+]
+
+
+def describe(hits) -> List[str]:
+    return [f"{d.id}:{s:.6f}" for d, s in hits]
+
+
+def same(a, b) -> bool:
+    return [d.id for d, _ in a] == [d.id for d, _ in b] and np.allclose(
+        [s for _, s in a], [s for _, s in b], rtol=0, atol=1e-9
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check that inverted, exhaustive and batch search agree.")
+    parser.add_argument("--laws", type=Path, default=DATA_DIR / "laws" / "laws.jsonl")
+    parser.add_argument("--precedents", type=Path, default=DATA_DIR / "precedents" / "precedents.jsonl")
+    parser.add_argument("--query", action="append", default=None)
+    parser.add_argument("--topk", type=int, default=8)
+    args = parser.parse_args()
+
+    law_docs = load_jsonl(args.laws, kind="law")
+    prec_docs = load_jsonl(args.precedents, kind="precedent")
+    queries = args.query or DEFAULT_QUERIES + [d.title for d in law_docs[:20]]
+
+    checked = failed = 0
+    for analyzer in ANALYZERS:
+        r = Retriever(law_docs, prec_docs, scorers=("tfidf", "bm25"), analyzer=analyzer)
+        for scorer in r.scorer_names:
+            for expand in (False, True):
+                kw = dict(scorer=scorer, expand=expand)
+                r.search_mode = "inverted"
+                inverted = [r.search_scored(q, args.topk, args.topk, **kw) for q in queries]
+                batch = r.search_batch_scored(queries, args.topk, args.topk, **kw)
+                r.search_mode = "exhaustive"
+                exhaustive = [r.search_scored(q, args.topk, args.topk, **kw) for q in queries]
+                for q, inv, bat, exh in zip(queries, inverted, batch, exhaustive):
+                    for kind, i in (("laws", 0), ("precedents", 1)):
+                        checked += 1
+                        if same(inv[i], exh[i]) and same(inv[i], bat[i]):
+                            continue
+                        failed += 1
+                        print(f"MISMATCH analyzer={analyzer} scorer={scorer} expand={expand} {kind} q={q!r}")
+                        print(f"  inverted:   {describe(inv[i])}")
+                        print(f"  exhaustive: {describe(exh[i])}")
+                        print(f"  batch:      {describe(bat[i])}")
+
+    print(f"{checked} result lists checked, {failed} mismatches")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
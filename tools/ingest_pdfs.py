@@ -0,0 +1,229 @@
+"""
+Yargıtay karar PDF'lerini toplu olarak precedents.jsonl'e ekler.
+
+Kullanım:
+    python tools/ingest_pdfs.py PDF_KLASÖRÜ [--out data/precedents/precedents.jsonl] [--workers 8]
+
+- Klasör özyinelemeli taranır; metin çıkarma + ayrıştırma bir süreç havuzunda yapılır
+  (bkz. app/core/pdf_ingest.py).
+- Durum dosyası (varsayılan: <out>.state.jsonl) dosya başına boyut, mtime ve içerik
+  özetini tutar. Boyutu ve mtime'ı değişmeyen dosyalar açılmaz bile; değişenler
+  özetlenir, içerik aynıysa metin çıkarılmaz. Böylece 100k PDF üzerinde yeniden
+  çalıştırma yalnızca yeni dosyalara dokunur.
+- Kayıtlar geldikçe (--flush-every satırda bir) precedents.jsonl'e eklenir; çalışan API
+  yeni satırları artımlı olarak alır (IndexManager.sync). Her flush'tan sonra durum
+  dosyasına çıktının boyutu (checkpoint) yazılır; kesilen bir çalışmadan sonra yalnızca
+  checkpoint'ten sonraki kayıtlar okunur ve aynı içerik ikinci kez yazılmaz.
+- Hatalı/metinsiz dosyalar durumda işaretlenir ve içerikleri değişmedikçe yeniden
+  denenmez (--retry-errors ile denenir).
+- Daha önce eklenmiş bir dosyanın içeriği değiştiyse yeni kaydı eklenir, eski kaydı
+  (başka bir dosya aynı içeriğe sahip değilse) çalışma sonunda çıktıdan çıkarılır.
+  Çıktı bunun için yeniden yazılır; çalışan API bunu algılayıp baştan yükler.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası dosya kilidi yok
+    fcntl = None
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.core.doc_store import iter_jsonl  # noqa: E402
+from app.core.pdf_ingest import ID_PREFIX, content_key, ingest_file, init_worker  # noqa: E402
+
+DATA_DIR = BASE_DIR / "data"
+# Çıktıda kaydı bulunan içeriklerin durumları.
+LIVE = ("ok", "duplicate")
+
+
+def scan_pdfs(root: Path) -> Iterator[Tuple[str, int, int]]:
+    """(yol, boyut, mtime_ns); os.scandir ile (stat çağrısı girdi başına bir kez)."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.name.lower().endswith(".pdf"):
+                    st = entry.stat()
+                    yield entry.path, st.st_size, st.st_mtime_ns
+
+
+def load_state(path: Path) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """
+    (dosya yolu -> son durum satırı, son checkpoint). Dosya eklemelidir; sonraki satır
+    öncekini geçersiz kılar.
+    """
+    state: Dict[str, Dict[str, Any]] = {}
+    checkpoint = 0
+    if not path.exists():
+        return state, checkpoint
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # kesilmiş son satır
+            if "checkpoint" in row:
+                checkpoint = row["checkpoint"]
+            else:
+                state[row["path"]] = row
+    return state, checkpoint
+
+
+def keys_after(out: Path, offset: int) -> Set[str]:
+    """Checkpoint'ten sonra yazılmış (durumu kaydedilmemiş olabilecek) PDF kayıtlarının anahtarları."""
+    if not out.exists() or out.stat().st_size <= offset:
+        return set()
+    return {
+        obj["id"][len(ID_PREFIX):]
+        for _, obj, _ in iter_jsonl(out, offset)
+        if str(obj.get("id", "")).startswith(ID_PREFIX)
+    }
+
+
+def drop_records(out: Path, ids: Set[str]) -> int:
+    """
+    ids'deki kayıtları çıkararak çıktıyı yeniden yazar (geçici dosya + os.replace).
+    Kopyalama boyunca dosya kilitlenir; API'nin eklemeleri (IndexManager.append) beklerken kaybolmaz.
+    """
+    tmp = out.with_name(f"{out.name}.tmp-{os.getpid()}")
+    marker = ID_PREFIX.encode("utf-8")
+    dropped = 0
+    with out.open("rb") as src:
+        if fcntl is not None:
+            fcntl.flock(src, fcntl.LOCK_EX)
+        with tmp.open("wb") as dst:
+            for raw in src:
+                # Tam ayrıştırma yalnızca PDF kayıtları için (id ilk alan).
+                if marker in raw[:64] and json.loads(raw).get("id") in ids:
+                    dropped += 1
+                    continue
+                dst.write(raw)
+        os.replace(tmp, out)
+    return dropped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest Yargıtay decision PDFs into precedents.jsonl.")
+    parser.add_argument("pdf_dir", type=Path)
+    parser.add_argument("--out", type=Path, default=DATA_DIR / "precedents" / "precedents.jsonl")
+    parser.add_argument("--state", type=Path, default=None, help="varsayılan: <out>.state.jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--window", type=int, default=0, help="uçuştaki en fazla dosya (0 = 4 x workers)")
+    parser.add_argument("--flush-every", type=int, default=100)
+    parser.add_argument("--retry-errors", action="store_true", help="hatalı/metinsiz dosyaları yeniden dene")
+    args = parser.parse_args()
+
+    state_path = args.state or args.out.with_name(args.out.name + ".state.jsonl")
+    state, checkpoint = load_state(state_path)
+    retry = {"error", "empty"} if args.retry_errors else set()
+    known = {content_key(row["sha256"]) for row in state.values() if row.get("sha256") and row["status"] not in retry}
+    known |= keys_after(args.out, checkpoint)
+
+    t0 = time.perf_counter()
+    todo: List[Tuple[str, int, int]] = []
+    seen = 0
+    for path, size, mtime_ns in scan_pdfs(args.pdf_dir):
+        seen += 1
+        prev = state.get(path)
+        if prev and prev["size"] == size and prev["mtime_ns"] == mtime_ns and prev["status"] not in retry:
+            continue
+        todo.append((path, size, mtime_ns))
+    if args.retry_errors:
+        # Yeniden denenecek içerikler "bilinen" sayılmamalı; diğer özetler aynı kalır.
+        known -= {
+            content_key(state[p]["sha256"])
+            for p, _, _ in todo
+            if p in state and state[p].get("sha256") and state[p]["status"] in retry
+        }
+    print(f"scan: {seen} PDFs, {len(todo)} new/changed ({time.perf_counter() - t0:.1f}s)")
+    if not todo:
+        return
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    counts: Dict[str, int] = {}
+    written = set(known)
+    # İçeriği değişen dosyaların eski içerik anahtarları (kayıtları çıkarılmaya aday).
+    stale: Set[str] = set()
+    out_lines: List[str] = []
+    state_lines: List[str] = []
+
+    def flush() -> None:
+        # Önce kayıtlar, sonra durum + checkpoint (bkz. keys_after).
+        with args.out.open("a", encoding="utf-8") as f:
+            f.write("".join(out_lines))
+            size = f.tell()
+        out_lines.clear()
+        state_lines.append(json.dumps({"checkpoint": size}) + "\n")
+        with state_path.open("a", encoding="utf-8") as f:
+            f.write("".join(state_lines))
+        state_lines.clear()
+
+    def collect(result: Dict[str, Any]) -> None:
+        row, record = result["state"], result["record"]
+        if record is not None and content_key(row["sha256"]) in written:
+            # Aynı içerik bu çalışmada başka bir yoldan zaten yazıldı.
+            row, record = {**row, "status": "duplicate", "id": None}, None
+        prev = state.get(row["path"])
+        if prev and prev["status"] in LIVE and prev["sha256"] != row["sha256"]:
+            stale.add(content_key(prev["sha256"]))
+        state[row["path"]] = row
+        if record is not None:
+            written.add(content_key(row["sha256"]))
+            out_lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        state_lines.append(json.dumps(row, ensure_ascii=False) + "\n")
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+        if len(state_lines) >= args.flush_every:
+            flush()
+
+    t1 = time.perf_counter()
+    window = args.window or 4 * max(1, args.workers)
+    try:
+        if args.workers <= 1:
+            init_worker(known)
+            for item in todo:
+                collect(ingest_file(*item))
+        else:
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(known,)) as pool:
+                pending = set()
+                for item in todo:
+                    pending.add(pool.submit(ingest_file, *item))
+                    if len(pending) >= window:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            collect(fut.result())
+                for fut in pending:
+                    collect(fut.result())
+    finally:
+        flush()
+
+    # Eski içerik hâlâ başka bir dosyada duruyorsa (duplicate) kaydı korunur.
+    live = {content_key(r["sha256"]) for r in state.values() if r["status"] in LIVE}
+    drop = {ID_PREFIX + k for k in stale - live}
+    if drop and args.out.exists():
+        replaced = drop_records(args.out, drop)
+        with state_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"checkpoint": args.out.stat().st_size}) + "\n")
+        counts["replaced"] = replaced
+
+    dt = time.perf_counter() - t1
+    summary = ", ".join(f"{k} {v}" for k, v in sorted(counts.items()))
+    print(f"ingest: {len(todo)} files in {dt:.1f}s ({len(todo) / max(dt, 1e-9):.1f} files/s): {summary}")
+    print(f"out: {args.out}  state: {state_path}")
+
+
+if __name__ == "__main__":
+    main()